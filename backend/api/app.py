@@ -1,8 +1,18 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from backend.api.dependencies import NEXT_CURSOR_HEADER
 from backend.api.routers import accounts, canvases, modules, runs
 from backend.core.config import get_settings
+from backend.core.backends import get_execution_backend
+from backend.core.cache import get_cache_manager
+from backend.core.scheduler import CanvasScheduler
+from backend.core.worker import RunWorker
+from backend.crud.pagination import InvalidCursorError
+from backend.db.engine import get_pool_metrics, prewarm_pool
 
 settings = get_settings()
 
@@ -18,14 +28,58 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.exception_handler(InvalidCursorError)
+def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # Include routers
 app.include_router(accounts.router, prefix=f"{settings.API_V1_PREFIX}/accounts", tags=["accounts"])
 app.include_router(canvases.router, prefix=f"{settings.API_V1_PREFIX}/canvases", tags=["canvases"])
 app.include_router(modules.router, prefix=f"{settings.API_V1_PREFIX}/modules", tags=["modules"])
 app.include_router(runs.router, prefix=f"{settings.API_V1_PREFIX}/runs", tags=["runs"])
 
+@app.on_event("startup")
+def prewarm_connection_pool():
+    """Open the pooled connections up front when DB_POOL_PREWARM is set"""
+    if settings.DB_POOL_PREWARM:
+        prewarm_pool()
+
+@app.on_event("startup")
+async def start_embedded_run_worker():
+    """Execute queued runs in the API process unless RUN_WORKER_EMBEDDED is turned off"""
+    if settings.RUN_WORKER_EMBEDDED:
+        app.state.run_worker = RunWorker()
+        app.state.run_worker_task = asyncio.create_task(app.state.run_worker.run())
+
+@app.on_event("shutdown")
+async def stop_embedded_run_worker():
+    """Let the embedded worker finish its active runs"""
+    if getattr(app.state, "run_worker", None) is not None:
+        app.state.run_worker.stop()
+        await app.state.run_worker_task
+
+@app.on_event("startup")
+async def start_embedded_scheduler():
+    """Queue scheduled canvas runs from the API process when SCHEDULER_EMBEDDED is set"""
+    if settings.SCHEDULER_EMBEDDED:
+        app.state.scheduler = CanvasScheduler()
+        app.state.scheduler_task = asyncio.create_task(app.state.scheduler.run())
+
+@app.on_event("shutdown")
+async def stop_embedded_scheduler():
+    if getattr(app.state, "scheduler", None) is not None:
+        app.state.scheduler.stop()
+        await app.state.scheduler_task
+
+@app.on_event("shutdown")
+def shutdown_execution_backend():
+    """Stop module worker processes and flush cache uploads with the API"""
+    get_execution_backend().shutdown()
+    get_cache_manager().shutdown()
+
 @app.get("/")
 def root():
     return {
@@ -37,4 +91,14 @@ def root():
 @app.get("/api/health")
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "version": "1.0.0"} 
\ No newline at end of file
+    return {"status": "healthy", "version": "1.0.0"}
+
+@app.get("/api/db/pool")
+def db_pool_metrics():
+    """Connection pool occupancy and checkout latency (the async engine's under ``async``)"""
+    return get_pool_metrics()
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Module cache hit/miss/eviction counters"""
+    return get_cache_manager().stats()
\ No newline at end of file
@@ -1,7 +1,16 @@
-from typing import Generator
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator, List, Optional, Sequence
+import asyncio
+from fastapi import Query, Response
 from sqlalchemy.orm import Session
 
-from backend.models.database import SessionLocal
+from backend.core.config import get_settings
+from backend.models.database import SessionLocal, get_async_sessionmaker
+from backend.crud.pagination import Keyset, decode_cursor
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Session of read endpoints: a Session, or an AsyncSession with DB_ASYNC
+ReadSession = Any
 
 def get_db() -> Generator[Session, None, None]:
     """Get database session."""
@@ -9,4 +18,46 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_read_db() -> AsyncGenerator[ReadSession, None]:
+    """
+    Get a session for read endpoints: an async session with DB_ASYNC, else a
+    sync one. Pass it to ``read``.
+    """
+    if get_settings().DB_ASYNC:
+        async with get_async_sessionmaker()() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def read(
+    db: ReadSession,
+    sync_read: Callable[..., Any],
+    async_read: Callable[..., Awaitable[Any]],
+    *args,
+    **kwargs
+) -> Any:
+    """
+    Call a read of the async CRUD on an async session, or the same read of the
+    sync CRUD in a thread, off the event loop.
+    """
+    if isinstance(db, Session):
+        return await asyncio.to_thread(sync_read, db, *args, **kwargs)
+    return await async_read(db, *args, **kwargs)
+
+def get_cursor(
+    cursor: Optional[str] = Query(None, description=f"Token from the {NEXT_CURSOR_HEADER} header of the previous page")
+) -> Optional[List[Any]]:
+    """Decode the cursor of a paginated listing (InvalidCursorError -> 400)."""
+    return decode_cursor(cursor) if cursor else None
+
+def set_next_cursor(response: Response, keyset: Keyset, items: Sequence[Any], limit: int):
+    """Point the client at the next page of a listing, if there is one."""
+    next_cursor = keyset.next_cursor(items, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -1,11 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from backend.api.dependencies import get_db
+from backend.api.dependencies import ReadSession, get_db, get_read_db, get_cursor, read, set_next_cursor
 from backend.models.database import Account
 from backend.schemas.account import AccountCreate, AccountUpdate, AccountResponse
-from backend.crud.account import AccountCRUD
+from backend.crud.account import AccountCRUD, AsyncAccountCRUD, ACCOUNT_KEYSET
 
 router = APIRouter()
 
@@ -18,15 +18,24 @@ def create_account(account: AccountCreate, db: Session = Depends(get_db)):
     return AccountCRUD.create(db=db, obj_in=account)
 
 @router.get("/", response_model=List[AccountResponse])
-def list_accounts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_accounts(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[list] = Depends(get_cursor),
+    db: ReadSession = Depends(get_read_db)
+):
     """List all accounts"""
-    accounts = AccountCRUD.get_multi(db, skip=skip, limit=limit)
+    accounts = await read(
+        db, AccountCRUD.get_multi, AsyncAccountCRUD.get_multi, skip=skip, limit=limit, after=after
+    )
+    set_next_cursor(response, ACCOUNT_KEYSET, accounts, limit)
     return accounts
 
 @router.get("/{account_id}", response_model=AccountResponse)
-def get_account(account_id: int, db: Session = Depends(get_db)):
+async def get_account(account_id: int, db: ReadSession = Depends(get_read_db)):
     """Get a specific account by ID"""
-    db_account = AccountCRUD.get(db, id=account_id)
+    db_account = await read(db, AccountCRUD.get, AsyncAccountCRUD.get, id=account_id)
     if db_account is None:
         raise HTTPException(status_code=404, detail="Account not found")
     return db_account
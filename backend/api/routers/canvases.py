@@ -1,9 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-from backend.api.dependencies import get_db
-from backend.crud.canvas import CanvasCRUD
+from backend.api.dependencies import ReadSession, get_db, get_read_db, get_cursor, read, set_next_cursor
+from backend.crud.canvas import CanvasCRUD, AsyncCanvasCRUD, CANVAS_KEYSET
 from backend.schemas.canvas import (
     Canvas,
     CanvasCreate,
@@ -27,23 +27,29 @@ def create_canvas(
     return canvas
 
 @router.get("", response_model=List[Canvas])
-def get_canvases(
+async def get_canvases(
     account_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    after: Optional[list] = Depends(get_cursor),
+    db: ReadSession = Depends(get_read_db)
 ):
     """Get all canvases for an account."""
-    canvases = CanvasCRUD.get_by_account(db=db, account_id=account_id, skip=skip, limit=limit)
+    canvases = await read(
+        db, CanvasCRUD.get_by_account, AsyncCanvasCRUD.get_by_account,
+        account_id=account_id, skip=skip, limit=limit, after=after
+    )
+    set_next_cursor(response, CANVAS_KEYSET, canvases, limit)
     return canvases
 
 @router.get("/{canvas_id}", response_model=Canvas)
-def get_canvas(
+async def get_canvas(
     canvas_id: str,
-    db: Session = Depends(get_db)
+    db: ReadSession = Depends(get_read_db)
 ):
     """Get a specific canvas by ID."""
-    canvas = CanvasCRUD.get(db=db, canvas_id=canvas_id)
+    canvas = await read(db, CanvasCRUD.get, AsyncCanvasCRUD.get, canvas_id=canvas_id)
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
     return canvas
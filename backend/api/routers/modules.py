@@ -1,18 +1,19 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from backend.api.dependencies import get_db
+from backend.api.dependencies import ReadSession, get_db, get_read_db, get_cursor, read, set_next_cursor
 from backend.models.database import Module, ModuleVersion
 from backend.schemas.module import (
     ModuleCreate, 
     ModuleUpdate, 
     ModuleResponse,
+    ModuleSummaryResponse,
     ModuleVersionCreate,
     ModuleVersionUpdate,
     ModuleVersionResponse
 )
-from backend.crud.module import ModuleCRUD
+from backend.crud.module import ModuleCRUD, AsyncModuleCRUD, MODULE_KEYSET
 
 router = APIRouter()
 
@@ -22,14 +23,16 @@ def create_module(module: ModuleCreate, db: Session = Depends(get_db)):
     """Create a new module"""
     return ModuleCRUD.create(db=db, obj_in=module)
 
-@router.get("/", response_model=List[ModuleResponse])
-def list_modules(
+@router.get("/", response_model=List[ModuleSummaryResponse])
+async def list_modules(
+    response: Response,
     account_id: Optional[int] = None,
     module_type: Optional[str] = None,
     category: Optional[str] = None,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    after: Optional[list] = Depends(get_cursor),
+    db: ReadSession = Depends(get_read_db)
 ):
     """List all modules with optional filtering"""
     filters = {
@@ -38,16 +41,18 @@ def list_modules(
         "category": category
     }
     filters = {k: v for k, v in filters.items() if v is not None}
-    
-    modules = ModuleCRUD.get_multi(
-        db, filters=filters, skip=skip, limit=limit
+
+    modules = await read(
+        db, ModuleCRUD.get_multi, AsyncModuleCRUD.get_multi,
+        filters=filters, skip=skip, limit=limit, after=after
     )
+    set_next_cursor(response, MODULE_KEYSET, modules, limit)
     return modules
 
 @router.get("/{module_id}", response_model=ModuleResponse)
-def get_module(module_id: str, db: Session = Depends(get_db)):
+async def get_module(module_id: str, db: ReadSession = Depends(get_read_db)):
     """Get a specific module by ID"""
-    db_module = ModuleCRUD.get_by_module_id(db, module_id=module_id)
+    db_module = await read(db, ModuleCRUD.get_by_module_id, AsyncModuleCRUD.get_by_module_id, module_id=module_id)
     if db_module is None:
         raise HTTPException(status_code=404, detail="Module not found")
     return db_module
@@ -84,33 +89,35 @@ def create_module_version(
     return ModuleCRUD.create_version(db=db, module_id=module_id, obj_in=version)
 
 @router.get("/{module_id}/versions", response_model=List[ModuleVersionResponse])
-def list_module_versions(
+async def list_module_versions(
     module_id: str,
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    db: ReadSession = Depends(get_read_db)
 ):
     """List all versions of a module"""
-    db_module = ModuleCRUD.get_by_module_id(db, module_id=module_id)
+    db_module = await read(db, ModuleCRUD.get_by_module_id, AsyncModuleCRUD.get_by_module_id, module_id=module_id)
     if db_module is None:
         raise HTTPException(status_code=404, detail="Module not found")
-    
-    return ModuleCRUD.get_versions(
-        db, module_id=module_id, skip=skip, limit=limit
+
+    return await read(
+        db, ModuleCRUD.get_versions, AsyncModuleCRUD.get_versions,
+        module_id=module_id, skip=skip, limit=limit
     )
 
 @router.get(
     "/{module_id}/versions/{version}", 
     response_model=ModuleVersionResponse
 )
-def get_module_version(
+async def get_module_version(
     module_id: str,
     version: str,
-    db: Session = Depends(get_db)
+    db: ReadSession = Depends(get_read_db)
 ):
     """Get a specific version of a module"""
-    db_version = ModuleCRUD.get_version(
-        db, module_id=module_id, version=version
+    db_version = await read(
+        db, ModuleCRUD.get_version, AsyncModuleCRUD.get_version,
+        module_id=module_id, version=version
     )
     if db_version is None:
         raise HTTPException(status_code=404, detail="Module version not found")
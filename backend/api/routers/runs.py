@@ -1,9 +1,12 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from backend.api.dependencies import get_db
-from backend.models.database import Canvas
+from backend.api.dependencies import ReadSession, get_db, get_read_db, get_cursor, read, set_next_cursor
+from backend.models.database import SessionLocal
 from backend.schemas.run import (
     CanvasRun,
     CanvasRunCreate,
@@ -13,47 +16,16 @@ from backend.schemas.run import (
     ModuleRunStats,
     ModuleRunResult
 )
-from backend.crud.run import RunCRUD
+from backend.crud.run import RunCRUD, AsyncRunCRUD, RUN_KEYSET
 from backend.crud.canvas import CanvasCRUD
-from backend.core.executor import CanvasExecutor
+from backend.crud.run_job import RunJobCRUD
+from backend.core.config import get_settings
+from backend.core import events
+from backend.core.events import get_event_bus
 
-router = APIRouter()
+settings = get_settings()
 
-async def execute_canvas_background(
-    canvas: Canvas,
-    run_id: str,
-    db: Session
-) -> None:
-    """Execute canvas in background"""
-    executor = CanvasExecutor(canvas)
-    
-    try:
-        # Execute all modules
-        results = await executor.execute()
-        
-        # Update run status
-        final_status = RunStatus.COMPLETED
-        if any(r.status == RunStatus.FAILED for r in results.values()):
-            final_status = RunStatus.FAILED
-        
-        run_update = CanvasRunUpdate(
-            status=final_status,
-            module_runs=results
-        )
-        
-        db_run = RunCRUD.get_by_run_id(db, run_id=run_id)
-        if db_run:
-            RunCRUD.update(db=db, db_obj=db_run, obj_in=run_update)
-            
-    except Exception as e:
-        # Update run status to failed
-        run_update = CanvasRunUpdate(
-            status=RunStatus.FAILED,
-            error={"error": str(e)}
-        )
-        db_run = RunCRUD.get_by_run_id(db, run_id=run_id)
-        if db_run:
-            RunCRUD.update(db=db, db_obj=db_run, obj_in=run_update)
+router = APIRouter()
 
 @router.post("/canvas/{canvas_id}/run", response_model=CanvasRunResponse)
 def create_canvas_run(
@@ -67,12 +39,16 @@ def create_canvas_run(
     return run
 
 @router.post("/{run_id}/execute", response_model=CanvasRunResponse)
-async def execute_run(
+def execute_run(
     run_id: str,
-    background_tasks: BackgroundTasks,
+    priority: int = Query(0, description="Runs with a higher priority are executed first"),
+    incremental: bool = Query(
+        False,
+        description="Only execute the modules changed since the last successful run, and the modules downstream of them"
+    ),
     db: Session = Depends(get_db)
 ):
-    """Execute a specific run."""
+    """Queue a specific run for execution by a run worker."""
     run = RunCRUD.get_run(db=db, run_id=run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
@@ -81,46 +57,179 @@ async def execute_run(
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
 
-    # Start execution in background
-    background_tasks.add_task(
-        execute_canvas_background,
-        canvas=canvas,
+    if RunJobCRUD.get_by_run_id(db, run_id):
+        raise HTTPException(status_code=409, detail="Run has already been queued")
+    if incremental:
+        run = RunCRUD.update(
+            db=db,
+            db_obj=run,
+            obj_in=CanvasRunUpdate(cache_config={**(run.cache_config or {}), "incremental": True})
+        )
+    job = RunJobCRUD.enqueue(
+        db,
         run_id=run_id,
-        db=db
+        account_id=canvas.account_id,
+        priority=priority,
+        max_attempts=settings.RUN_JOB_MAX_ATTEMPTS
     )
+    if not job:
+        raise HTTPException(status_code=409, detail="Run has already been queued")
 
     return run
 
 @router.get("/canvas/{canvas_id}/runs", response_model=List[CanvasRunResponse])
-def get_canvas_runs(
+async def get_canvas_runs(
     canvas_id: str,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    after: Optional[list] = Depends(get_cursor),
+    db: ReadSession = Depends(get_read_db)
 ):
-    """Get all runs for a canvas."""
-    runs = RunCRUD.get_runs_by_canvas(db=db, canvas_id=canvas_id, skip=skip, limit=limit)
+    """Get all runs for a canvas, newest first."""
+    runs = await read(
+        db, RunCRUD.get_runs_by_canvas, AsyncRunCRUD.get_runs_by_canvas,
+        canvas_id=canvas_id, skip=skip, limit=limit, after=after
+    )
+    set_next_cursor(response, RUN_KEYSET, runs, limit)
     return runs
 
 @router.get("/{run_id}", response_model=CanvasRunResponse)
-def get_run(
+async def get_run(
     run_id: str,
-    db: Session = Depends(get_db)
+    db: ReadSession = Depends(get_read_db)
 ):
     """Get a specific run by ID."""
-    run = RunCRUD.get_run(db=db, run_id=run_id)
+    run = await read(db, RunCRUD.get_run, AsyncRunCRUD.get_run, run_id=run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
     return run
 
 @router.get("/{run_id}/modules", response_model=List[ModuleRunResult])
-def get_module_results(
+async def get_module_results(
     run_id: str,
-    db: Session = Depends(get_db)
+    db: ReadSession = Depends(get_read_db)
 ):
     """Get all module results for a run."""
-    results = RunCRUD.get_module_results(db=db, run_id=run_id)
-    return results
+    return await read(db, RunCRUD.get_module_results, AsyncRunCRUD.get_module_results, run_id=run_id)
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Format a run event as a Server-Sent Events message"""
+    lines = [f"event: {event['type']}", f"data: {json.dumps(event, default=str)}"]
+    if event.get("id"):
+        lines.insert(0, f"id: {event['id']}")
+    return "\n".join(lines) + "\n\n"
+
+async def stream_run_events(run_id: str, last_event_id: Optional[int]) -> AsyncIterator[str]:
+    """Relay the events of a run, with comment lines to keep idle connections open"""
+    stream = get_event_bus().subscribe(run_id, last_event_id)
+    next_event = None
+    try:
+        while True:
+            if next_event is None:
+                next_event = asyncio.ensure_future(stream.__anext__())
+            done, _ = await asyncio.wait({next_event}, timeout=settings.RUN_EVENTS_KEEPALIVE_SECONDS)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            try:
+                event = next_event.result()
+            except StopAsyncIteration:
+                return
+            next_event = None
+            yield format_sse(event)
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+        await stream.aclose()
+
+def load_run_progress(run_id: str):
+    db = SessionLocal()
+    try:
+        return RunCRUD.get_run(db, run_id), RunCRUD.get_module_results(db, run_id)
+    finally:
+        db.close()
+
+async def relay_stored_run_events(run_id: str) -> AsyncIterator[str]:
+    """
+    Follow a run executed by another process (a run worker) through its
+    stored module results, checked every RUN_EVENTS_POLL_SECONDS. These
+    events have no ids; a reconnecting client gets the current state again.
+    """
+    seen: Dict[str, str] = {}
+    idle = 0.0
+    while True:
+        run, results = await asyncio.to_thread(load_run_progress, run_id)
+        if not run:
+            return
+        changed = False
+        for result in results:
+            if seen.get(result.module_id) == result.status:
+                continue
+            seen[result.module_id] = result.status
+            if result.status == RunStatus.RUNNING:
+                event_type = events.MODULE_STARTED
+            elif result.status in (RunStatus.COMPLETED, RunStatus.FAILED):
+                event_type = events.MODULE_FINISHED
+            else:
+                continue
+            changed = True
+            yield format_sse({
+                "run_id": run_id,
+                "type": event_type,
+                "data": {
+                    "module_id": result.module_id,
+                    "status": result.status,
+                    "started_at": result.started_at,
+                    "execution_time": (result.metrics or {}).get("execution_time"),
+                    "cache_hit": (result.metrics or {}).get("cache_hit"),
+                    "error": (result.error or {}).get("error")
+                }
+            })
+        if run.status in (RunStatus.COMPLETED, RunStatus.FAILED, RunStatus.CANCELLED):
+            yield format_sse({"run_id": run_id, "type": events.RUN_FINISHED, "data": {"status": run.status}})
+            return
+        idle = 0.0 if changed else idle + settings.RUN_EVENTS_POLL_SECONDS
+        if idle >= settings.RUN_EVENTS_KEEPALIVE_SECONDS:
+            idle = 0.0
+            yield ": keepalive\n\n"
+        await asyncio.sleep(settings.RUN_EVENTS_POLL_SECONDS)
+
+@router.get("/{run_id}/events")
+async def get_run_events(
+    run_id: str,
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Stream the progress of a run as Server-Sent Events.
+
+    When this process executes the run, its events are relayed from the
+    event bus: buffered events are replayed first, starting after the
+    ``Last-Event-ID`` header when a client reconnects. Runs executed by other
+    processes are followed through their stored results instead, and a run
+    that already finished gets a single ``run_finished`` event with its
+    stored status.
+    """
+    if get_event_bus().has_run(run_id):
+        stream = stream_run_events(run_id, last_event_id)
+    else:
+        # Off the event loop, without holding a connection for the stream
+        run, _ = await asyncio.to_thread(load_run_progress, run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Run not found")
+        if run.status in (RunStatus.COMPLETED, RunStatus.FAILED, RunStatus.CANCELLED):
+            snapshot = {"run_id": run_id, "type": events.RUN_FINISHED, "data": {"status": run.status}}
+            return StreamingResponse(iter([format_sse(snapshot)]), media_type="text/event-stream")
+        stream = relay_stored_run_events(run_id)
+
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Don't let nginx buffer the stream
+        }
+    )
 
 @router.post("/{run_id}/status")
 def update_run_status(
@@ -154,6 +263,8 @@ def update_module_result(
     metrics: Optional[dict] = None,
     cache_location: Optional[str] = None,
     error: Optional[dict] = None,
+    input_hash: Optional[str] = None,
+    output_hash: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """Update a module run result."""
@@ -164,7 +275,9 @@ def update_module_result(
         status=status,
         metrics=metrics,
         cache_location=cache_location,
-        error=error
+        error=error,
+        input_hash=input_hash,
+        output_hash=output_hash
     )
     if not result:
         raise HTTPException(status_code=404, detail="Module result not found")
@@ -0,0 +1,176 @@
+"""
+Named artifacts passed between the modules of a run.
+
+Modules declare what they produce and consume in their version config::
+
+    {"outputs": ["frame"], "inputs": ["frame"]}
+
+``inputs`` is either a list of artifact names or a mapping of the variable
+to bind to ``"name"`` or ``"module_id.name"``; a plain name refers to the
+ancestor declaring that output. Declared inputs are bound as variables of the
+module namespace, and a module declaring inputs gets an empty
+``previous_results``: it is handed what it asked for and nothing else.
+
+Within a process artifacts are handed over by reference. When they cross into
+a worker process, artifacts over ``inline_max_bytes`` are written once, in the
+cache entry format, to a per-run directory (on tmpfs by default) and every
+reader memory-maps that file instead of receiving a pickled copy.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import re
+import shutil
+import threading
+import uuid
+
+from backend.core.cache import serialization
+from backend.core.cache.sizing import estimate_size
+from backend.core.config import get_settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an install requirement
+    np = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ArtifactRef:
+    """Handle on an artifact written to a run's artifact directory"""
+    path: str
+    nbytes: int
+
+def payload_size(value: Any) -> int:
+    """
+    Get the bytes sending a value to another process would copy: for numpy
+    arrays (views included) their own data, not the buffer they keep alive
+    """
+    if np is not None and isinstance(value, np.ndarray):
+        return value.nbytes
+    return estimate_size(value)
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+
+def write_artifact(directory: str, module_id: str, name: str, value: Any) -> ArtifactRef:
+    """Write an artifact so other processes can map it"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{_safe_name(module_id)}.{_safe_name(name)}.{uuid.uuid4().hex[:8]}")
+    return ArtifactRef(path=path, nbytes=serialization.dump(value, path))
+
+def load_artifact(value: Any) -> Any:
+    """Get the value behind an ``ArtifactRef`` (memory-mapped), or ``value`` itself"""
+    if isinstance(value, ArtifactRef):
+        return serialization.load(value.path)
+    return value
+
+def declared_outputs(config: Optional[Dict[str, Any]]) -> List[str]:
+    """Get the artifact names a module version declares as outputs"""
+    return list((config or {}).get("outputs") or [])
+
+def declared_inputs(config: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """
+    Get the inputs a module version declares as ``{variable: reference}``, or
+    None when it declares none (and gets ``previous_results`` instead)
+    """
+    inputs = (config or {}).get("inputs")
+    if inputs is None:
+        return None
+    if isinstance(inputs, dict):
+        return dict(inputs)
+    return {name: name for name in inputs}
+
+def bind_inputs(
+    inputs: Dict[str, str],
+    producers: Dict[str, List[str]]
+) -> Dict[str, Tuple[str, str]]:
+    """
+    Resolve declared inputs to ``{variable: (module_id, artifact name)}``.
+
+    ``producers`` maps the module ids upstream of the consumer to their
+    declared outputs. Raises ValueError for inputs no ancestor declares, or
+    several do.
+    """
+    bound = {}
+    for variable, reference in inputs.items():
+        module_id, _, name = reference.rpartition(".")
+        if module_id:
+            if name not in producers.get(module_id, ()):
+                raise ValueError(f"Input {reference} isn't declared by an upstream module")
+            bound[variable] = (module_id, name)
+            continue
+        candidates = [producer for producer, outputs in producers.items() if name in outputs]
+        if not candidates:
+            raise ValueError(f"Input {name} isn't declared by an upstream module")
+        if len(candidates) > 1:
+            raise ValueError(f"Input {name} is ambiguous, use one of: " + ", ".join(
+                f"{producer}.{name}" for producer in sorted(candidates)
+            ))
+        bound[variable] = (candidates[0], name)
+    return bound
+
+class ArtifactStore:
+    """
+    Artifacts of one run, keyed by ``(module_id, name)``.
+
+    Values are kept as produced; ``share`` writes large ones to ``directory``
+    the first time another process needs them. ``close`` removes the
+    directory; mappings already handed out stay valid.
+    """
+
+    def __init__(self, run_id: str, root: Optional[str] = None, inline_max_bytes: Optional[int] = None):
+        settings = get_settings()
+        self.directory = os.path.join(root or settings.ARTIFACT_PATH, _safe_name(run_id))
+        self.inline_max_bytes = (
+            inline_max_bytes if inline_max_bytes is not None else settings.ARTIFACT_INLINE_MAX_BYTES
+        )
+        self._values: Dict[Tuple[str, str], Any] = {}
+        self._refs: Dict[Tuple[str, str], ArtifactRef] = {}
+        self._lock = threading.Lock()
+
+    def put(self, module_id: str, name: str, value: Any):
+        """Store an artifact (a value or an ``ArtifactRef`` written by a worker process)"""
+        with self._lock:
+            if isinstance(value, ArtifactRef):
+                self._refs[(module_id, name)] = value
+                self._values.pop((module_id, name), None)
+            else:
+                self._values[(module_id, name)] = value
+                self._refs.pop((module_id, name), None)
+
+    def get(self, module_id: str, name: str) -> Any:
+        """Get an artifact as a value, mapping it on first use if it was written by a worker"""
+        key = (module_id, name)
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            ref = self._refs.get(key)
+        if ref is None:
+            raise KeyError(f"Artifact {module_id}.{name} not found")
+        value = load_artifact(ref)
+        with self._lock:
+            return self._values.setdefault(key, value)
+
+    def share(self, module_id: str, name: str) -> Any:
+        """Get an artifact to send to another process: small values as is, large ones by reference"""
+        key = (module_id, name)
+        with self._lock:
+            if key in self._refs:
+                return self._refs[key]
+            if key not in self._values:
+                raise KeyError(f"Artifact {module_id}.{name} not found")
+            value = self._values[key]
+        if payload_size(value) <= self.inline_max_bytes:
+            return value
+        ref = write_artifact(self.directory, module_id, name, value)
+        with self._lock:
+            return self._refs.setdefault(key, ref)
+
+    def close(self):
+        """Remove the files of the run's artifacts"""
+        with self._lock:
+            self._values.clear()
+            self._refs.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,398 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import inspect
+import multiprocessing
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from backend.core.artifacts import declared_outputs, load_artifact, payload_size, write_artifact
+from backend.core.config import get_settings
+from backend.core.code_cache import get_code_cache
+from backend.core.environments import EnvironmentBuilder, EnvironmentPool, requirements_fingerprint
+from backend.core.limits import ResourceLimits, run_with_limits
+
+logger = logging.getLogger(__name__)
+
+# Names injected into every module namespace, never part of the module output
+RESERVED_NAMES = ('context', 'previous_results', 'cached_results', 'logger')
+
+# Shared variables are stored under this prefix so they can't clash with the
+# coordinator's own entries
+SHARED_VAR_PREFIX = "__ml_pipeline_"
+
+def run_module_code(
+    module_id: str,
+    version: str,
+    code: str,
+    context: "WorkerContext",
+    previous_results: Dict[str, Any],
+    inputs: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Execute module code in a fresh namespace, with the declared ``inputs``
+    bound as variables.
+
+    The code is compiled through the process-wide code cache, so repeated runs
+    of an unchanged module version skip parsing and compilation.
+
+    Returns a dict with the module ``output`` variables, the ``cache_data`` the
+    module asked to cache through ``cached_results``, the ``shared_vars`` it set
+    through ``context.set_var`` and an ``error`` dict (``error``/``traceback``)
+    when the code raised. Inputs the module didn't rebind aren't part of its
+    output.
+    """
+    inputs = inputs or {}
+    namespace = {
+        **inputs,
+        'context': context,
+        'previous_results': previous_results or {},
+        'cached_results': [],  # List to store variables to cache
+        'logger': logger
+    }
+
+    try:
+        exec(get_code_cache().get_or_compile(module_id, version, code), namespace)
+    except Exception as e:
+        return {
+            "output": {},
+            "cache_data": {},
+            "shared_vars": context.updated_vars,
+            "error": {
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            }
+        }
+
+    cache_data = {
+        var: namespace.get(var)
+        for var in namespace.get('cached_results') or []
+        if var in namespace
+    }
+    output = {
+        k: v for k, v in namespace.items()
+        if not k.startswith('__') and k not in RESERVED_NAMES
+        and not (k in inputs and v is inputs[k])
+    }
+    return {
+        "output": output,
+        "cache_data": cache_data,
+        "shared_vars": context.updated_vars,
+        "error": None
+    }
+
+class WorkerContext:
+    """
+    Stand-in for ModuleExecutionContext while module code runs.
+
+    Starts from a snapshot of the run's shared variables and records the ones
+    the module sets so the coordinator can merge them back (and cache them).
+    """
+    def __init__(self, canvas_id: str, run_id: str, shared_vars: Dict[str, Any]):
+        self.canvas_id = canvas_id
+        self.run_id = run_id
+        self.shared_vars = dict(shared_vars)
+        self.updated_vars: Dict[str, Any] = {}
+
+    def get_var(self, name: str, default: Any = None) -> Any:
+        """Get a shared variable"""
+        return self.shared_vars.get(f"{SHARED_VAR_PREFIX}{name}", default)
+
+    def set_var(self, name: str, value: Any):
+        """Set a shared variable"""
+        prefixed_name = f"{SHARED_VAR_PREFIX}{name}"
+        self.shared_vars[prefixed_name] = value
+        self.updated_vars[prefixed_name] = value
+
+    def get_cached_result(self, module_id: str, input_hash: str) -> Optional[Dict]:
+        """Cache lookups are done by the coordinator before the module runs"""
+        return None
+
+def _run_in_worker(
+    module_id: str,
+    version: str,
+    code: str,
+    canvas_id: str,
+    run_id: str,
+    shared_vars: Dict[str, Any],
+    previous_results: Dict[str, Any],
+    inputs: Optional[Dict[str, Any]] = None,
+    outputs: Optional[List[str]] = None,
+    artifact_dir: Optional[str] = None,
+    inline_max_bytes: int = 0,
+    limits: Optional[ResourceLimits] = None
+) -> Dict[str, Any]:
+    """
+    Entry point executed inside a pool worker process.
+
+    Inputs passed as ``ArtifactRef`` are memory-mapped. Declared ``outputs``
+    larger than ``inline_max_bytes`` are written to ``artifact_dir`` and sent
+    back as ``ArtifactRef`` under ``artifacts`` instead of being pickled. The
+    module runs under ``limits``, and what it used is returned as ``usage``.
+    """
+    outcome = run_with_limits(
+        limits or ResourceLimits(),
+        run_module_code,
+        module_id,
+        version,
+        code,
+        WorkerContext(canvas_id, run_id, shared_vars),
+        previous_results,
+        {name: load_artifact(value) for name, value in (inputs or {}).items()}
+    )
+    # Imported modules, functions and classes can't (or needn't) travel back
+    outcome["output"] = {
+        k: v for k, v in outcome["output"].items()
+        if not (inspect.ismodule(v) or inspect.isfunction(v) or inspect.isclass(v))
+    }
+    outcome["artifacts"] = {}
+    if not outcome["error"]:
+        for name in outputs or []:
+            if name in outcome["output"] and payload_size(outcome["output"][name]) > inline_max_bytes:
+                value = outcome["output"].pop(name)
+                outcome["artifacts"][name] = write_artifact(artifact_dir, module_id, name, value)
+    return outcome
+
+async def _worker_request(
+    module: Any,
+    context: Any,
+    previous_results: Dict[str, Any],
+    inputs: Optional[Dict[str, Tuple[str, str]]]
+) -> tuple:
+    """Get the ``_run_in_worker`` arguments to run a module in another process"""
+    artifacts = context.artifacts
+    shared_inputs = {}
+    for variable, key in (inputs or {}).items():
+        # Writing a large artifact out the first time blocks
+        shared_inputs[variable] = await asyncio.to_thread(artifacts.share, *key)
+    return (
+        module.module_id,
+        module.version,
+        module.code,
+        context.canvas_id,
+        context.run_id,
+        context.shared_vars,
+        previous_results or {},
+        shared_inputs,
+        declared_outputs(module.config),
+        artifacts.directory,
+        artifacts.inline_max_bytes,
+        ResourceLimits.from_config(module.config)
+    )
+
+class ExecutionBackend:
+    """Base class for the strategies used to run module code"""
+
+    async def run(
+        self,
+        module: Any,
+        context: Any,
+        previous_results: Dict[str, Any],
+        inputs: Optional[Dict[str, Tuple[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run a ModuleVersion's code and return the outcome of ``run_module_code``.
+
+        ``inputs`` binds variables to artifacts in ``context.artifacts``, as
+        ``{variable: (module_id, name)}``. Declared outputs may also be returned
+        under ``artifacts``, by reference, and the resources the module used
+        under ``usage``.
+        """
+        raise NotImplementedError
+
+    def shutdown(self):
+        """Release any resources held by the backend"""
+        pass
+
+class ThreadBackend(ExecutionBackend):
+    """
+    Runs module code in the default thread pool of the event loop.
+
+    CPU, memory and thread limits can't be enforced on a thread, so modules
+    that set them fail without running; use the process backend for those.
+    The timeout only gives up on the module: its thread can't be stopped and
+    keeps running, which the module's error records as ``"enforced": False``.
+    """
+
+    UNENFORCEABLE_LIMITS = ("cpu_seconds", "max_rss_mb", "max_threads")
+
+    async def run(
+        self,
+        module: Any,
+        context: Any,
+        previous_results: Dict[str, Any],
+        inputs: Optional[Dict[str, Tuple[str, str]]] = None
+    ) -> Dict[str, Any]:
+        limits = ResourceLimits.from_config(module.config)
+        refused = [name for name in self.UNENFORCEABLE_LIMITS if getattr(limits, name)]
+        if refused:
+            return {
+                "output": {},
+                "cache_data": {},
+                "shared_vars": {},
+                "error": {
+                    "error": f"Module limits {', '.join(refused)} are only enforced with EXECUTOR_BACKEND=process",
+                    "limit": refused[0],
+                    "enforced": False
+                },
+                "usage": {}
+            }
+
+        # Same process: artifacts are handed over as the objects themselves
+        execution = asyncio.to_thread(
+            run_with_limits,
+            limits,
+            run_module_code,
+            module.module_id,
+            module.version,
+            module.code,
+            WorkerContext(context.canvas_id, context.run_id, context.shared_vars),
+            previous_results,
+            {variable: context.artifacts.get(*key) for variable, key in (inputs or {}).items()}
+        )
+        try:
+            return await asyncio.wait_for(execution, timeout=limits.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning(f"Module {module.module_id} timed out, its thread is left to finish in the background")
+            return {
+                "output": {},
+                "cache_data": {},
+                "shared_vars": {},
+                "error": {
+                    "error": f"Module exceeded its {limits.timeout_seconds}s timeout, its thread keeps running",
+                    "limit": "timeout_seconds",
+                    "enforced": False
+                },
+                "usage": {"wall_seconds": limits.timeout_seconds}
+            }
+
+class ProcessPoolBackend(ExecutionBackend):
+    """
+    Runs module code in a pool of worker processes.
+
+    Arguments and results are pickled by the pool, so DataFrames and fitted
+    models come back to the coordinator as Python objects; large declared
+    artifacts are memory-mapped instead (see ``backend.core.artifacts``).
+
+    With the ``forkserver`` start method workers are forked from a template
+    process that imported ``preload`` (the scientific stack) once, so they
+    start in milliseconds and share those pages copy-on-write. Workers are
+    replaced after ``max_tasks_per_worker`` executions (0 = never; needs
+    Python 3.11); with 1 every module runs in a fresh fork of the template,
+    whose code cache starts out empty (see EXECUTOR_MAX_TASKS_PER_WORKER).
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        start_method: str = "spawn",
+        preload: Optional[List[str]] = None,
+        max_tasks_per_worker: int = 0
+    ):
+        self.max_workers = max_workers or None
+        self.start_method = start_method
+        self.preload = preload or []
+        self.max_tasks_per_worker = max_tasks_per_worker or None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            mp_context = multiprocessing.get_context(self.start_method)
+            if self.start_method == "forkserver":
+                # Takes effect when the fork server starts, with the first pool
+                mp_context.set_forkserver_preload([__name__, *self.preload])
+            options = {}
+            if self.max_tasks_per_worker:
+                if sys.version_info >= (3, 11):
+                    options["max_tasks_per_child"] = self.max_tasks_per_worker
+                else:
+                    logger.warning("Module workers are only replaced on Python 3.11+, reusing them")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=mp_context,
+                **options
+            )
+        return self._pool
+
+    async def run(
+        self,
+        module: Any,
+        context: Any,
+        previous_results: Dict[str, Any],
+        inputs: Optional[Dict[str, Tuple[str, str]]] = None
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        request = await _worker_request(module, context, previous_results, inputs)
+        try:
+            outcome = await loop.run_in_executor(self._get_pool(), _run_in_worker, *request)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); start a fresh pool
+            logger.error("Module worker pool is broken, restarting it")
+            self.shutdown()
+            raise
+        return outcome
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+class EnvironmentBackend(ExecutionBackend):
+    """
+    Runs modules whose version lists ``requirements`` in warm workers of an
+    environment built for them (see ``backend.core.environments``), and the
+    others with ``fallback``.
+    """
+
+    def __init__(self, fallback: ExecutionBackend, pool: EnvironmentPool):
+        self.fallback = fallback
+        self.pool = pool
+
+    async def run(
+        self,
+        module: Any,
+        context: Any,
+        previous_results: Dict[str, Any],
+        inputs: Optional[Dict[str, Tuple[str, str]]] = None
+    ) -> Dict[str, Any]:
+        requirements = getattr(module, "requirements", None)
+        if requirements_fingerprint(requirements) is None:
+            return await self.fallback.run(module, context, previous_results, inputs)
+        request = await _worker_request(module, context, previous_results, inputs)
+        # Blocks while the environment is built or all its workers are busy
+        return await asyncio.to_thread(self.pool.execute, requirements, request)
+
+    def shutdown(self):
+        self.pool.close()
+        self.fallback.shutdown()
+
+@lru_cache()
+def get_execution_backend() -> ExecutionBackend:
+    """
+    Get the process-wide execution backend selected by EXECUTOR_BACKEND, with
+    per-requirements environments when MODULE_ENV_WHEEL_DIR is set
+    """
+    settings = get_settings()
+    if settings.EXECUTOR_BACKEND == "process":
+        backend = ProcessPoolBackend(
+            max_workers=settings.EXECUTOR_WORKERS,
+            start_method=settings.EXECUTOR_START_METHOD,
+            preload=[name.strip() for name in settings.EXECUTOR_PRELOAD.split(",") if name.strip()],
+            max_tasks_per_worker=settings.EXECUTOR_MAX_TASKS_PER_WORKER
+        )
+    elif settings.EXECUTOR_BACKEND == "thread":
+        backend = ThreadBackend()
+    else:
+        raise ValueError(f"Unknown executor backend: {settings.EXECUTOR_BACKEND}")
+
+    if settings.MODULE_ENV_WHEEL_DIR:
+        backend = EnvironmentBackend(backend, EnvironmentPool(
+            EnvironmentBuilder(settings.MODULE_ENV_ROOT, settings.MODULE_ENV_WHEEL_DIR),
+            workers_per_environment=settings.MODULE_ENV_WORKERS,
+            max_environments=settings.MODULE_ENV_MAX_ACTIVE,
+            preload=[name.strip() for name in settings.MODULE_ENV_PRELOAD.split(",") if name.strip()]
+        ))
+    return backend
@@ -1,30 +0,0 @@
-from typing import Dict, Any, Optional
-
-class CacheManager:
-    """
-    Placeholder for cache management.
-    This will be implemented later with proper storage backend and cache invalidation.
-    """
-    
-    def __init__(self):
-        # Temporary in-memory cache for development
-        self._cache: Dict[str, Dict[str, Any]] = {}
-    
-    def get(self, module_id: str, input_hash: str) -> Optional[Dict]:
-        """Get cached result for a module"""
-        module_cache = self._cache.get(module_id, {})
-        return module_cache.get(input_hash)
-    
-    def set(self, module_id: str, input_hash: str, data: Dict):
-        """Set cached result for a module"""
-        if module_id not in self._cache:
-            self._cache[module_id] = {}
-        self._cache[module_id][input_hash] = data
-    
-    def invalidate(self, module_id: str):
-        """Invalidate cache for a module"""
-        self._cache.pop(module_id, None)
-    
-    def clear(self):
-        """Clear all cache"""
-        self._cache.clear() 
\ No newline at end of file
@@ -0,0 +1,160 @@
+from typing import Dict, Any, Optional
+from functools import lru_cache
+
+from backend.core.config import get_settings
+from backend.core.cache.memory import MemoryCacheTier
+from backend.core.cache.disk import DiskCacheTier
+from backend.core.cache.object_store import (
+    ObjectStoreCacheTier,
+    S3ObjectStoreClient,
+    FilesystemObjectStoreClient
+)
+
+class CacheManager:
+    """
+    Module result cache shared by every run in the process.
+
+    Entries are keyed on ``(module_id, input_hash)``. Lookups go through a
+    bounded memory tier (see ``MemoryCacheTier``), then, with
+    ``CACHE_BACKEND=local`` or ``s3``, a disk tier under ``CACHE_LOCAL_PATH``
+    shared by the worker processes on the host and, with ``s3``, an object
+    store shared by every host. Hits in a lower tier are promoted to the tiers
+    above it and writes go through to every tier.
+    """
+
+    def __init__(
+        self,
+        memory_tier: Optional[MemoryCacheTier] = None,
+        disk_tier: Optional[DiskCacheTier] = None,
+        object_store_tier: Optional[ObjectStoreCacheTier] = None
+    ):
+        if object_store_tier is not None and disk_tier is None:
+            raise ValueError("The object store cache tier needs a disk tier in front of it")
+        settings = get_settings()
+        self.memory = memory_tier or MemoryCacheTier(
+            max_bytes=settings.CACHE_MEMORY_MAX_BYTES,
+            policy=settings.CACHE_EVICTION_POLICY,
+            module_quota_bytes=settings.CACHE_MODULE_QUOTA_BYTES
+        )
+        self.disk = disk_tier
+        self.object_store = object_store_tier
+
+    def get(self, module_id: str, input_hash: str) -> Optional[Dict]:
+        """
+        Get cached result for a module. Every hit is a copy of its own
+        (unpickled by the memory tier, mapped copy-on-write by the disk tier),
+        so modules may change what they get in place.
+        """
+        data = self.memory.get(module_id, input_hash)
+        if data is None and self.disk is not None:
+            data = self.disk.get(module_id, input_hash)
+            if data is None and self.object_store is not None:
+                relative_path = self.disk.relative_path(module_id, input_hash)
+                data = self.disk.adopt(
+                    module_id,
+                    input_hash,
+                    lambda tmp_path: self.object_store.download(relative_path, tmp_path)
+                )
+            if data is not None:
+                self.memory.set(module_id, input_hash, data)
+        return data
+
+    def set(self, module_id: str, input_hash: str, data: Dict):
+        """Set cached result for a module"""
+        self.memory.set(module_id, input_hash, data)
+        if self.disk is not None:
+            path = self.disk.set(module_id, input_hash, data)
+            if path is not None and self.object_store is not None:
+                self.object_store.upload_in_background(
+                    module_id,
+                    input_hash,
+                    self.disk.relative_path(module_id, input_hash),
+                    path
+                )
+
+    def contains(self, module_id: str, input_hash: str) -> bool:
+        """Whether the memory or disk tier holds an entry (the object store isn't asked)"""
+        return self.memory.contains(module_id, input_hash) or (
+            self.disk is not None and self.disk.contains(module_id, input_hash)
+        )
+
+    def invalidate(self, module_id: str):
+        """Invalidate cache for a module"""
+        self.memory.invalidate(module_id)
+        if self.disk is not None:
+            self.disk.invalidate(module_id)
+        if self.object_store is not None:
+            self.object_store.invalidate(self.disk.module_dir_name(module_id))
+
+    def clear(self):
+        """Clear all cache"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters per tier"""
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        if self.object_store is not None:
+            stats["object_store"] = self.object_store.stats()
+        return stats
+
+    def shutdown(self):
+        """Record pending last uses and wait for pending uploads to the object store"""
+        if self.disk is not None:
+            self.disk.flush_touches()
+        if self.object_store is not None:
+            self.object_store.shutdown()
+
+@lru_cache()
+def get_cache_manager() -> CacheManager:
+    """Get the process-wide cache manager configured by CACHE_BACKEND"""
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "memory":
+        return CacheManager()
+    if settings.CACHE_BACKEND not in ("local", "s3"):
+        raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+    session_factory = None
+    if settings.CACHE_TRACK_IN_DB:
+        from backend.models.database import SessionLocal
+        session_factory = SessionLocal
+
+    disk_tier = DiskCacheTier(
+        root=settings.CACHE_LOCAL_PATH,
+        max_bytes=settings.CACHE_DISK_MAX_BYTES,
+        session_factory=session_factory,
+        compression=settings.CACHE_COMPRESSION,
+        touch_interval=settings.CACHE_TOUCH_INTERVAL_SECONDS
+    )
+    if settings.CACHE_BACKEND == "local":
+        return CacheManager(disk_tier=disk_tier)
+
+    if settings.CACHE_OBJECT_STORE_CLIENT == "filesystem":
+        client = FilesystemObjectStoreClient(settings.CACHE_OBJECT_STORE_PATH)
+    elif settings.CACHE_OBJECT_STORE_CLIENT == "s3":
+        bucket = settings.CACHE_S3_BUCKET or settings.AWS_S3_BUCKET
+        if not bucket:
+            raise ValueError("CACHE_BACKEND=s3 requires CACHE_S3_BUCKET or AWS_S3_BUCKET")
+        client = S3ObjectStoreClient(
+            bucket=bucket,
+            region=settings.AWS_REGION,
+            endpoint_url=settings.CACHE_S3_ENDPOINT_URL,
+            access_key_id=settings.AWS_ACCESS_KEY_ID,
+            secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+        )
+    else:
+        raise ValueError(f"Unknown object store client: {settings.CACHE_OBJECT_STORE_CLIENT}")
+
+    return CacheManager(
+        disk_tier=disk_tier,
+        object_store_tier=ObjectStoreCacheTier(
+            client=client,
+            prefix=settings.CACHE_S3_PREFIX,
+            chunk_bytes=settings.CACHE_TRANSFER_CHUNK_BYTES,
+            concurrency=settings.CACHE_TRANSFER_CONCURRENCY,
+            session_factory=session_factory
+        )
+    )
@@ -0,0 +1,304 @@
+import logging
+from typing import Dict, Any, Callable, List, Optional, Set, Tuple
+from datetime import datetime
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from sqlalchemy.orm import Session
+
+from backend.core.cache import serialization
+from backend.crud.cache import CacheCRUD
+
+logger = logging.getLogger(__name__)
+
+# Garbage collection frees space down to this fraction of the budget
+GC_LOW_WATERMARK = 0.9
+
+# Temporary files older than this are leftovers of crashed writers
+STALE_TMP_SECONDS = 3600
+
+class DiskCacheTier:
+    """
+    Cache tier persisted as files under a local directory.
+
+    Entries live at ``<root>/objects/<module_id>/<ab>/<cd>/<digest>`` where the
+    digest addresses ``(module_id, input_hash)``. Files are written to
+    ``<root>/tmp`` and renamed into place, so concurrent readers in other
+    processes only ever see complete entries. Once the directory grows past
+    ``max_bytes`` the least recently used files are removed.
+
+    Entries are stored in the columnar format of ``serialization`` (optionally
+    lz4 compressed) and memory-mapped on read. When a ``session_factory`` is
+    given every entry is also tracked in the ``module_cache`` table (location,
+    size and last use). Hits don't touch the database: their last use is
+    recorded in the background, for every entry hit in the meantime, at most
+    every ``touch_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int,
+        session_factory: Optional[Callable[[], Session]] = None,
+        compression: Optional[str] = None,
+        touch_interval: float = 30
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.session_factory = session_factory
+        self._objects_dir = os.path.join(root, "objects")
+        self._tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._size_bytes: Optional[int] = None  # Lazily measured
+
+        self.touch_interval = touch_interval
+        self._touched: Set[Tuple[str, str]] = set()
+        self._touch_due = time.monotonic() + touch_interval
+        self._touch_flushing = False
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _safe_name(value: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+
+    def module_dir_name(self, module_id: str) -> str:
+        """Get the directory holding a module's entries, relative to the objects root"""
+        return self._safe_name(module_id)
+
+    def relative_path(self, module_id: str, input_hash: str) -> str:
+        """Get the content-addressed location of an entry, relative to the objects root"""
+        digest = hashlib.blake2b(f"{module_id}:{input_hash}".encode(), digest_size=32).hexdigest()
+        return "/".join((self.module_dir_name(module_id), digest[:2], digest[2:4], digest))
+
+    def path_for(self, module_id: str, input_hash: str) -> str:
+        """Get the content-addressed location of an entry"""
+        return os.path.join(self._objects_dir, *self.relative_path(module_id, input_hash).split("/"))
+
+    def get(self, module_id: str, input_hash: str) -> Optional[Dict]:
+        """Read an entry, refreshing its last-used time"""
+        path = self.path_for(module_id, input_hash)
+        try:
+            data = self._read(path)
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._discard(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        if self.session_factory is not None:
+            self._touch(module_id, input_hash)
+        return data
+
+    def _touch(self, module_id: str, input_hash: str):
+        """Remember a hit, starting a background flush when one is due"""
+        with self._lock:
+            self._touched.add((module_id, input_hash))
+            due = not self._touch_flushing and time.monotonic() >= self._touch_due
+            if due:
+                self._touch_flushing = True
+        if due:
+            threading.Thread(target=self.flush_touches, name="cache-touches", daemon=True).start()
+
+    def flush_touches(self):
+        """Record the last use of the entries hit since the previous flush"""
+        with self._lock:
+            touched, self._touched = self._touched, set()
+        try:
+            if touched:
+                now = datetime.utcnow()
+                self._track(lambda db: CacheCRUD.touch_many(db, keys=touched, last_used=now))
+        finally:
+            with self._lock:
+                self._touch_flushing = False
+                self._touch_due = time.monotonic() + self.touch_interval
+
+    def set(self, module_id: str, input_hash: str, data: Dict) -> Optional[str]:
+        """Write an entry atomically and return its location"""
+        path = self._install(module_id, input_hash, lambda tmp_path: self._write(data, tmp_path))
+        if path is not None:
+            self._record(module_id, input_hash, data, path)
+        return path
+
+    def adopt(self, module_id: str, input_hash: str, fill: Callable[[str], bool]) -> Optional[Dict]:
+        """
+        Install an entry produced by ``fill(tmp_path)``, e.g. a download from a
+        remote tier, and return its data. ``fill`` returns False if it has no
+        entry to provide.
+        """
+        path = self._install(module_id, input_hash, fill)
+        if path is None:
+            return None
+        try:
+            data = self._read(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._discard(path)
+            return None
+        self._record(module_id, input_hash, data, path)
+        return data
+
+    def _install(self, module_id: str, input_hash: str, fill: Callable[[str], Any]) -> Optional[str]:
+        """Fill a temporary file and rename it into the entry location"""
+        path = self.path_for(module_id, input_hash)
+        tmp_path = os.path.join(self._tmp_dir, f"{uuid.uuid4().hex}.tmp")
+        try:
+            if fill(tmp_path) is False:
+                self._discard(tmp_path)
+                return None
+            size = os.path.getsize(tmp_path)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry for module {module_id}: {str(e)}")
+            self._discard(tmp_path)
+            return None
+
+        with self._lock:
+            self.writes += 1
+            if self._size_bytes is not None:
+                self._size_bytes += size - previous_size
+            over_budget = self._size_bytes is None or self._size_bytes > self.max_bytes
+        if over_budget:
+            self.collect_garbage()
+        return path
+
+    def _record(self, module_id: str, input_hash: str, data: Dict, path: str):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        self._track(lambda db: CacheCRUD.upsert_entry(
+            db,
+            module_id=module_id,
+            input_hash=input_hash,
+            output_hash=data.get("output_hash") or input_hash,
+            location=path,
+            size_bytes=size,
+            meta_info={"backend": "local"}
+        ))
+
+    def contains(self, module_id: str, input_hash: str) -> bool:
+        """Whether an entry is cached, without counting a hit or miss"""
+        return os.path.exists(self.path_for(module_id, input_hash))
+
+    def invalidate(self, module_id: str):
+        """Remove every entry of a module"""
+        module_dir = os.path.join(self._objects_dir, self.module_dir_name(module_id))
+        shutil.rmtree(module_dir, ignore_errors=True)
+        with self._lock:
+            self._size_bytes = None
+        self._track(lambda db: CacheCRUD.invalidate_module(db, module_id=module_id))
+
+    def clear(self):
+        """Remove every entry"""
+        shutil.rmtree(self._objects_dir, ignore_errors=True)
+        os.makedirs(self._objects_dir, exist_ok=True)
+        with self._lock:
+            self._size_bytes = 0
+
+    def collect_garbage(self) -> int:
+        """Remove least recently used entries until the cache fits its budget"""
+        self._remove_stale_tmp_files()
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        removed: List[str] = []
+
+        if total > self.max_bytes:
+            target = self.max_bytes * GC_LOW_WATERMARK
+            for path, _, size in sorted(entries, key=lambda e: e[1]):
+                if total <= target:
+                    break
+                if self._discard(path):
+                    total -= size
+                    removed.append(path)
+
+        with self._lock:
+            self._size_bytes = total
+            self.evictions += len(removed)
+        if removed:
+            logger.info(f"Removed {len(removed)} cache entries from {self.root}")
+            self._track(lambda db: CacheCRUD.invalidate_locations(db, locations=removed))
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the tier counters"""
+        with self._lock:
+            return {
+                "root": self.root,
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions
+            }
+
+    def _scan(self) -> List[Tuple[str, float, int]]:
+        """List (path, last used, size) of every entry"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self._objects_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _remove_stale_tmp_files(self):
+        cutoff = time.time() - STALE_TMP_SECONDS
+        for entry in os.scandir(self._tmp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _discard(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _write(self, data: Dict, path: str):
+        serialization.dump(data, path, compression=self.compression)
+
+    def _read(self, path: str) -> Dict:
+        return serialization.load(path)
+
+    def _track(self, operation: Callable[[Session], Any]):
+        """Run a ModuleCache bookkeeping operation; failures never fail the cache"""
+        if self.session_factory is None:
+            return
+        db = self.session_factory()
+        try:
+            operation(db)
+        except Exception as e:
+            logger.warning(f"Could not update module_cache tracking: {str(e)}")
+        finally:
+            db.close()
@@ -0,0 +1,161 @@
+import logging
+from typing import Dict, Any, Optional, Tuple
+import pickle
+import threading
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+class _Entry:
+    __slots__ = ("payload", "size", "hits")
+
+    def __init__(self, payload: bytes, size: int):
+        self.payload = payload
+        self.size = size
+        self.hits = 0
+
+class MemoryCacheTier:
+    """
+    In-process cache tier bounded by a byte budget.
+
+    Entries are kept pickled and unpickled on every hit, so each caller gets
+    objects of its own: a module changing its inputs in place can't alter the
+    cached entry (whose output hash describes the original data). Entries
+    that can't be pickled are not cached.
+
+    Entries are evicted least-recently-used (``lru``) or least-frequently-used
+    (``lfu``, ties broken by recency) once ``max_bytes`` is exceeded. With
+    ``module_quota_bytes`` set, a single module can't hold more than its quota
+    and evicts its own entries first.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        policy: str = "lru",
+        module_quota_bytes: Optional[int] = None
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.module_quota_bytes = module_quota_bytes or None
+
+        # Ordered from least to most recently used
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._module_bytes: Dict[str, int] = defaultdict(int)
+        self._size_bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def get(self, module_id: str, input_hash: str) -> Optional[Dict]:
+        """Get a copy of a cached entry, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get((module_id, input_hash))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.hits += 1
+            self._entries.move_to_end((module_id, input_hash))
+            payload = entry.payload
+        return pickle.loads(payload)
+
+    def set(self, module_id: str, input_hash: str, data: Dict, size: Optional[int] = None) -> bool:
+        """
+        Store a snapshot of an entry, evicting others to make room; False if it
+        can't be pickled or can't fit at all. ``size`` overrides the size of
+        the pickled entry in the accounting.
+        """
+        try:
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            with self._lock:
+                self.rejections += 1
+            logger.debug(f"Not caching the result of module {module_id}: {str(e)}")
+            return False
+        size = len(payload) if size is None else size
+        limit = min(self.max_bytes, self.module_quota_bytes or self.max_bytes)
+        if size > limit:
+            with self._lock:
+                self.rejections += 1
+            logger.debug(f"Not caching {size} bytes for module {module_id}: over the memory limit")
+            return False
+
+        key = (module_id, input_hash)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            if self.module_quota_bytes:
+                while self._module_bytes[module_id] + size > self.module_quota_bytes:
+                    self._evict(module_id)
+            while self._size_bytes + size > self.max_bytes:
+                self._evict()
+
+            self._entries[key] = _Entry(payload, size)
+            self._module_bytes[module_id] += size
+            self._size_bytes += size
+        return True
+
+    def contains(self, module_id: str, input_hash: str) -> bool:
+        """Whether an entry is cached, without counting a hit or miss"""
+        with self._lock:
+            return (module_id, input_hash) in self._entries
+
+    def invalidate(self, module_id: str):
+        """Drop every entry of a module"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == module_id]:
+                self._remove(key)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._module_bytes.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the tier counters"""
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejections": self.rejections
+            }
+
+    def _remove(self, key: CacheKey) -> _Entry:
+        entry = self._entries.pop(key)
+        self._module_bytes[key[0]] -= entry.size
+        if not self._module_bytes[key[0]]:
+            del self._module_bytes[key[0]]
+        self._size_bytes -= entry.size
+        return entry
+
+    def _evict(self, module_id: Optional[str] = None):
+        """Evict one entry, optionally only among a module's entries"""
+        candidates = (
+            key for key in self._entries
+            if module_id is None or key[0] == module_id
+        )
+        if self.policy == "lru":
+            victim = next(candidates)
+        else:
+            # min() keeps the first (least recently used) key among equal counts
+            victim = min(candidates, key=lambda k: self._entries[k].hits)
+        self._remove(victim)
+        self.evictions += 1
@@ -0,0 +1,335 @@
+import logging
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import threading
+import uuid
+
+from sqlalchemy.orm import Session
+
+from backend.crud.cache import CacheCRUD
+
+logger = logging.getLogger(__name__)
+
+class ObjectStoreClient:
+    """
+    Minimal object store API used by the cache, modelled on S3.
+
+    ``get_range`` takes an inclusive byte range like an HTTP Range header.
+    """
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def head_object(self, key: str) -> Optional[int]:
+        """Get the size of an object, or None if it doesn't exist"""
+        raise NotImplementedError
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        raise NotImplementedError
+
+    def put_object(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def create_multipart_upload(self, key: str) -> str:
+        raise NotImplementedError
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """Upload one part and return its ETag"""
+        raise NotImplementedError
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Tuple[int, str]]):
+        raise NotImplementedError
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        raise NotImplementedError
+
+class S3ObjectStoreClient(ObjectStoreClient):
+    """ObjectStoreClient backed by boto3 (S3 or any S3-compatible endpoint)"""
+
+    def __init__(self, bucket: str, region: Optional[str] = None, endpoint_url: Optional[str] = None,
+                 access_key_id: Optional[str] = None, secret_access_key: Optional[str] = None):
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key
+        )
+
+    def url(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def head_object(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+        return response["Body"].read()
+
+    def put_object(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+    def create_multipart_upload(self, key: str) -> str:
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=data
+        )
+        return response["ETag"]
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Tuple[int, str]]):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in parts]}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def delete_prefix(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            objects = [{"Key": item["Key"]} for item in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects})
+
+class FilesystemObjectStoreClient(ObjectStoreClient):
+    """
+    ObjectStoreClient over a local directory.
+
+    Stands in for S3 in development and tests, including multipart uploads
+    and ranged reads.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._uploads_dir = os.path.join(root, ".uploads")
+        os.makedirs(self._uploads_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def url(self, key: str) -> str:
+        return f"file://{self._path(key)}"
+
+    def head_object(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def put_object(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(self._uploads_dir, f"{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def create_multipart_upload(self, key: str) -> str:
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self._uploads_dir, upload_id))
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> str:
+        with open(os.path.join(self._uploads_dir, upload_id, str(part_number)), "wb") as f:
+            f.write(data)
+        return str(part_number)
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Tuple[int, str]]):
+        upload_dir = os.path.join(self._uploads_dir, upload_id)
+        tmp_path = os.path.join(self._uploads_dir, f"{upload_id}.tmp")
+        with open(tmp_path, "wb") as out:
+            for part_number, _ in sorted(parts):
+                with open(os.path.join(upload_dir, str(part_number)), "rb") as part:
+                    shutil.copyfileobj(part, out)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        shutil.rmtree(os.path.join(self._uploads_dir, upload_id), ignore_errors=True)
+
+    def delete_prefix(self, prefix: str):
+        shutil.rmtree(self._path(prefix), ignore_errors=True)
+
+class ObjectStoreCacheTier:
+    """
+    Remote cache tier shared by workers on different hosts.
+
+    Sits behind the disk tier and moves whole entry files: uploads are split
+    into parts sent in parallel (a single PUT for small files) and downloads
+    fetch byte ranges in parallel straight into the destination file.
+    """
+
+    def __init__(
+        self,
+        client: ObjectStoreClient,
+        prefix: str = "module-cache",
+        chunk_bytes: int = 8 * 1024 * 1024,
+        concurrency: int = 8,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.client = client
+        self.prefix = prefix.strip("/")
+        self.chunk_bytes = chunk_bytes
+        self.session_factory = session_factory
+        self._transfers = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cache-transfer")
+        self._uploads = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-upload")
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.uploads = 0
+        self.upload_errors = 0
+
+    def key_for(self, relative_path: str) -> str:
+        return f"{self.prefix}/{relative_path}"
+
+    def download(self, relative_path: str, dest_path: str) -> bool:
+        """Fetch an entry into ``dest_path`` with parallel ranged reads"""
+        key = self.key_for(relative_path)
+        size = self.client.head_object(key)
+        if size is None:
+            with self._lock:
+                self.misses += 1
+            return False
+
+        ranges = [
+            (start, min(start + self.chunk_bytes, size) - 1)
+            for start in range(0, size, self.chunk_bytes)
+        ]
+        fd = os.open(dest_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+
+            def fetch(byte_range: Tuple[int, int]):
+                data = self.client.get_range(key, *byte_range)
+                os.pwrite(fd, data, byte_range[0])
+
+            list(self._transfers.map(fetch, ranges))
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def upload(self, module_id: str, input_hash: str, relative_path: str, path: str):
+        """Upload an entry file, in parts when it is larger than one chunk"""
+        with open(path, "rb") as f:
+            self._upload_file(module_id, input_hash, relative_path, f)
+
+    def upload_in_background(self, module_id: str, input_hash: str, relative_path: str, path: str):
+        """
+        Queue an upload without blocking the caller.
+
+        The file is opened right away: disk garbage collection may unlink it
+        before the upload runs, but the open file keeps its data until then.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError as e:
+            logger.warning(f"Could not upload cache entry for module {module_id}: {str(e)}")
+            return
+
+        def run():
+            try:
+                self._upload_file(module_id, input_hash, relative_path, f)
+            except Exception as e:
+                with self._lock:
+                    self.upload_errors += 1
+                logger.warning(f"Could not upload cache entry for module {module_id}: {str(e)}")
+            finally:
+                f.close()
+
+        try:
+            self._uploads.submit(run)
+        except RuntimeError:
+            # Shut down
+            f.close()
+            raise
+
+    def _upload_file(self, module_id: str, input_hash: str, relative_path: str, f):
+        key = self.key_for(relative_path)
+        size = os.fstat(f.fileno()).st_size
+        if size <= self.chunk_bytes:
+            self.client.put_object(key, f.read())
+        else:
+            self._upload_multipart(key, f.fileno(), size)
+
+        with self._lock:
+            self.uploads += 1
+        self._track(lambda db: CacheCRUD.record_remote_location(
+            db, module_id=module_id, input_hash=input_hash, remote_location=self.client.url(key)
+        ))
+
+    def invalidate(self, module_id_path: str):
+        """Remove every remote entry under a module directory"""
+        self.client.delete_prefix(self.key_for(module_id_path))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the tier counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "uploads": self.uploads,
+                "upload_errors": self.upload_errors
+            }
+
+    def shutdown(self):
+        self._uploads.shutdown(wait=True)
+        self._transfers.shutdown(wait=True)
+
+    def _upload_multipart(self, key: str, fd: int, size: int):
+        upload_id = self.client.create_multipart_upload(key)
+
+        def send(part: Tuple[int, int]) -> Tuple[int, str]:
+            part_number, start = part
+            data = os.pread(fd, min(self.chunk_bytes, size - start), start)
+            return part_number, self.client.upload_part(key, upload_id, part_number, data)
+
+        parts = list(enumerate(range(0, size, self.chunk_bytes), start=1))
+        try:
+            etags = list(self._transfers.map(send, parts))
+            self.client.complete_multipart_upload(key, upload_id, etags)
+        except Exception:
+            self.client.abort_multipart_upload(key, upload_id)
+            raise
+
+    def _track(self, operation: Callable[[Session], Any]):
+        """Run a ModuleCache bookkeeping operation; failures never fail the cache"""
+        if self.session_factory is None:
+            return
+        db = self.session_factory()
+        try:
+            operation(db)
+        except Exception as e:
+            logger.warning(f"Could not update module_cache tracking: {str(e)}")
+        finally:
+            db.close()
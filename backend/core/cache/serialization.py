@@ -0,0 +1,246 @@
+"""
+Cache entry serialization.
+
+Entries are written as a small JSON header followed by 64-byte aligned raw
+buffers. numpy arrays and the numeric columns of pandas objects are stored as
+plain uncompressed buffers (or lz4 frames) and are memory-mapped straight back
+on load, so reading a multi-GB frame costs page faults rather than a copy.
+Everything else is pickled with protocol 5, its out-of-band buffers stored the
+same way.
+"""
+from typing import Any, Dict, List, Optional
+import json
+import mmap
+import pickle
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an install requirement
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is an install requirement
+    pd = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+MAGIC = b"MLPCACHE"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Buffers smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 64 * 1024
+
+class SerializationError(ValueError):
+    """Raised for files that aren't valid cache entries"""
+    pass
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+class _Writer:
+    """Turns a value into a JSON-able node tree plus a list of buffers"""
+
+    def __init__(self, compression: Optional[str]):
+        if compression not in (None, "none", "lz4"):
+            raise ValueError(f"Unknown cache compression: {compression}")
+        if compression == "lz4" and lz4_frame is None:
+            raise ValueError("lz4 compression requires the lz4 package")
+        self.compression = compression if compression != "none" else None
+        self.buffers: List[memoryview] = []
+        self.buffer_meta: List[Dict[str, Any]] = []
+
+    def add_buffer(self, data) -> int:
+        view = memoryview(data).cast("B")
+        meta = {"codec": "raw", "nbytes": view.nbytes}
+        if self.compression == "lz4" and view.nbytes >= MIN_COMPRESS_BYTES:
+            view = memoryview(lz4_frame.compress(view))
+            meta = {"codec": "lz4", "nbytes": view.nbytes, "raw_nbytes": meta["nbytes"]}
+        self.buffers.append(view)
+        self.buffer_meta.append(meta)
+        return len(self.buffers) - 1
+
+    def node(self, value: Any) -> Dict[str, Any]:
+        if value is None or isinstance(value, (str, bool, int, float)):
+            if not isinstance(value, float) or value == value:  # NaN isn't valid JSON
+                return {"t": "json", "v": value}
+        if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+            return {
+                "t": "dict",
+                "keys": list(value),
+                "values": [self.node(v) for v in value.values()]
+            }
+        if np is not None and isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            # Structured dtypes don't survive dtype.str; they are pickled
+            if value.dtype.fields is None:
+                return self.array_node(value)
+        if pd is not None and isinstance(value, pd.DataFrame):
+            return self.frame_node(value)
+        if pd is not None and isinstance(value, pd.Series):
+            return {
+                "t": "series",
+                "name": self.pickle_node(value.name),
+                "index": self.index_node(value.index),
+                "values": self.column_node(value)
+            }
+        return self.pickle_node(value)
+
+    def array_node(self, arr) -> Dict[str, Any]:
+        # Not np.ascontiguousarray, which turns 0-d arrays into 1-d ones
+        if not arr.flags.c_contiguous:
+            arr = arr.copy(order="C")
+        return {
+            "t": "ndarray",
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+            "buffer": self.add_buffer(arr.reshape(-1).view(np.uint8))
+        }
+
+    def column_node(self, column) -> Dict[str, Any]:
+        if isinstance(column.dtype, np.dtype) and not column.dtype.hasobject:
+            return self.array_node(column.to_numpy(copy=False))
+        # Extension, string and object columns
+        return self.pickle_node(column.array)
+
+    def index_node(self, index) -> Dict[str, Any]:
+        if isinstance(index, pd.RangeIndex):
+            return {
+                "t": "range",
+                "start": int(index.start),
+                "stop": int(index.stop),
+                "step": int(index.step),
+                "name": self.pickle_node(index.name)
+            }
+        return self.pickle_node(index)
+
+    def frame_node(self, frame) -> Dict[str, Any]:
+        return {
+            "t": "dataframe",
+            "columns": self.pickle_node(frame.columns),
+            "index": self.index_node(frame.index),
+            "values": [self.column_node(frame.iloc[:, i]) for i in range(frame.shape[1])]
+        }
+
+    def pickle_node(self, value: Any) -> Dict[str, Any]:
+        out_of_band: List[int] = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer):
+            try:
+                out_of_band.append(self.add_buffer(buffer.raw()))
+            except BufferError:
+                # Non-contiguous buffers are serialized in-band
+                return True
+            return False
+
+        payload = pickle.dumps(value, protocol=5, buffer_callback=buffer_callback)
+        return {"t": "pickle", "buffer": self.add_buffer(payload), "out_of_band": out_of_band}
+
+class _Reader:
+    """Rebuilds values from a node tree over a mapped file"""
+
+    def __init__(self, data: memoryview, data_start: int, buffer_meta: List[Dict[str, Any]]):
+        self.data = data
+        self.buffer_meta = buffer_meta
+        self.offsets = []
+        offset = data_start
+        for meta in buffer_meta:
+            self.offsets.append(offset)
+            offset = _align(offset + meta["nbytes"])
+
+    def buffer(self, index: int) -> memoryview:
+        meta = self.buffer_meta[index]
+        start = self.offsets[index]
+        view = self.data[start:start + meta["nbytes"]]
+        if meta["codec"] == "lz4":
+            if lz4_frame is None:
+                raise SerializationError("Cache entry is lz4 compressed but lz4 is not installed")
+            return memoryview(lz4_frame.decompress(view))
+        return view
+
+    def value(self, node: Dict[str, Any]) -> Any:
+        kind = node["t"]
+        if kind == "json":
+            return node["v"]
+        if kind == "dict":
+            return {k: self.value(v) for k, v in zip(node["keys"], node["values"])}
+        if kind == "ndarray":
+            arr = np.frombuffer(self.buffer(node["buffer"]), dtype=np.dtype(node["dtype"]))
+            return arr.reshape(tuple(node["shape"]))
+        if kind == "pickle":
+            buffers = [self.buffer(i) for i in node["out_of_band"]]
+            return pickle.loads(self.buffer(node["buffer"]), buffers=buffers)
+        if kind == "range":
+            return pd.RangeIndex(node["start"], node["stop"], node["step"], name=self.value(node["name"]))
+        if kind == "series":
+            return pd.Series(
+                self.value(node["values"]),
+                index=self.value(node["index"]),
+                name=self.value(node["name"]),
+                copy=False
+            )
+        if kind == "dataframe":
+            columns = self.value(node["columns"])
+            index = self.value(node["index"])
+            arrays = [self.value(v) for v in node["values"]]
+            # Build from positional columns without consolidating them into
+            # 2D blocks, which would copy every mapped buffer
+            frame = pd.DataFrame(
+                {i: array for i, array in enumerate(arrays)},
+                index=index,
+                copy=False
+            )
+            frame.columns = columns
+            return frame
+        raise SerializationError(f"Unknown cache node type: {kind}")
+
+def dump(value: Any, path: str, compression: Optional[str] = None) -> int:
+    """Write a value to ``path`` and return the number of bytes written"""
+    writer = _Writer(compression)
+    root = writer.node(value)
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "root": root,
+        "buffers": writer.buffer_meta
+    }).encode("utf-8")
+
+    prefix = MAGIC + struct.pack("<Q", len(header))
+    position = len(prefix) + len(header)
+    with open(path, "wb") as f:
+        f.write(prefix)
+        f.write(header)
+        for buffer in writer.buffers:
+            padding = _align(position) - position
+            f.write(b"\0" * padding)
+            f.write(buffer)
+            position += padding + buffer.nbytes
+    return position
+
+def load(path: str) -> Any:
+    """
+    Read a value written by ``dump``.
+
+    The file is mapped copy-on-write: arrays reference the mapping directly and
+    stay writable, with pages copied only if a module modifies them.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError:
+            raise SerializationError(f"Empty cache entry: {path}")
+
+    data = memoryview(mapped)
+    prefix_size = len(MAGIC) + 8
+    if data[:len(MAGIC)] != MAGIC:
+        raise SerializationError(f"Not a cache entry: {path}")
+    (header_size,) = struct.unpack("<Q", data[len(MAGIC):prefix_size])
+    header = json.loads(bytes(data[prefix_size:prefix_size + header_size]))
+    if header.get("version") != FORMAT_VERSION:
+        raise SerializationError(f"Unsupported cache entry version: {header.get('version')}")
+
+    reader = _Reader(data, _align(prefix_size + header_size), header["buffers"])
+    return reader.value(header["root"])
@@ -0,0 +1,58 @@
+from typing import Any, Optional, Set
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an install requirement
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is an install requirement
+    pd = None
+
+def estimate_size(obj: Any, _seen: Optional[Set[int]] = None) -> int:
+    """
+    Estimate the memory held by a cached value, in bytes.
+
+    numpy arrays and pandas objects report their buffers (for views, the
+    buffer they keep alive), containers and plain objects are walked
+    recursively. Shared objects and buffers are only counted once.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if np is not None and isinstance(obj, np.ndarray):
+        if obj.base is None:
+            return obj.nbytes + 112
+        # A view (reshape, transpose, slice, df.values) keeps the whole
+        # buffer of the array it was taken from alive; count it once
+        base = obj
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if base is obj:
+            # Over a buffer that isn't an array (memory map, bytes)
+            return obj.nbytes + 112
+        if id(base) in seen:
+            return 112
+        seen.add(id(base))
+        return base.nbytes + 112
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if isinstance(obj, memoryview):
+        return obj.nbytes
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        # e.g. fitted estimators keep their arrays as attributes
+        size += estimate_size(vars(obj), seen)
+    return size
@@ -0,0 +1,143 @@
+import logging
+from typing import Optional, Tuple
+import hashlib
+import importlib.util
+import marshal
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from types import CodeType
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CodeKey = Tuple[str, str, str]
+
+def code_digest(code: str) -> str:
+    """Get the digest used to tell module code revisions apart"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+class CodeCache:
+    """
+    Bounded LRU cache of compiled module code objects.
+
+    Entries are keyed on ``(module_id, version, sha256(code))`` so an edited
+    version never reuses stale bytecode. When ``persist_path`` is set, compiled
+    code is also written there as marshalled bytecode, letting freshly started
+    worker processes skip compilation.
+    """
+
+    def __init__(self, max_entries: int = 256, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path or None
+        self._entries: "OrderedDict[CodeKey, CodeType]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compile(self, module_id: str, version: str, code: str) -> CodeType:
+        """Get the compiled code object for a module version"""
+        key = (module_id, version, code_digest(code))
+
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+
+        compiled = self._load(key)
+        if compiled is None:
+            compiled = compile(code, f"<module {module_id}:{version}>", "exec")
+            self._store(key, compiled)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, module_id: str, version: Optional[str] = None):
+        """Drop the compiled code of a module, or of a single version of it"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == module_id and version in (None, k[1])]:
+                del self._entries[key]
+
+        if not self.persist_path:
+            return
+        module_dir = os.path.join(self.persist_path, self._safe_name(module_id))
+        if not os.path.isdir(module_dir):
+            return
+        prefix = f"{self._safe_name(version)}-" if version is not None else ""
+        for filename in os.listdir(module_dir):
+            if filename.startswith(prefix):
+                try:
+                    os.remove(os.path.join(module_dir, filename))
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Clear the in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _safe_name(value: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.]", "_", str(value))
+
+    def _path(self, key: CodeKey) -> str:
+        module_id, version, digest = key
+        return os.path.join(
+            self.persist_path,
+            self._safe_name(module_id),
+            f"{self._safe_name(version)}-{digest}.{sys.implementation.cache_tag}.bin"
+        )
+
+    def _load(self, key: CodeKey) -> Optional[CodeType]:
+        """Load persisted bytecode, ignoring files from other interpreters"""
+        if not self.persist_path:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        magic = importlib.util.MAGIC_NUMBER
+        if not data.startswith(magic):
+            return None
+        try:
+            return marshal.loads(data[len(magic):])
+        except (EOFError, ValueError, TypeError):
+            logger.warning(f"Discarding corrupt cached bytecode for {key[0]}:{key[1]}")
+            return None
+
+    def _store(self, key: CodeKey, compiled: CodeType):
+        """Persist bytecode with an atomic rename so readers never see partial files"""
+        if not self.persist_path:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(importlib.util.MAGIC_NUMBER)
+                f.write(marshal.dumps(compiled))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist bytecode for {key[0]}:{key[1]}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+@lru_cache()
+def get_code_cache() -> CodeCache:
+    """Get the process-wide compiled code cache"""
+    settings = get_settings()
+    return CodeCache(
+        max_entries=settings.CODE_CACHE_MAX_ENTRIES,
+        persist_path=settings.CODE_CACHE_PATH
+    )
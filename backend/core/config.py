@@ -1,6 +1,7 @@
 from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
+import multiprocessing
 import os
 from dotenv import load_dotenv
 
@@ -20,10 +21,20 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
     DB_ECHO: bool = os.getenv("DB_ECHO", "False").lower() == "true"
+    DB_POOL_PREWARM: bool = os.getenv("DB_POOL_PREWARM", "False").lower() == "true"  # Open DB_POOL_SIZE connections at startup
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "False").lower() == "true"  # Serve reads on the async engine (pip install ml-pipeline[async])
+    DB_ASYNC_DRIVER: str = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
     
     # Cache settings
-    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")  # local or s3
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")  # memory, local or s3
     CACHE_LOCAL_PATH: str = os.getenv("CACHE_LOCAL_PATH", "/tmp/ml-pipeline-cache")
+    CACHE_DISK_MAX_BYTES: int = int(os.getenv("CACHE_DISK_MAX_BYTES", str(10 * 1024 ** 3)))
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "none")  # none or lz4 (pip install ml-pipeline[lz4])
+    CACHE_TRACK_IN_DB: bool = os.getenv("CACHE_TRACK_IN_DB", "True").lower() == "true"  # Record entries in module_cache
+    CACHE_TOUCH_INTERVAL_SECONDS: float = float(os.getenv("CACHE_TOUCH_INTERVAL_SECONDS", "30"))  # Batching last-use updates
+    CACHE_MEMORY_MAX_BYTES: int = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(512 * 1024 * 1024)))
+    CACHE_EVICTION_POLICY: str = os.getenv("CACHE_EVICTION_POLICY", "lru")  # lru or lfu
+    CACHE_MODULE_QUOTA_BYTES: int = int(os.getenv("CACHE_MODULE_QUOTA_BYTES", "0"))  # 0 = no per-module quota
     
     # AWS settings (for S3 cache)
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
@@ -31,6 +42,82 @@ class Settings(BaseSettings):
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     AWS_S3_BUCKET: Optional[str] = os.getenv("AWS_S3_BUCKET")
     
+    # Object store cache tier (CACHE_BACKEND=s3)
+    CACHE_S3_BUCKET: Optional[str] = os.getenv("CACHE_S3_BUCKET")  # Falls back to AWS_S3_BUCKET
+    CACHE_S3_PREFIX: str = os.getenv("CACHE_S3_PREFIX", "module-cache")
+    CACHE_S3_ENDPOINT_URL: Optional[str] = os.getenv("CACHE_S3_ENDPOINT_URL")  # S3-compatible stores
+    CACHE_OBJECT_STORE_CLIENT: str = os.getenv("CACHE_OBJECT_STORE_CLIENT", "s3")  # s3 or filesystem
+    CACHE_OBJECT_STORE_PATH: str = os.getenv("CACHE_OBJECT_STORE_PATH", "/tmp/ml-pipeline-object-store")
+    CACHE_TRANSFER_CHUNK_BYTES: int = int(os.getenv("CACHE_TRANSFER_CHUNK_BYTES", str(8 * 1024 * 1024)))
+    CACHE_TRANSFER_CONCURRENCY: int = int(os.getenv("CACHE_TRANSFER_CONCURRENCY", "8"))
+    
+    # Executor settings
+    EXECUTOR_MAX_CONCURRENCY: int = int(os.getenv("EXECUTOR_MAX_CONCURRENCY", "4"))  # Modules run at once per canvas
+    EXECUTOR_BACKEND: str = os.getenv("EXECUTOR_BACKEND", "thread")  # thread or process
+    EXECUTOR_WORKERS: int = int(os.getenv("EXECUTOR_WORKERS", "0"))  # 0 = one worker per CPU
+    EXECUTOR_START_METHOD: str = os.getenv(
+        "EXECUTOR_START_METHOD",
+        "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    )
+    EXECUTOR_PRELOAD: str = os.getenv(
+        "EXECUTOR_PRELOAD",
+        "numpy,pandas,sklearn.preprocessing,sklearn.model_selection,sklearn.linear_model"
+    )  # Imported once by the fork server
+    # Executions before a worker is replaced. 0 (never) keeps every worker's
+    # compiled code cache warm across executions. 1 runs each module in a fresh
+    # fork of the template, isolating it from state earlier modules left behind
+    # (globals of imported libraries, leaked memory), but compiles its code
+    # every time unless CODE_CACHE_PATH persists the bytecode.
+    EXECUTOR_MAX_TASKS_PER_WORKER: int = int(os.getenv("EXECUTOR_MAX_TASKS_PER_WORKER", "0"))
+    CODE_CACHE_MAX_ENTRIES: int = int(os.getenv("CODE_CACHE_MAX_ENTRIES", "256"))
+    CODE_CACHE_PATH: Optional[str] = os.getenv("CODE_CACHE_PATH")  # Persist compiled bytecode when set
+    ARTIFACT_PATH: str = os.getenv(
+        "ARTIFACT_PATH",
+        "/dev/shm/ml-pipeline-artifacts" if os.path.isdir("/dev/shm") else "/tmp/ml-pipeline-artifacts"
+    )  # Artifacts shared with worker processes, per run
+    ARTIFACT_INLINE_MAX_BYTES: int = int(os.getenv("ARTIFACT_INLINE_MAX_BYTES", str(1024 * 1024)))  # Larger ones are memory-mapped
+    OUTPUT_INLINE_MAX_BYTES: int = int(os.getenv("OUTPUT_INLINE_MAX_BYTES", "4096"))  # Output values stored on the run itself
+    
+    # Default resource limits of a module execution, overridden by the "limits"
+    # of its version config (0 = unlimited; see backend.core.limits). Native
+    # thread pools are only capped with threadpoolctl (pip install ml-pipeline[limits])
+    MODULE_TIMEOUT_SECONDS: float = float(os.getenv("MODULE_TIMEOUT_SECONDS", "0"))
+    MODULE_CPU_SECONDS: float = float(os.getenv("MODULE_CPU_SECONDS", "0"))
+    MODULE_MAX_RSS_MB: float = float(os.getenv("MODULE_MAX_RSS_MB", "0"))
+    MODULE_MAX_THREADS: int = int(os.getenv("MODULE_MAX_THREADS", "0"))
+    
+    # Environments of module versions listing requirements, built offline from
+    # the wheels in MODULE_ENV_WHEEL_DIR (unset = requirements are ignored)
+    MODULE_ENV_WHEEL_DIR: Optional[str] = os.getenv("MODULE_ENV_WHEEL_DIR")
+    MODULE_ENV_ROOT: str = os.getenv("MODULE_ENV_ROOT", "/tmp/ml-pipeline-envs")
+    MODULE_ENV_WORKERS: int = int(os.getenv("MODULE_ENV_WORKERS", "2"))  # Warm interpreters per environment
+    MODULE_ENV_MAX_ACTIVE: int = int(os.getenv("MODULE_ENV_MAX_ACTIVE", "4"))  # Environments kept warm at once
+    MODULE_ENV_PRELOAD: str = os.getenv("MODULE_ENV_PRELOAD", "numpy,pandas,sklearn")  # Imported when a worker starts
+    
+    RUN_RESULTS_FLUSH_INTERVAL: float = float(os.getenv("RUN_RESULTS_FLUSH_INTERVAL", "0.5"))  # Seconds between result writes
+    RUN_RESULTS_MAX_PENDING: int = int(os.getenv("RUN_RESULTS_MAX_PENDING", "100"))  # Flush early past this many
+    RUN_EVENTS_REPLAY_SIZE: int = int(os.getenv("RUN_EVENTS_REPLAY_SIZE", "1000"))  # Events kept per run for late subscribers
+    RUN_EVENTS_RETENTION_SECONDS: float = float(os.getenv("RUN_EVENTS_RETENTION_SECONDS", "300"))  # After the run finishes
+    RUN_EVENTS_KEEPALIVE_SECONDS: float = float(os.getenv("RUN_EVENTS_KEEPALIVE_SECONDS", "15"))
+    RUN_EVENTS_POLL_SECONDS: float = float(os.getenv("RUN_EVENTS_POLL_SECONDS", "1"))  # Following runs executed by other processes
+    
+    # Run queue settings
+    RUN_WORKER_EMBEDDED: bool = os.getenv("RUN_WORKER_EMBEDDED", "True").lower() == "true"  # False when run workers are deployed
+    RUN_WORKER_CONCURRENCY: int = int(os.getenv("RUN_WORKER_CONCURRENCY", "2"))  # Runs executed at once per worker
+    RUN_WORKER_POLL_INTERVAL: float = float(os.getenv("RUN_WORKER_POLL_INTERVAL", "1"))
+    RUN_JOB_LEASE_SECONDS: float = float(os.getenv("RUN_JOB_LEASE_SECONDS", "60"))  # Requeued when not renewed in time
+    RUN_JOB_HEARTBEAT_SECONDS: float = float(os.getenv("RUN_JOB_HEARTBEAT_SECONDS", "15"))
+    RUN_JOB_MAX_ATTEMPTS: int = int(os.getenv("RUN_JOB_MAX_ATTEMPTS", "3"))
+    RUN_QUEUE_ACCOUNT_MAX_RUNNING: int = int(os.getenv("RUN_QUEUE_ACCOUNT_MAX_RUNNING", "0"))  # 0 = no per-account limit
+    
+    # Scheduler settings (defaults for Canvas.schedule_config)
+    SCHEDULER_EMBEDDED: bool = os.getenv("SCHEDULER_EMBEDDED", "False").lower() == "true"  # Schedule runs from the API process
+    SCHEDULER_REFRESH_SECONDS: float = float(os.getenv("SCHEDULER_REFRESH_SECONDS", "30"))  # Picking up schedule changes
+    SCHEDULER_JITTER_SECONDS: int = int(os.getenv("SCHEDULER_JITTER_SECONDS", "60"))  # Spread of runs sharing a start time
+    SCHEDULER_MISFIRE_GRACE_SECONDS: float = float(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "300"))
+    SCHEDULER_MISFIRE_POLICY: str = os.getenv("SCHEDULER_MISFIRE_POLICY", "run_once")  # skip, run_once or catch_up
+    SCHEDULER_MAX_CATCH_UP: int = int(os.getenv("SCHEDULER_MAX_CATCH_UP", "10"))  # Missed runs started with catch_up
+    
     # API settings
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "ML Pipeline API"
@@ -0,0 +1,129 @@
+from typing import Dict, Any, List, Set, Iterable, Tuple
+from collections import defaultdict
+
+class CyclicDependencyError(ValueError):
+    """Raised when the canvas module connections contain a cycle"""
+    pass
+
+class ExecutionGraph:
+    """
+    Dependency graph of the modules in a canvas.
+
+    Nodes are the module entries of ``Canvas.module_config`` and edges come from
+    the ``connections`` list (``source``/``target`` or ``from_module``/``to_module``)
+    or a per-module ``depends_on`` list. Canvases without any connections fall
+    back to ``execution_order``: every module depends on the modules of the
+    previous order level, so modules sharing an order value run side by side.
+    """
+
+    def __init__(self, nodes: Dict[str, Dict[str, Any]], edges: Iterable[Tuple[str, str]]):
+        self.nodes = nodes
+        self._upstream: Dict[str, Set[str]] = {node: set() for node in nodes}
+        self._downstream: Dict[str, Set[str]] = {node: set() for node in nodes}
+
+        for source, target in edges:
+            if source not in nodes or target not in nodes:
+                raise ValueError(f"Connection {source} -> {target} references an unknown module")
+            if source == target:
+                raise CyclicDependencyError(f"Module {source} depends on itself")
+            self._upstream[target].add(source)
+            self._downstream[source].add(target)
+
+        self._order = self._topological_sort()
+
+    @classmethod
+    def from_module_config(cls, module_config: Dict[str, Any]) -> "ExecutionGraph":
+        """Build the graph from a canvas ``module_config``"""
+        module_config = module_config or {}
+        nodes = {
+            key: value for key, value in module_config.items()
+            if isinstance(value, dict) and ("module_id" in value or "version" in value)
+        }
+
+        edges = []
+        for conn in module_config.get("connections") or []:
+            source = conn.get("source", conn.get("from_module"))
+            target = conn.get("target", conn.get("to_module"))
+            edges.append((source, target))
+        for key, value in nodes.items():
+            for dependency in value.get("depends_on") or []:
+                edges.append((dependency, key))
+
+        if not edges:
+            edges = cls._edges_from_execution_order(nodes)
+
+        return cls(nodes, edges)
+
+    @staticmethod
+    def _edges_from_execution_order(nodes: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Chain order levels so each level waits for the one before it"""
+        levels: Dict[Any, List[str]] = defaultdict(list)
+        for key, value in nodes.items():
+            levels[value.get("execution_order", 0)].append(key)
+
+        edges = []
+        previous: List[str] = []
+        for order in sorted(levels):
+            for target in levels[order]:
+                edges.extend((source, target) for source in previous)
+            previous = levels[order]
+        return edges
+
+    def _topological_sort(self) -> List[str]:
+        """Kahn's algorithm, breaking ties by execution_order then insertion order"""
+        position = {node: index for index, node in enumerate(self.nodes)}
+
+        def sort_key(node: str):
+            return (self.nodes[node].get("execution_order", 0), position[node])
+
+        in_degree = {node: len(deps) for node, deps in self._upstream.items()}
+        ready = sorted((n for n, d in in_degree.items() if d == 0), key=sort_key)
+        order = []
+
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for child in self._downstream[node]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
+            ready.sort(key=sort_key)
+
+        if len(order) != len(self.nodes):
+            cyclic = sorted(n for n, d in in_degree.items() if d > 0)
+            raise CyclicDependencyError(f"Cycle detected between modules: {', '.join(cyclic)}")
+        return order
+
+    def topological_order(self) -> List[str]:
+        """Get a valid sequential execution order"""
+        return list(self._order)
+
+    def upstream(self, node: str) -> Set[str]:
+        """Get the direct dependencies of a module"""
+        return set(self._upstream[node])
+
+    def downstream(self, node: str) -> Set[str]:
+        """Get the modules that directly depend on a module"""
+        return set(self._downstream[node])
+
+    def ancestors(self, node: str) -> Set[str]:
+        """Get every module a module transitively depends on"""
+        seen: Set[str] = set()
+        stack = list(self._upstream[node])
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._upstream[current])
+        return seen
+
+    def descendants(self, node: str) -> Set[str]:
+        """Get every module that transitively depends on a module"""
+        seen: Set[str] = set()
+        stack = list(self._downstream[node])
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                stack.extend(self._downstream[current])
+        return seen
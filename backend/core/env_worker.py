@@ -0,0 +1,45 @@
+"""
+Entry point of the warm interpreters of module environments.
+
+    python -m backend.core.env_worker [module to preload ...]
+
+Started by ``EnvironmentWorker`` with the environment's interpreter. Imports
+the preloads, reports ready, then executes the ``_run_in_worker`` requests it
+reads from stdin until stdin is closed.
+"""
+import importlib
+import logging
+import os
+import sys
+
+from backend.core.environments import read_frame, write_frame
+
+logger = logging.getLogger(__name__)
+
+def main():
+    # Keep the protocol on a private copy of stdout; whatever modules print
+    # goes to stderr
+    requests = os.fdopen(os.dup(sys.stdin.fileno()), "rb")
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdin = open(os.devnull)
+
+    for name in sys.argv[1:]:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Can't preload {name}: {str(e)}")
+
+    # Imported after the preloads so they come from the environment
+    from backend.core.backends import _run_in_worker
+
+    write_frame(responses, "ready")
+    while True:
+        try:
+            args = read_frame(requests)
+        except EOFError:
+            return
+        write_frame(responses, _run_in_worker(*args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Per-requirements module environments.
+
+Modules whose version lists ``requirements`` run in a virtualenv built for
+exactly those requirements, keyed by their fingerprint. Environments are built
+once, offline, from the wheels in MODULE_ENV_WHEEL_DIR and layered over the
+API's own site-packages, so only what differs from it gets installed. They are
+built under a file lock into a temporary directory and renamed into place, so
+concurrent builders (several run workers on a host) build each once.
+
+Each environment is served by warm ``EnvironmentWorker`` interpreters that
+import the heavy libraries (MODULE_ENV_PRELOAD) when they start and then
+execute modules one after the other (see ``backend.core.env_worker``). An
+``EnvironmentPool`` keeps the workers of the most recently used environments.
+
+Outcomes are unpickled by the API, so values of types only installed in an
+environment must not be left in a module's output.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional
+import fcntl
+import hashlib
+import json
+import os
+import pickle
+import platform
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import venv
+
+logger = logging.getLogger(__name__)
+
+# Project root, so the interpreters of environments can import ``backend``
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MARKER_FILE = "environment.json"
+
+def normalize_requirements(requirements: Optional[Iterable[str]]) -> List[str]:
+    """Get requirements in a canonical order, without blanks and duplicates"""
+    return sorted({" ".join(r.split()) for r in requirements or [] if r and r.strip()}, key=str.lower)
+
+def requirements_fingerprint(requirements: Optional[Iterable[str]]) -> Optional[str]:
+    """
+    Get the key of the environment for ``requirements``, or None when there are
+    none (the module runs in the API's own environment). The interpreter
+    version is part of it, since wheels are built for one.
+    """
+    normalized = normalize_requirements(requirements)
+    if not normalized:
+        return None
+    key = json.dumps({
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "requirements": normalized
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+class EnvironmentBuildError(RuntimeError):
+    """Raised when an environment's requirements can't be installed"""
+    pass
+
+class EnvironmentBuilder:
+    """Builds environments under ``root`` from the wheels in ``wheel_dir``"""
+
+    def __init__(self, root: str, wheel_dir: str, timeout: float = 1800):
+        self.root = root
+        self.wheel_dir = wheel_dir
+        self.timeout = timeout
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, fingerprint: str) -> str:
+        return os.path.join(self.root, fingerprint)
+
+    def python_for(self, fingerprint: str) -> str:
+        return os.path.join(self.path_for(fingerprint), "bin", "python")
+
+    def ensure(self, requirements: Iterable[str]) -> str:
+        """Get the interpreter of the environment for ``requirements``, building it if needed"""
+        fingerprint = requirements_fingerprint(requirements)
+        if fingerprint is None:
+            raise ValueError("No requirements to build an environment for")
+        path = self.path_for(fingerprint)
+        if os.path.exists(os.path.join(path, MARKER_FILE)):
+            return self.python_for(fingerprint)
+
+        with open(os.path.join(self.root, f"{fingerprint}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(os.path.join(path, MARKER_FILE)):
+                    self._build(fingerprint, normalize_requirements(requirements))
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return self.python_for(fingerprint)
+
+    def _build(self, fingerprint: str, requirements: List[str]):
+        logger.info(f"Building module environment {fingerprint}: {', '.join(requirements)}")
+        staging = tempfile.mkdtemp(prefix=f".{fingerprint}-", dir=self.root)
+        try:
+            venv.EnvBuilder(system_site_packages=True, with_pip=True, symlinks=True).create(staging)
+            requirements_file = os.path.join(staging, "requirements.txt")
+            with open(requirements_file, "w") as f:
+                f.write("\n".join(requirements) + "\n")
+            process = subprocess.run(
+                [
+                    os.path.join(staging, "bin", "python"), "-m", "pip", "install",
+                    "--no-index", "--find-links", self.wheel_dir,
+                    "--disable-pip-version-check", "--no-input", "--quiet",
+                    "-r", requirements_file
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+            if process.returncode != 0:
+                raise EnvironmentBuildError(
+                    f"Installing {', '.join(requirements)} failed: {process.stderr.strip()[-2000:]}"
+                )
+            with open(os.path.join(staging, MARKER_FILE), "w") as f:
+                json.dump({"fingerprint": fingerprint, "requirements": requirements}, f)
+
+            path = self.path_for(fingerprint)
+            shutil.rmtree(path, ignore_errors=True)  # Leftover of an interrupted build
+            os.rename(staging, path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+def write_payload(stream, data: bytes):
+    stream.write(struct.pack("<Q", len(data)))
+    stream.write(data)
+    stream.flush()
+
+def read_payload(stream) -> bytes:
+    header = stream.read(8)
+    if len(header) < 8:
+        raise EOFError("Environment worker closed its pipe")
+    (size,) = struct.unpack("<Q", header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Environment worker closed its pipe")
+    return data
+
+def write_frame(stream, value: Any):
+    write_payload(stream, pickle.dumps(value, protocol=5))
+
+def read_frame(stream) -> Any:
+    return pickle.loads(read_payload(stream))
+
+class EnvironmentWorker:
+    """
+    A warm interpreter of an environment, executing one module at a time.
+
+    Requests and outcomes are pickled over its stdin and stdout; module output
+    printed to stdout goes to its stderr instead, which is inherited.
+    """
+
+    def __init__(self, python: str, preload: Iterable[str] = ()):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+        self.process = subprocess.Popen(
+            [python, "-m", "backend.core.env_worker", *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env
+        )
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def wait_ready(self):
+        """Wait for the worker to finish importing its preloads"""
+        if not self.ready:
+            with self._lock:
+                read_frame(self.process.stdout)
+                self.ready = True
+
+    def call(self, request: bytes) -> bytes:
+        """Send a pickled request (``_run_in_worker`` arguments) and wait for its pickled outcome"""
+        self.wait_ready()
+        with self._lock:
+            write_payload(self.process.stdin, request)
+            return read_payload(self.process.stdout)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+            self.process.wait()
+
+class _Environment:
+    """Workers of one environment, at most ``size`` of them"""
+
+    def __init__(self, python: str, size: int, preload: List[str]):
+        self.python = python
+        self.size = max(1, size)
+        self.preload = preload
+        self.closed = False
+        self._idle: List[EnvironmentWorker] = []
+        self._count = 0
+        self._condition = threading.Condition()
+
+    def warm(self):
+        """Start all the workers, so they preload while the first modules run"""
+        with self._condition:
+            while self._count < self.size:
+                self._idle.append(EnvironmentWorker(self.python, self.preload))
+                self._count += 1
+
+    def acquire(self) -> EnvironmentWorker:
+        """Get an idle worker, starting one if there's room, else waiting for one"""
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive:
+                        return worker
+                    self._count -= 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._condition.wait()
+        try:
+            return EnvironmentWorker(self.python, self.preload)
+        except BaseException:
+            self._forget()
+            raise
+
+    def release(self, worker: EnvironmentWorker):
+        with self._condition:
+            if not self.closed and worker.alive:
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+        worker.close()
+        self._forget()
+
+    def discard(self, worker: EnvironmentWorker):
+        """Drop a worker that died or broke the protocol; a new one replaces it"""
+        worker.kill()
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._count -= 1
+            self._condition.notify()
+
+    def close(self):
+        """Stop idle workers; busy ones stop when they're released"""
+        with self._condition:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.close()
+
+class EnvironmentPool:
+    """
+    Warm workers of up to ``max_environments`` environments, least recently
+    used ones being stopped first. Thread-safe; ``execute`` blocks.
+    """
+
+    def __init__(
+        self,
+        builder: EnvironmentBuilder,
+        workers_per_environment: int = 2,
+        max_environments: int = 4,
+        preload: Iterable[str] = ()
+    ):
+        self.builder = builder
+        self.workers_per_environment = workers_per_environment
+        self.max_environments = max(1, max_environments)
+        self.preload = list(preload)
+        self._environments: "OrderedDict[str, _Environment]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_environment(self, requirements: Iterable[str]) -> _Environment:
+        fingerprint = requirements_fingerprint(requirements)
+        with self._lock:
+            environment = self._environments.get(fingerprint)
+            if environment is not None:
+                self._environments.move_to_end(fingerprint)
+                return environment
+
+        # Builds of other environments don't wait on this one
+        python = self.builder.ensure(requirements)
+        evicted = []
+        with self._lock:
+            environment = self._environments.get(fingerprint)
+            if environment is None:
+                environment = _Environment(python, self.workers_per_environment, self.preload)
+                environment.warm()
+                self._environments[fingerprint] = environment
+                while len(self._environments) > self.max_environments:
+                    evicted.append(self._environments.popitem(last=False)[1])
+            self._environments.move_to_end(fingerprint)
+        for stale in evicted:
+            stale.close()
+        return environment
+
+    def execute(self, requirements: Iterable[str], request: tuple) -> Any:
+        """Run ``_run_in_worker(*request)`` in a worker of the environment for ``requirements``"""
+        # Pickled up front, a request that can't be pickled never reaches a worker
+        payload = pickle.dumps(request, protocol=5)
+        environment = self._get_environment(requirements)
+        worker = environment.acquire()
+        try:
+            response = worker.call(payload)
+        except BaseException as e:
+            # Interrupted mid-exchange (cancelled, timed out, or the worker died)
+            # the worker may still send or expect the rest of a frame
+            environment.discard(worker)
+            if isinstance(e, (EOFError, OSError)):
+                logger.error(f"Worker of module environment {environment.python} died, replacing it")
+                raise RuntimeError(f"Module worker exited with code {worker.process.returncode}") from e
+            raise
+        environment.release(worker)
+        # A response read in full leaves the worker in sync, even if it can't be unpickled here
+        return pickle.loads(response)
+
+    def close(self):
+        with self._lock:
+            environments = list(self._environments.values())
+            self._environments.clear()
+        for environment in environments:
+            environment.close()
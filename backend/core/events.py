@@ -0,0 +1,163 @@
+"""
+In-process run progress events.
+
+``CanvasExecutor`` publishes module started/finished and log events of a run
+to the process-wide ``RunEventBus``; API clients follow them over
+``GET /runs/{run_id}/events`` (Server-Sent Events) instead of polling the
+run. Every run keeps its last ``replay_size`` events, so a subscriber that
+connects late, or reconnects with the id of the last event it saw, catches up
+before receiving live events.
+
+Events only reach subscribers in the process that executes the run.
+"""
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+import asyncio
+import threading
+import time
+
+from backend.core.config import get_settings
+
+# Event types
+RUN_STARTED = "run_started"
+MODULE_STARTED = "module_started"
+MODULE_FINISHED = "module_finished"
+LOG = "log"
+RUN_FINISHED = "run_finished"
+
+class _Subscriber:
+    """Live event queue of one subscriber, fed from any thread"""
+
+    def __init__(self, max_pending: int):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.lagged = False
+
+    def deliver(self, event: Optional[Dict[str, Any]]):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: Optional[Dict[str, Any]]):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream, the client reconnects with
+            # Last-Event-ID and catches up from the replay buffer
+            self.lagged = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+class _RunChannel:
+    def __init__(self, replay_size: int):
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=replay_size)
+        self.next_id = 1
+        self.subscribers: Set[_Subscriber] = set()
+        self.closed_at: Optional[float] = None
+
+class RunEventBus:
+    """
+    Publish/subscribe of run progress events with a per-run replay buffer.
+
+    Events are dicts with an ``id`` increasing per run, the ``run_id``, the
+    event ``type``, a ``timestamp`` and the event ``data``. A closed run keeps
+    its buffer for ``retention_seconds`` so subscribers arriving right after it
+    finished still see how it went.
+    """
+
+    def __init__(self, replay_size: int = 1000, retention_seconds: float = 300):
+        self.replay_size = replay_size
+        self.retention_seconds = retention_seconds
+        self._runs: Dict[str, _RunChannel] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, run_id: str, event_type: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Publish an event of a run and return it"""
+        with self._lock:
+            self._evict_expired()
+            channel = self._runs.get(run_id)
+            if channel is None:
+                channel = self._runs[run_id] = _RunChannel(self.replay_size)
+            event = {
+                "id": channel.next_id,
+                "run_id": run_id,
+                "type": event_type,
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": data or {}
+            }
+            channel.next_id += 1
+            channel.events.append(event)
+            subscribers = list(channel.subscribers)
+        for subscriber in subscribers:
+            subscriber.deliver(event)
+        return event
+
+    def close(self, run_id: str):
+        """Mark a run as finished; its subscribers' streams end after the last event"""
+        with self._lock:
+            channel = self._runs.get(run_id)
+            if channel is None or channel.closed_at is not None:
+                return
+            channel.closed_at = time.monotonic()
+            subscribers = list(channel.subscribers)
+            channel.subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.deliver(None)
+
+    def has_run(self, run_id: str) -> bool:
+        with self._lock:
+            self._evict_expired()
+            return run_id in self._runs
+
+    async def subscribe(self, run_id: str, last_event_id: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over the buffered events of a run after ``last_event_id``, then
+        over its live events until the run is closed.
+        """
+        subscriber = _Subscriber(self.replay_size)
+        with self._lock:
+            channel = self._runs.get(run_id)
+            if channel is None:
+                # The run hasn't published anything yet
+                channel = self._runs[run_id] = _RunChannel(self.replay_size)
+            replay = [event for event in channel.events if last_event_id is None or event["id"] > last_event_id]
+            closed = channel.closed_at is not None
+            if not closed:
+                channel.subscribers.add(subscriber)
+
+        try:
+            for event in replay:
+                yield event
+            if closed:
+                return
+            while True:
+                event = await subscriber.queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            with self._lock:
+                channel.subscribers.discard(subscriber)
+                if not channel.events and not channel.subscribers and self._runs.get(run_id) is channel:
+                    # Nothing was ever published, don't keep the channel around
+                    del self._runs[run_id]
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [
+            run_id for run_id, channel in self._runs.items()
+            if channel.closed_at is not None and now - channel.closed_at > self.retention_seconds
+        ]
+        for run_id in expired:
+            del self._runs[run_id]
+
+@lru_cache()
+def get_event_bus() -> RunEventBus:
+    """Get the process-wide run event bus"""
+    settings = get_settings()
+    return RunEventBus(
+        replay_size=settings.RUN_EVENTS_REPLAY_SIZE,
+        retention_seconds=settings.RUN_EVENTS_RETENTION_SECONDS
+    )
@@ -1,34 +1,53 @@
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
 import importlib.util
 import sys
 from datetime import datetime
 import traceback
 
-from backend.models.database import Canvas, ModuleVersion
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models.database import Canvas, CanvasRun, ModuleVersion
 from backend.schemas.run import RunStatus, ModuleRunResult
-from backend.core.cache import CacheManager  # We'll implement this later
+from backend.core.artifacts import ArtifactStore, bind_inputs, declared_inputs, declared_outputs
+from backend.core.cache import CacheManager, get_cache_manager
+from backend.core.config import get_settings
+from backend.core.backends import SHARED_VAR_PREFIX, ExecutionBackend, get_execution_backend
+from backend.core.dag import ExecutionGraph
+from backend.core import events
+from backend.core.events import RunEventBus, get_event_bus
+from backend.core.hashing import UnhashableValueError, hash_module_inputs, hash_value
+from backend.core.outputs import OutputPolicy, summarize_outputs
+from backend.core.run_writer import RunResultWriter
+from backend.crud.module import ModuleCRUD
 
 logger = logging.getLogger(__name__)
 
 class ModuleExecutionContext:
-    """Context for module execution, containing shared variables and utilities"""
-    def __init__(self, canvas_id: str, run_id: str):
+    """Context for module execution, containing shared variables, the run's artifacts and utilities"""
+    def __init__(
+        self,
+        canvas_id: str,
+        run_id: str,
+        cache_manager: Optional[CacheManager] = None,
+        artifacts: Optional[ArtifactStore] = None,
+        output_policy: Optional[OutputPolicy] = None
+    ):
         self.canvas_id = canvas_id
         self.run_id = run_id
         self.shared_vars: Dict[str, Any] = {}
-        self.cache_manager = CacheManager()
+        self.cache_manager = cache_manager or get_cache_manager()
+        self.artifacts = artifacts or ArtifactStore(run_id)
+        self.output_policy = output_policy or OutputPolicy(self.cache_manager)
         
     def get_var(self, name: str, default: Any = None) -> Any:
         """Get a shared variable"""
-        return self.shared_vars.get(name, default)
+        return self.shared_vars.get(f"{SHARED_VAR_PREFIX}{name}", default)
         
     def set_var(self, name: str, value: Any):
         """Set a shared variable"""
-        # Prefix variables to avoid conflicts
-        prefixed_name = f"__ml_pipeline_{name}"
-        self.shared_vars[prefixed_name] = value
+        self.shared_vars[f"{SHARED_VAR_PREFIX}{name}"] = value
         
     def get_cached_result(self, module_id: str, input_hash: str) -> Optional[Dict]:
         """Get cached result for a module"""
@@ -41,9 +60,24 @@ class ModuleExecutor:
     async def execute_module(
         module: ModuleVersion,
         context: ModuleExecutionContext,
-        previous_results: Dict[str, Any] = None
+        previous_results: Dict[str, Any] = None,
+        backend: Optional[ExecutionBackend] = None,
+        input_hash: Optional[str] = None,
+        inputs: Optional[Dict[str, Tuple[str, str]]] = None,
+        cache: bool = True
     ) -> ModuleRunResult:
-        """Execute a single module"""
+        """
+        Execute a single module.
+
+        ``input_hash`` is the module's content-addressed cache key; it is derived
+        from the module code, config and ``previous_results`` when not given.
+        Without ``cache``, or when its inputs can't be hashed, the module is
+        neither looked up in nor stored to the cache.
+        ``inputs`` binds variables to artifacts of ``context.artifacts``; the
+        module's declared outputs are added to it. A module declaring outputs
+        outputs only those, and ``context.output_policy`` decides what of the
+        output is stored with the run.
+        """
         start_time = datetime.utcnow()
         
         result = ModuleRunResult(
@@ -54,39 +88,94 @@ class ModuleExecutor:
         )
         
         try:
-            # Create a new module namespace
-            namespace = {
-                'context': context,
-                'previous_results': previous_results or {},
-                'cached_results': [],  # List to store variables to cache
-                'logger': logger
-            }
+            if not cache:
+                input_hash = None
+            elif input_hash is None:
+                try:
+                    input_hash = await asyncio.to_thread(
+                        hash_module_inputs, module.code, module.config, previous_results
+                    )
+                except UnhashableValueError as e:
+                    logger.info(f"Not caching module {module.module_id}: {str(e)}")
+            result.input_hash = input_hash
             
-            # Execute the module code
-            exec(module.code, namespace)
+            # Skip execution entirely when an identical run was cached (with
+            # every declared output)
+            outputs = declared_outputs(module.config)
+            cached = None
+            if input_hash is not None:
+                cached = await asyncio.to_thread(
+                    context.get_cached_result, module.module_id, input_hash
+                )
+            if cached is not None and not all(name in cached["variables"] for name in outputs):
+                cached = None
+            result.metrics["cache_hit"] = cached is not None
+            if cached is not None:
+                # The hit is this module's own copy, downstream modules may
+                # change it in place
+                context.shared_vars.update(cached.get("shared_vars", {}))
+                result.status = RunStatus.COMPLETED
+                output = cached["variables"]
+                result.output = {name: output[name] for name in outputs} if outputs else dict(output)
+                result.output_hash = cached["output_hash"]
+                for name in outputs:
+                    context.artifacts.put(module.module_id, name, result.output[name])
+                # Large outputs were spilled when the module executed, they
+                # are only spilled again if evicted since
+                await asyncio.to_thread(
+                    ModuleExecutor._store_output, module, context, result, outputs, False
+                )
+                return result
             
-            # Handle caching if specified
-            if namespace.get('cached_results'):
-                cache_data = {
-                    var: namespace.get(var) 
-                    for var in namespace['cached_results'] 
-                    if var in namespace
-                }
-                if cache_data:
-                    context.cache_manager.set(
-                        module.module_id,
-                        str(hash(str(previous_results))),  # Simple input hash
-                        cache_data
-                    )
+            # Execute the module code on the configured backend, off the
+            # event loop so independent modules can run side by side
+            backend = backend or get_execution_backend()
+            outcome = await backend.run(module, context, previous_results or {}, inputs)
+            context.shared_vars.update(outcome["shared_vars"])
+            if outcome.get("usage"):
+                result.metrics["resources"] = outcome["usage"]
+            
+            if outcome["error"]:
+                logger.error(f"Error executing module {module.module_id}: {outcome['error']['error']}")
+                result.status = RunStatus.FAILED
+                result.error = outcome["error"]
+                return result
+
+            # Artifacts a worker process returned by reference are mapped back
+            # into the output
+            returned = outcome.get("artifacts") or {}
+            output = dict(outcome["output"])
+            missing = [name for name in outputs if name not in output and name not in returned]
+            if missing:
+                raise ValueError(f"Declared outputs were not produced: {', '.join(missing)}")
+            for name in outputs:
+                context.artifacts.put(module.module_id, name, returned.get(name, output.get(name)))
+                if name in returned:
+                    output[name] = await asyncio.to_thread(context.artifacts.get, module.module_id, name)
             
             # Update result
             result.status = RunStatus.COMPLETED
-            result.output = {
-                k: v for k, v in namespace.items()
-                if not k.startswith('__') and k not in [
-                    'context', 'previous_results', 'cached_results', 'logger'
-                ]
-            }
+            result.output = {name: output[name] for name in outputs} if outputs else output
+            try:
+                result.output_hash = await asyncio.to_thread(hash_value, result.output)
+            except UnhashableValueError as e:
+                # Modules downstream of this one aren't cached either
+                logger.info(f"Output of module {module.module_id} has no content hash: {str(e)}")
+            await asyncio.to_thread(ModuleExecutor._store_output, module, context, result, outputs, True)
+            
+            # Handle caching if specified. The shared variables and output hash
+            # are kept so a cache hit looks the same to downstream modules.
+            if outcome["cache_data"] and input_hash is not None and result.output_hash is not None:
+                await asyncio.to_thread(
+                    context.cache_manager.set,
+                    module.module_id,
+                    input_hash,
+                    {
+                        "variables": outcome["cache_data"],
+                        "shared_vars": outcome["shared_vars"],
+                        "output_hash": result.output_hash
+                    }
+                )
             
         except Exception as e:
             logger.error(f"Error executing module {module.module_id}: {str(e)}")
@@ -103,48 +192,337 @@ class ModuleExecutor:
         
         return result
 
+    @staticmethod
+    def _store_output(
+        module: ModuleVersion,
+        context: ModuleExecutionContext,
+        result: ModuleRunResult,
+        outputs: List[str],
+        spill: bool
+    ):
+        """Apply the output policy, recording the size of every output value"""
+        result.stored_output, result.metrics["outputs"] = context.output_policy.apply(
+            module.module_id, result.input_hash, result.output, outputs, spill=spill
+        )
+
 class CanvasExecutor:
-    """Handles execution of entire canvas"""
+    """
+    Handles execution of entire canvas.
+
+    When both ``db`` and the ``run_id`` of an existing run are given, module
+    state transitions are persisted to ``module_run_results`` through a
+    ``RunResultWriter``. Progress is published to ``event_bus`` (by default the
+    process-wide ``RunEventBus``) under the run id.
+
+    Given a ``baseline_run`` (the last successful run of the canvas) the
+    execution is incremental: modules whose fingerprint is unchanged since the
+    baseline, and that no changed module depends on, are not executed again
+    but reuse their baseline result.
+    """
     
-    def __init__(self, canvas: Canvas):
+    def __init__(
+        self,
+        canvas: Canvas,
+        db: Optional[Session] = None,
+        run_id: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        backend: Optional[ExecutionBackend] = None,
+        result_writer: Optional[RunResultWriter] = None,
+        event_bus: Optional[RunEventBus] = None,
+        baseline_run: Optional[CanvasRun] = None
+    ):
         self.canvas = canvas
+        self.db = db
+        self.backend = backend or get_execution_backend()
+        if result_writer is None and db is not None and run_id is not None:
+            # Flushes run in worker threads, so they get their own sessions
+            result_writer = RunResultWriter(sessionmaker(bind=db.get_bind(), autoflush=False))
+        self.result_writer = result_writer
+        self.event_bus = event_bus or get_event_bus()
+        self.baseline_run = baseline_run
         self.context = ModuleExecutionContext(
             canvas_id=canvas.canvas_id,
-            run_id=str(datetime.utcnow().timestamp())
+            run_id=run_id or str(datetime.utcnow().timestamp())
         )
+        self.max_concurrency = max(1, max_concurrency or get_settings().EXECUTOR_MAX_CONCURRENCY)
+        self.graph = ExecutionGraph.from_module_config(canvas.module_config)
     
     async def execute(self) -> Dict[str, ModuleRunResult]:
-        """Execute all modules in the canvas in order"""
-        results = {}
-        module_order = self._get_execution_order()
-        
-        for module_id in module_order:
-            module_config = self.canvas.module_config[module_id]
-            module_version = module_config.get("version")
-            
-            # Get previous results for this module
-            previous_results = {
-                k: v.output for k, v in results.items()
-                if v.status == RunStatus.COMPLETED
-            }
-            
-            # Execute module
-            result = await ModuleExecutor.execute_module(
-                module_version,
-                self.context,
-                previous_results
-            )
-            
+        """
+        Execute all modules in the canvas following the dependency graph.
+
+        Every module whose upstream modules have completed is started right away,
+        with at most ``max_concurrency`` modules running at once. Once a module
+        fails no new modules are started; modules already running are allowed
+        to finish. However the run ends, even before a module starts (a missing
+        module version, an unbound input), run_finished is published, the
+        event stream closed and the run's artifacts removed.
+        """
+        results: Dict[str, ModuleRunResult] = {}
+        order = self._get_execution_order()
+        position = {module_id: index for index, module_id in enumerate(order)}
+        waiting_on = {module_id: len(self.graph.upstream(module_id)) for module_id in order}
+        ready = [module_id for module_id in order if waiting_on[module_id] == 0]
+        running: Dict[asyncio.Task, str] = {}
+        reused: Dict[str, ModuleRunResult] = {}
+        failed = False
+
+        def finish(module_id: str, result: ModuleRunResult):
+            nonlocal failed
             results[module_id] = result
-            
-            # Stop execution if module failed
+            if module_id not in reused:
+                self._record(result)
+            self._publish(events.MODULE_FINISHED, {
+                "module_id": module_id,
+                "status": RunStatus(result.status).value,
+                "execution_time": result.execution_time,
+                "cache_hit": result.metrics.get("cache_hit"),
+                "reused": module_id in reused,
+                "error": result.error.get("error") if result.error else None
+            })
+
+            # Stop scheduling new modules if this one failed
             if result.status == RunStatus.FAILED:
-                break
+                if not failed and (ready or running):
+                    self._publish(events.LOG, {
+                        "level": "error",
+                        "message": f"Module {module_id} failed, no further modules will be started"
+                    })
+                failed = True
+                return
+
+            for child in self.graph.downstream(module_id):
+                waiting_on[child] -= 1
+                if waiting_on[child] == 0:
+                    ready.append(child)
+
+        try:
+            # Module versions may be loaded from the database, off the event loop
+            modules = await asyncio.to_thread(self._resolve_modules, order)
+            bindings = {module_id: self._bind_inputs(module_id, modules) for module_id in order}
+            if self.baseline_run is not None:
+                reused = self._get_reusable_results(order, modules)
+
+            if self.result_writer is not None:
+                await self.result_writer.start()
+            self._publish(events.RUN_STARTED, {"modules": order, "reused": sorted(reused)})
+
+            while ready or running:
+                while ready and not failed and len(running) < self.max_concurrency:
+                    module_id = ready.pop(0)
+                    if module_id in reused:
+                        finish(module_id, reused[module_id])
+                        continue
+                    started = ModuleRunResult(
+                        module_id=modules[module_id].module_id,
+                        status=RunStatus.RUNNING,
+                        started_at=datetime.utcnow()
+                    )
+                    self._record(started)
+                    self._publish(events.MODULE_STARTED, {
+                        "module_id": module_id,
+                        "started_at": started.started_at.isoformat()
+                    })
+                    input_hash = self._get_input_hash(modules[module_id], module_id, results)
+                    task = asyncio.create_task(ModuleExecutor.execute_module(
+                        modules[module_id],
+                        self.context,
+                        # Modules declaring their inputs get only those
+                        self._get_previous_results(module_id, results) if bindings[module_id] is None else {},
+                        self.backend,
+                        input_hash,
+                        inputs=bindings[module_id],
+                        cache=input_hash is not None
+                    ))
+                    running[task] = module_id
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    finish(running.pop(task), task.result())
+                ready.sort(key=position.get)
+        except Exception as e:
+            self._publish(events.LOG, {"level": "error", "message": f"Run failed: {str(e)}"})
+            raise
+        finally:
+            if self.result_writer is not None:
+                await self.result_writer.close()
+            self._publish(events.RUN_FINISHED, {
+                "status": (RunStatus.FAILED if failed or len(results) < len(order) else RunStatus.COMPLETED).value,
+                "completed": sum(1 for r in results.values() if r.status == RunStatus.COMPLETED),
+                "failed": sum(1 for r in results.values() if r.status == RunStatus.FAILED)
+            })
+            self.event_bus.close(self.context.run_id)
+            self.context.artifacts.close()
         
         return results
+
+    @staticmethod
+    def get_run_metrics(results: Dict[str, ModuleRunResult]) -> Dict[str, Any]:
+        """Summarize cache hits and misses, reused results and output sizes for the run metrics"""
+        modules = {
+            module_id: "hit" if result.metrics.get("cache_hit") else "miss"
+            for module_id, result in results.items()
+            if "cache_hit" in result.metrics
+        }
+        hits = sum(1 for outcome in modules.values() if outcome == "hit")
+        metrics = {
+            "cache": {
+                "hits": hits,
+                "misses": len(modules) - hits,
+                "modules": modules
+            }
+        }
+        reused = {
+            module_id: result.metrics["reused_from"]
+            for module_id, result in results.items()
+            if result.metrics.get("reused_from")
+        }
+        if reused:
+            metrics["incremental"] = {
+                "reused": len(reused),
+                "executed": len(results) - len(reused),
+                "modules": reused
+            }
+        metrics["outputs"] = summarize_outputs({
+            module_id: result.metrics["outputs"]
+            for module_id, result in results.items()
+            if "outputs" in result.metrics
+        })
+        return metrics
+
+    def _record(self, result: ModuleRunResult):
+        """Queue a module state transition for persistence"""
+        if self.result_writer is not None:
+            self.result_writer.record(self.context.run_id, result)
+
+    def _publish(self, event_type: str, data: Dict[str, Any]):
+        self.event_bus.publish(self.context.run_id, event_type, data)
+
+    def _get_previous_results(
+        self,
+        module_id: str,
+        results: Dict[str, ModuleRunResult]
+    ) -> Dict[str, Any]:
+        """Get the outputs of the completed modules upstream of a module"""
+        return {
+            k: results[k].output for k in self.graph.ancestors(module_id)
+            if k in results and results[k].status == RunStatus.COMPLETED
+        }
+
+    def _get_input_hash(
+        self,
+        module: ModuleVersion,
+        module_id: str,
+        results: Dict[str, ModuleRunResult]
+    ) -> Optional[str]:
+        """
+        Derive a module's cache key from the output hashes of its ancestors;
+        None (not cached) when one of them has no hash
+        """
+        upstream_hashes = {
+            k: results[k].output_hash for k in self.graph.ancestors(module_id)
+            if k in results and results[k].status == RunStatus.COMPLETED
+        }
+        if any(digest is None for digest in upstream_hashes.values()):
+            return None
+        return hash_module_inputs(module.code, module.config, upstream_hashes=upstream_hashes)
+
+    def _bind_inputs(
+        self,
+        module_id: str,
+        modules: Dict[str, ModuleVersion]
+    ) -> Optional[Dict[str, Tuple[str, str]]]:
+        """Resolve a module's declared inputs to the outputs of its ancestors"""
+        inputs = declared_inputs(modules[module_id].config)
+        if inputs is None:
+            return None
+        producers = {
+            modules[k].module_id: declared_outputs(modules[k].config)
+            for k in self.graph.ancestors(module_id)
+        }
+        try:
+            return bind_inputs(inputs, producers)
+        except ValueError as e:
+            raise ValueError(f"Module {module_id}: {str(e)}") from e
+
+    def _get_reusable_results(
+        self,
+        order: List[str],
+        modules: Dict[str, ModuleVersion]
+    ) -> Dict[str, ModuleRunResult]:
+        """
+        Get the baseline results an incremental run can reuse.
+
+        A module is unchanged when its fingerprint (its cache key: code, config
+        and the output hashes of its ancestors) equals the input hash it
+        completed with in the baseline run, which requires its ancestors to be
+        unchanged too. Unchanged modules that a changed module depends on are
+        still scheduled, since their outputs are needed; they are normally
+        served from the module cache under the same key.
+        """
+        previous = self.baseline_run.module_runs or {}
+        unchanged: Dict[str, Dict[str, Any]] = {}
+        for module_id in order:
+            entry = previous.get(module_id) or {}
+            if entry.get("status") != RunStatus.COMPLETED.value or not entry.get("output_hash"):
+                continue
+            ancestors = self.graph.ancestors(module_id)
+            if not ancestors <= unchanged.keys():
+                continue
+            module = modules[module_id]
+            fingerprint = hash_module_inputs(
+                module.code,
+                module.config,
+                upstream_hashes={k: unchanged[k]["output_hash"] for k in ancestors}
+            )
+            if fingerprint == entry.get("input_hash"):
+                unchanged[module_id] = entry
+
+        needed = set()
+        for module_id in order:
+            if module_id not in unchanged:
+                needed |= self.graph.ancestors(module_id)
+
+        now = datetime.utcnow()
+        return {
+            module_id: ModuleRunResult(
+                module_id=modules[module_id].module_id,
+                version=modules[module_id].version,
+                status=RunStatus.COMPLETED,
+                started_at=now,
+                completed_at=now,
+                input_hash=entry["input_hash"],
+                output_hash=entry["output_hash"],
+                stored_output=entry.get("output"),
+                # The run that actually executed the module
+                metrics={"reused_from": (entry.get("metrics") or {}).get("reused_from") or self.baseline_run.run_id}
+            )
+            for module_id, entry in unchanged.items()
+            if module_id not in needed
+        }
+
+    def _resolve_modules(self, order: List[str]) -> Dict[str, ModuleVersion]:
+        return {module_id: self._resolve_module(module_id) for module_id in order}
+
+    def _resolve_module(self, module_id: str) -> ModuleVersion:
+        """Get the ModuleVersion configured for a module in the canvas"""
+        module_config = self.canvas.module_config[module_id]
+        module_version = module_config.get("version")
+        if isinstance(module_version, ModuleVersion) or self.db is None:
+            return module_version
+
+        db_version = ModuleCRUD.get_version(
+            self.db,
+            module_id=module_config.get("module_id", module_id),
+            version=module_version
+        )
+        if db_version is None:
+            raise ValueError(f"Module version {module_version} of {module_id} not found")
+        return db_version
     
     def _get_execution_order(self) -> List[str]:
-        """Get the execution order of modules"""
-        modules = list(self.canvas.module_config.items())
-        modules.sort(key=lambda x: x[1].get("execution_order", 0))
-        return [m[0] for m in modules] 
\ No newline at end of file
+        """Get a sequential execution order of modules consistent with the graph"""
+        return self.graph.topological_order()
@@ -0,0 +1,286 @@
+"""
+Stable content hashing for module inputs and outputs.
+
+Unlike ``hash()`` the digests here are identical across processes and hosts, so
+they can key caches shared by several workers. Values are streamed into a
+blake2b hasher: numpy arrays and numeric pandas columns are fed through their
+memory buffers instead of being converted to strings. Other objects are hashed
+through the state they pickle with, walked like any other value; values
+without one (locks, open files, connections) raise ``UnhashableValueError``,
+and what depends on them isn't cached.
+"""
+from typing import Any, Dict, Iterable, Optional
+import copyreg
+import hashlib
+import inspect
+import struct
+from types import CodeType
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an install requirement
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is an install requirement
+    pd = None
+
+DIGEST_SIZE = 32
+
+# Rows per chunk when a non-contiguous array has to be copied to be hashed
+_ARRAY_CHUNK_ROWS = 65536
+
+class UnhashableValueError(TypeError):
+    """Raised for values that can't be hashed by content"""
+    pass
+
+class ContentHasher:
+    """Incremental blake2b hasher over Python, numpy and pandas values"""
+
+    def __init__(self):
+        self._hash = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        self._active: set = set()
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def update(self, obj: Any) -> "ContentHasher":
+        """Feed a value into the hash"""
+        if obj is None:
+            self._tag(b"N")
+        elif obj is True or obj is False:
+            self._tag(b"T" if obj else b"F")
+        elif isinstance(obj, int):
+            self._tag(b"i")
+            self._bytes(str(obj).encode())
+        elif isinstance(obj, float):
+            self._tag(b"f")
+            self._hash.update(struct.pack("<d", obj))
+        elif isinstance(obj, str):
+            self._tag(b"s")
+            self._bytes(obj.encode("utf-8", "surrogatepass"))
+        elif isinstance(obj, (bytes, bytearray, memoryview)):
+            self._tag(b"b")
+            self._bytes(obj)
+        elif np is not None and isinstance(obj, np.ndarray):
+            self._update_array(obj)
+        elif np is not None and isinstance(obj, np.generic):
+            self._tag(b"g")
+            self._bytes(obj.dtype.str.encode())
+            self._bytes(obj.tobytes())
+        elif pd is not None and isinstance(obj, pd.DataFrame):
+            self._update_frame(obj)
+        elif pd is not None and isinstance(obj, pd.Series):
+            self._update_series(obj)
+        elif pd is not None and isinstance(obj, pd.Index):
+            self._update_index(obj)
+        elif isinstance(obj, (list, tuple, dict, set, frozenset)):
+            self._update_container(obj)
+        else:
+            self._update_object(obj)
+        return self
+
+    def _tag(self, tag: bytes):
+        self._hash.update(tag)
+
+    def _bytes(self, data):
+        """Length-prefix a buffer so adjacent values can't run together"""
+        view = memoryview(data)
+        self._hash.update(struct.pack("<Q", view.nbytes))
+        self._hash.update(view)
+
+    def _update_container(self, obj):
+        if id(obj) in self._active:
+            # Self-referencing container
+            self._tag(b"R")
+            return
+        self._active.add(id(obj))
+        try:
+            if isinstance(obj, dict):
+                self._tag(b"d")
+                self._hash.update(struct.pack("<Q", len(obj)))
+                if all(isinstance(k, str) for k in obj):
+                    for key in sorted(obj):
+                        self.update(key)
+                        self.update(obj[key])
+                else:
+                    self._update_unordered((k, v) for k, v in obj.items())
+            elif isinstance(obj, (set, frozenset)):
+                self._tag(b"e")
+                self._hash.update(struct.pack("<Q", len(obj)))
+                self._update_unordered(obj)
+            else:
+                self._tag(b"l" if isinstance(obj, list) else b"t")
+                self._hash.update(struct.pack("<Q", len(obj)))
+                for item in obj:
+                    self.update(item)
+        finally:
+            self._active.discard(id(obj))
+
+    def _update_unordered(self, items: Iterable):
+        """Hash items independently of iteration order"""
+        digests = sorted(hash_value(item) for item in items)
+        for digest in digests:
+            self._hash.update(bytes.fromhex(digest))
+
+    def _update_array(self, arr):
+        self._tag(b"a")
+        self._bytes(arr.dtype.str.encode())
+        self._bytes(repr(arr.shape).encode())
+
+        # dtype and shape fix the byte length, so the raw buffer follows as is
+        if arr.dtype.hasobject:
+            for item in arr.flat:
+                self.update(item)
+        elif arr.flags.c_contiguous:
+            self._hash.update(arr.reshape(-1).view(np.uint8))
+        else:
+            # Copy bounded slices in C order rather than the whole array
+            for start in range(0, arr.shape[0], _ARRAY_CHUNK_ROWS):
+                chunk = np.ascontiguousarray(arr[start:start + _ARRAY_CHUNK_ROWS])
+                self._hash.update(chunk.reshape(-1).view(np.uint8))
+
+    def _update_values(self, values):
+        """Hash the values of a pandas column or index"""
+        if isinstance(values, np.ndarray) and not values.dtype.hasobject:
+            self._update_array(values)
+        else:
+            # Object and extension dtypes: pandas' own stable per-row hashes,
+            # or item by item for values it can't hash (lists, dicts)
+            try:
+                hashes = pd.util.hash_array(values)
+            except TypeError:
+                self._tag(b"H")
+                self._hash.update(struct.pack("<Q", len(values)))
+                for item in values:
+                    self.update(item)
+                return
+            self._tag(b"h")
+            self._update_array(hashes)
+
+    def _pandas_values(self, obj):
+        """Get the values of a Series or Index without copying numpy data"""
+        if isinstance(obj.dtype, np.dtype):
+            return obj.to_numpy(copy=False)
+        return obj.array
+
+    def _update_index(self, index):
+        self._tag(b"I")
+        self.update(index.name)
+        if isinstance(index, pd.RangeIndex):
+            self._tag(b"r")
+            self.update((index.start, index.stop, index.step))
+        elif isinstance(index, pd.MultiIndex):
+            self._tag(b"m")
+            self.update(list(index.names))
+            for level in range(index.nlevels):
+                self._update_index(index.get_level_values(level))
+        else:
+            self._bytes(str(index.dtype).encode())
+            self._update_values(self._pandas_values(index))
+
+    def _update_series(self, series):
+        self._tag(b"S")
+        self.update(series.name)
+        self._bytes(str(series.dtype).encode())
+        self._update_index(series.index)
+        self._update_values(self._pandas_values(series))
+
+    def _update_frame(self, frame):
+        self._tag(b"D")
+        self._update_index(frame.columns)
+        self._update_index(frame.index)
+        for position in range(frame.shape[1]):
+            column = frame.iloc[:, position]
+            self._bytes(str(column.dtype).encode())
+            self._update_values(self._pandas_values(column))
+
+    def _update_object(self, obj):
+        if inspect.ismodule(obj):
+            self._tag(b"M")
+            self.update(obj.__name__)
+            return
+        if inspect.isclass(obj):
+            self._tag(b"C")
+            self.update(f"{obj.__module__}.{obj.__qualname__}")
+            return
+        if inspect.isfunction(obj):
+            self._tag(b"L")
+            self.update(obj.__qualname__)
+            self._update_object(obj.__code__)
+            return
+        if isinstance(obj, CodeType):
+            self._tag(b"K")
+            self._bytes(obj.co_code)
+            self.update(obj.co_consts)
+            self.update(obj.co_names)
+            return
+
+        if inspect.isroutine(obj):
+            # Builtins and methods of extension types
+            self._tag(b"B")
+            self._update_name(obj)
+            return
+
+        if id(obj) in self._active:
+            self._tag(b"R")
+            return
+        try:
+            # Reduced like pickle would, registered reducers first
+            reducer = copyreg.dispatch_table.get(type(obj))
+            reduced = reducer(obj) if reducer is not None else obj.__reduce_ex__(5)
+        except Exception as e:
+            raise UnhashableValueError(
+                f"Can't hash a {type(obj).__module__}.{type(obj).__qualname__} by content: {str(e)}"
+            ) from e
+        self._active.add(id(obj))
+        try:
+            self._tag(b"o")
+            self.update(f"{type(obj).__module__}.{type(obj).__qualname__}")
+            if isinstance(reduced, str):
+                # A global, pickled by name
+                self.update(reduced)
+                return
+            # (callable, args[, state[, list items[, dict items]]]), hashed
+            # like any other value so nested sets and dicts stay order-free
+            callable_, args, *rest = reduced
+            self._update_name(callable_)
+            self.update(args)
+            state, items, dict_items = (list(rest) + [None, None, None])[:3]
+            self.update(state)
+            self.update(list(items) if items is not None else None)
+            self.update(dict(dict_items) if dict_items is not None else None)
+        finally:
+            self._active.discard(id(obj))
+
+    def _update_name(self, obj):
+        """Hash a class or function by its qualified name"""
+        self.update(f"{getattr(obj, '__module__', None)}.{getattr(obj, '__qualname__', getattr(obj, '__name__', ''))}")
+
+def hash_value(obj: Any) -> str:
+    """Get the stable content hash of a value; raises ``UnhashableValueError``"""
+    return ContentHasher().update(obj).hexdigest()
+
+def hash_module_inputs(
+    code: str,
+    config: Optional[Dict[str, Any]],
+    previous_results: Optional[Dict[str, Any]] = None,
+    upstream_hashes: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Get the cache key of a module execution.
+
+    Mixes the module code and version config with either the upstream output
+    hashes (cheap, preferred when known) or the upstream results themselves.
+    """
+    hasher = ContentHasher()
+    hasher.update(code)
+    hasher.update(config or {})
+    if upstream_hashes is not None:
+        hasher.update(b"upstream")
+        hasher.update(upstream_hashes)
+    else:
+        hasher.update(b"previous_results")
+        hasher.update(previous_results or {})
+    return hasher.hexdigest()
@@ -0,0 +1,251 @@
+"""
+Per-module resource limits and usage accounting.
+
+Limits come from the ``limits`` of a module version's config, falling back to
+the MODULE_* settings (0 = unlimited)::
+
+    {"limits": {"timeout_seconds": 600, "cpu_seconds": 300, "max_rss_mb": 4096, "max_threads": 4}}
+
+They are enforced by ``ResourceMonitor`` around the module's execution, which
+must happen on the main thread of a process of its own (the process backend):
+
+- the wall-clock timeout with ``SIGALRM``;
+- CPU time by lowering the soft ``RLIMIT_CPU`` of the (reused) worker to what
+  it has used so far plus the budget, which raises ``SIGXCPU``;
+- resident memory and threads by a watchdog thread sampling ``/proc``, which
+  interrupts the module with ``SIGUSR1``. Native thread pools (BLAS, OpenMP)
+  are also capped with threadpoolctl when it is installed.
+
+The monitor also measures what the module used: CPU seconds, peak RSS and
+bytes read from and written to storage.
+"""
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional
+import math
+import os
+import resource
+import signal
+import threading
+import time
+
+from backend.core.config import get_settings
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+class ResourceLimitExceeded(BaseException):
+    """
+    Raised inside a module that exceeded a limit. Not an Exception, so module
+    code catching Exception can't swallow it.
+    """
+
+    def __init__(self, limit: str, message: str):
+        super().__init__(message)
+        self.limit = limit
+
+@dataclass
+class ResourceLimits:
+    """Limits of one module execution; None = unlimited"""
+    timeout_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    max_rss_mb: Optional[float] = None
+    max_threads: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ResourceLimits":
+        settings = get_settings()
+        limits = (config or {}).get("limits") or {}
+
+        def limit(name: str, default: float) -> Optional[float]:
+            value = limits.get(name, default)
+            return value if value and value > 0 else None
+
+        return cls(
+            timeout_seconds=limit("timeout_seconds", settings.MODULE_TIMEOUT_SECONDS),
+            cpu_seconds=limit("cpu_seconds", settings.MODULE_CPU_SECONDS),
+            max_rss_mb=limit("max_rss_mb", settings.MODULE_MAX_RSS_MB),
+            max_threads=limit("max_threads", settings.MODULE_MAX_THREADS)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+def _read_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _count_threads() -> Optional[int]:
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return None
+
+def _read_io() -> Dict[str, int]:
+    """Bytes read from and written to storage by the process so far"""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f.read().splitlines() if ":" in line)
+        return {"read": int(fields["read_bytes"]), "write": int(fields["write_bytes"])}
+    except (OSError, KeyError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {"read": usage.ru_inblock * 512, "write": usage.ru_oublock * 512}
+
+def _cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+class ResourceMonitor:
+    """
+    Enforces ``ResourceLimits`` and measures usage between ``start`` and
+    ``stop``. Limits are only enforced on the main thread, where signals are
+    delivered; elsewhere (the thread backend) only the thread's CPU time is
+    measured.
+    """
+
+    def __init__(self, limits: ResourceLimits, poll_interval: float = 0.05):
+        self.limits = limits
+        self.poll_interval = poll_interval
+        self.enforced = threading.current_thread() is threading.main_thread()
+        self._exceeded: Optional[ResourceLimitExceeded] = None
+        self._disarmed = False
+        self._stopped = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._previous_handlers: Dict[int, Any] = {}
+        self._previous_cpu_limit = None
+        self._thread_limits = None
+        self._peak_rss = 0
+
+    def start(self):
+        self._started = time.monotonic()
+        if not self.enforced:
+            self._cpu_start = time.thread_time()
+            return
+        self._cpu_start = _cpu_time()
+        self._io_start = _read_io()
+        self._maxrss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self._peak_rss = _read_rss() or 0
+
+        limits = self.limits
+        if limits.timeout_seconds:
+            self._handle(signal.SIGALRM, ResourceLimitExceeded(
+                "timeout_seconds", f"Module exceeded its {limits.timeout_seconds}s timeout"
+            ))
+            signal.setitimer(signal.ITIMER_REAL, limits.timeout_seconds)
+        if limits.cpu_seconds:
+            self._handle(signal.SIGXCPU, ResourceLimitExceeded(
+                "cpu_seconds", f"Module exceeded its {limits.cpu_seconds}s of CPU time"
+            ))
+            soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            self._previous_cpu_limit = (soft, hard)
+            budget = math.ceil(self._cpu_start + limits.cpu_seconds)
+            if hard != resource.RLIM_INFINITY:
+                budget = min(budget, hard)
+            resource.setrlimit(resource.RLIMIT_CPU, (budget, hard))
+        if limits.max_threads and threadpool_limits is not None:
+            self._thread_limits = threadpool_limits(limits=int(limits.max_threads))
+        # The watchdog samples peak RSS even without limits
+        self._handle(signal.SIGUSR1, None)
+        self._baseline_threads = (_count_threads() or 0) + 1
+        self._watchdog = threading.Thread(target=self._watch, name="module-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """
+        Disarm every limit. Signals arriving from here on are ignored; if one
+        interrupted the call before that, call it again.
+        """
+        if not self.enforced or self._disarmed:
+            return
+        self._disarmed = True
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+        if self.limits.timeout_seconds:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if self._previous_cpu_limit is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, self._previous_cpu_limit)
+        if self._thread_limits is not None:
+            self._thread_limits.restore_original_limits()
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+
+    def usage(self) -> Dict[str, Any]:
+        """Resources used between ``start`` and ``stop``"""
+        usage: Dict[str, Any] = {"wall_seconds": round(time.monotonic() - self._started, 6)}
+        if not self.enforced:
+            usage["cpu_seconds"] = round(time.thread_time() - self._cpu_start, 6)
+            return usage
+
+        usage["cpu_seconds"] = round(_cpu_time() - self._cpu_start, 6)
+        # ru_maxrss (KB) is exact, but only tells about this module if it grew
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = max(self._peak_rss, maxrss * 1024 if maxrss > self._maxrss_start else 0)
+        usage["peak_rss_mb"] = round(peak / 1024 ** 2, 3)
+        io = _read_io()
+        usage["io_read_bytes"] = io["read"] - self._io_start["read"]
+        usage["io_write_bytes"] = io["write"] - self._io_start["write"]
+        return usage
+
+    def _handle(self, signum: int, exceeded: Optional[ResourceLimitExceeded]):
+        def handler(signum, frame):
+            # A stray signal (SIGUSR1 the watchdog didn't send) has nothing to raise
+            if not self._disarmed and (exceeded or self._exceeded) is not None:
+                raise exceeded or self._exceeded
+        self._previous_handlers[signum] = signal.signal(signum, handler)
+
+    def _watch(self):
+        limits = self.limits
+        while not self._stopped.wait(self.poll_interval):
+            rss = _read_rss()
+            if rss is not None:
+                self._peak_rss = max(self._peak_rss, rss)
+                if limits.max_rss_mb and rss > limits.max_rss_mb * 1024 ** 2:
+                    self._interrupt(ResourceLimitExceeded(
+                        "max_rss_mb", f"Module exceeded its {limits.max_rss_mb} MB memory limit"
+                    ))
+                    return
+            if limits.max_threads:
+                threads = _count_threads()
+                if threads is not None and threads - self._baseline_threads > limits.max_threads:
+                    self._interrupt(ResourceLimitExceeded(
+                        "max_threads", f"Module started more than {limits.max_threads} threads"
+                    ))
+                    return
+
+    def _interrupt(self, exceeded: ResourceLimitExceeded):
+        self._exceeded = exceeded
+        signal.pthread_kill(threading.main_thread().ident, signal.SIGUSR1)
+
+def run_with_limits(limits: ResourceLimits, function: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    """
+    Call ``function`` (``run_module_code``) under ``limits`` and add what it
+    used to its outcome as ``usage``. A module stopped by a limit fails with
+    the limit named in its error.
+    """
+    monitor = ResourceMonitor(limits)
+    try:
+        try:
+            monitor.start()
+            outcome = function(*args)
+        finally:
+            monitor.stop()
+    except ResourceLimitExceeded as e:
+        monitor.stop()
+        outcome = {
+            "output": {},
+            "cache_data": {},
+            "shared_vars": {},
+            "error": {"error": str(e), "limit": e.limit}
+        }
+    outcome["usage"] = monitor.usage()
+    return outcome
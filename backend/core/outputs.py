@@ -0,0 +1,122 @@
+"""
+Output policy: which parts of a module's output are kept with the run.
+
+A module's output (its namespace) stays in memory for the modules downstream
+of it, but only a small, JSON-able form of it is stored on the run:
+
+- JSON-able values (scalars and small containers of them) up to
+  ``inline_max_bytes`` are stored inline;
+- larger declared outputs are spilled to the module cache and stored as a
+  reference to the cache entry;
+- anything else (undeclared frames, models, imported modules) is dropped.
+
+Every value's estimated size and where it went are reported, per module and
+for the run as a whole, in the run metrics.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import inspect
+import math
+
+from backend.core.cache.sizing import estimate_size
+from backend.core.config import get_settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an install requirement
+    np = None
+
+logger = logging.getLogger(__name__)
+
+INLINE = "inline"
+CACHE = "cache"
+DROPPED = "dropped"
+
+class _NotInline:
+    pass
+
+_NOT_INLINE = _NotInline()
+
+def _inline_value(value: Any, depth: int = 0) -> Any:
+    """Get the JSON form of a value if it has one, else ``_NOT_INLINE``"""
+    if np is not None and isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        # NaN and infinities aren't valid JSON
+        return value if math.isfinite(value) else None
+    if depth >= 4:
+        return _NOT_INLINE
+    if isinstance(value, (list, tuple)):
+        items = [_inline_value(item, depth + 1) for item in value]
+        return _NOT_INLINE if any(item is _NOT_INLINE for item in items) else items
+    if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        items = {k: _inline_value(v, depth + 1) for k, v in value.items()}
+        return _NOT_INLINE if any(v is _NOT_INLINE for v in items.values()) else items
+    return _NOT_INLINE
+
+def spill_key(input_hash: str, name: str) -> str:
+    """Get the cache key a declared output is spilled under, next to its module's entry"""
+    return f"{input_hash}:{name}"
+
+class OutputPolicy:
+    """Decides how each value of a module's output is stored (see the module docstring)"""
+
+    def __init__(self, cache_manager: Any, inline_max_bytes: Optional[int] = None):
+        self.cache_manager = cache_manager
+        self.inline_max_bytes = (
+            inline_max_bytes if inline_max_bytes is not None else get_settings().OUTPUT_INLINE_MAX_BYTES
+        )
+
+    def apply(
+        self,
+        module_id: str,
+        input_hash: Optional[str],
+        output: Dict[str, Any],
+        declared: List[str],
+        spill: bool = True
+    ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Get the stored form of ``output`` and the accounting of its values
+        (``{name: {"bytes": ..., "stored": ...}}``). Only ``declared`` outputs
+        are kept when the module declares any. Without ``spill`` (a cache hit)
+        large declared outputs are only spilled again if their entries were
+        evicted since; without an ``input_hash`` (a module that isn't cached)
+        they are dropped.
+        """
+        if declared:
+            names = declared
+        else:
+            names = [
+                name for name, value in output.items()
+                if not (inspect.ismodule(value) or inspect.isroutine(value) or inspect.isclass(value))
+            ]
+
+        stored: Dict[str, Any] = {}
+        accounting: Dict[str, Dict[str, Any]] = {}
+        for name in names:
+            value = output[name]
+            size = estimate_size(value)
+            inline = _inline_value(value) if size <= self.inline_max_bytes else _NOT_INLINE
+            if inline is not _NOT_INLINE:
+                stored[name] = inline
+                where = INLINE
+            elif declared and input_hash is not None:
+                key = spill_key(input_hash, name)
+                if spill or not self.cache_manager.contains(module_id, key):
+                    self.cache_manager.set(module_id, key, {"value": value})
+                stored[name] = {"$cache": {"module_id": module_id, "key": key}, "type": type(value).__name__}
+                where = CACHE
+            else:
+                where = DROPPED
+            accounting[name] = {"bytes": size, "stored": where}
+        return stored, accounting
+
+def summarize_outputs(accounting: Dict[str, Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Total the per-value accounting of several modules (``{module_id: accounting}``) by storage"""
+    totals = {f"{where}_bytes": 0 for where in (INLINE, CACHE, DROPPED)}
+    for values in accounting.values():
+        for entry in values.values():
+            totals[f"{entry['stored']}_bytes"] += entry["bytes"]
+    return {**totals, "modules": accounting}
@@ -0,0 +1,133 @@
+import logging
+from typing import Dict, Any, Callable, Optional, Tuple
+import asyncio
+import threading
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.crud.run import RunCRUD
+from backend.schemas.run import ModuleRunResult
+
+logger = logging.getLogger(__name__)
+
+class RunResultWriter:
+    """
+    Buffers module run result transitions and persists them in batches.
+
+    Each ``record`` replaces the pending state of its ``(run_id, module_id)``,
+    so a module that starts and finishes between two flushes costs a single
+    row write. Pending rows are written by ``RunCRUD.write_module_results`` in
+    one transaction every ``flush_interval`` seconds, as soon as
+    ``max_pending`` rows are waiting, and when the writer is closed.
+
+    Flushes never overlap: two of them could both insert the row of a module
+    seen for the first time.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None
+    ):
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval if flush_interval is not None else settings.RUN_RESULTS_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.RUN_RESULTS_MAX_PENDING
+
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+
+        self.flushes = 0
+        self.rows_written = 0
+
+    def record(self, run_id: str, result: ModuleRunResult):
+        """Queue the current state of a module run"""
+        metrics = dict(result.metrics or {})
+        if result.execution_time is not None:
+            metrics["execution_time"] = result.execution_time
+        row = {
+            "run_id": run_id,
+            "module_id": result.module_id,
+            "status": getattr(result.status, "value", result.status),
+            "started_at": result.started_at,
+            "completed_at": result.completed_at,
+            "input_hash": result.input_hash,
+            "output_hash": result.output_hash,
+            "metrics": metrics,
+            "error": result.error or {},
+            "cache_location": result.cache_location
+        }
+        with self._lock:
+            self._pending[(run_id, result.module_id)] = row
+            pending = len(self._pending)
+        if pending >= self.max_pending and self._wake is not None:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write every pending row and return how many were written"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        db = self.session_factory()
+        try:
+            written = RunCRUD.write_module_results(db, rows=list(batch.values()))
+        finally:
+            db.close()
+
+        if not written:
+            # Keep the rows for the next flush unless a newer state was recorded
+            with self._lock:
+                for key, row in batch.items():
+                    self._pending.setdefault(key, row)
+            return 0
+
+        self.flushes += 1
+        self.rows_written += len(batch)
+        return len(batch)
+
+    async def start(self):
+        """Start flushing in the background on the running event loop"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._closing = False
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        """Stop the background flushes and write what is still pending"""
+        if self._task is not None:
+            # Let a flush in progress finish rather than cancelling the task:
+            # its thread would keep writing alongside the final flush
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._wake = None
+        await self._flush()
+
+    async def _flush(self) -> int:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            return await asyncio.to_thread(self.flush)
+
+    async def _flush_periodically(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closing:
+                return
+            try:
+                await self._flush()
+            except Exception as e:
+                logger.error(f"Error flushing module run results: {str(e)}")
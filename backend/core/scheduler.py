@@ -0,0 +1,332 @@
+"""
+Canvas run scheduler.
+
+Acts on ``Canvas.schedule_config``, e.g.::
+
+    {"frequency": "daily", "start_time": "02:00", "active": true}
+
+``frequency`` is one of daily, 2_days, weekly or monthly; weekly and monthly
+schedules (and the every-other-day rhythm of 2_days) are anchored on
+``start_date`` (YYYY-MM-DD), defaulting to the day the canvas was created.
+Times are UTC, like every timestamp in the database. Optional keys override
+the SCHEDULER_* settings per canvas: ``jitter_seconds``, ``misfire_policy``,
+``misfire_grace_seconds``, ``max_catch_up``, plus ``skip_if_running``
+(default true) and the run queue ``priority``.
+
+The ``CanvasScheduler`` keeps the next fire of every scheduled canvas in a
+heap and sleeps until the earliest one, so it reads the canvases table once
+at start and afterwards only the canvases changed since its last refresh.
+Fires are claimed in ``canvas_schedule_state`` before dispatch, so several
+schedulers can run side by side without firing twice.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+import asyncio
+import calendar
+import hashlib
+import heapq
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.crud.run import RunCRUD
+from backend.crud.run_job import RunJobCRUD
+from backend.crud.schedule import ScheduleCRUD
+from backend.models.database import Canvas, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Days between fires; monthly schedules fire on the anchor's day of the month
+FREQUENCY_DAYS = {"daily": 1, "2_days": 2, "weekly": 7}
+FREQUENCIES = tuple(FREQUENCY_DAYS) + ("monthly",)
+
+# What to do with fires missed by more than the grace period (scheduler down)
+MISFIRE_POLICIES = (
+    "skip",      # Drop them, wait for the next fire
+    "run_once",  # Start one run for all of them
+    "catch_up"   # Start a run for each of them, up to max_catch_up
+)
+
+class Schedule:
+    """A parsed ``Canvas.schedule_config``"""
+
+    def __init__(
+        self,
+        frequency: str,
+        start_time: time,
+        anchor: date,
+        jitter_seconds: int = 0,
+        misfire_policy: str = "run_once",
+        misfire_grace_seconds: float = 300,
+        max_catch_up: int = 10,
+        skip_if_running: bool = True,
+        priority: int = 0
+    ):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown schedule frequency: {frequency}")
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy: {misfire_policy}")
+        self.frequency = frequency
+        self.start_time = start_time
+        self.anchor = anchor
+        self.jitter_seconds = max(0, int(jitter_seconds))
+        self.misfire_policy = misfire_policy
+        self.misfire_grace_seconds = misfire_grace_seconds
+        self.max_catch_up = max(1, int(max_catch_up))
+        self.skip_if_running = skip_if_running
+        self.priority = priority
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], anchor: date) -> Optional["Schedule"]:
+        """Parse a schedule_config; None when there is no active schedule"""
+        if not config or not config.get("frequency") or not config.get("active", True):
+            return None
+        settings = get_settings()
+        try:
+            start_time = time.fromisoformat(config.get("start_time") or "00:00")
+            if config.get("start_date"):
+                anchor = date.fromisoformat(config["start_date"])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid schedule time: {str(e)}") from e
+        return cls(
+            frequency=config["frequency"],
+            start_time=start_time,
+            anchor=anchor,
+            jitter_seconds=config.get("jitter_seconds", settings.SCHEDULER_JITTER_SECONDS),
+            misfire_policy=config.get("misfire_policy", settings.SCHEDULER_MISFIRE_POLICY),
+            misfire_grace_seconds=config.get("misfire_grace_seconds", settings.SCHEDULER_MISFIRE_GRACE_SECONDS),
+            max_catch_up=config.get("max_catch_up", settings.SCHEDULER_MAX_CATCH_UP),
+            skip_if_running=config.get("skip_if_running", True),
+            priority=config.get("priority", 0)
+        )
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Get the first fire strictly after ``moment``"""
+        first = datetime.combine(self.anchor, self.start_time)
+        if moment < first:
+            return first
+
+        if self.frequency == "monthly":
+            year, month = moment.year, moment.month
+            while True:
+                day = min(self.anchor.day, calendar.monthrange(year, month)[1])
+                candidate = datetime.combine(date(year, month, day), self.start_time)
+                if candidate > moment:
+                    return candidate
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        period = timedelta(days=FREQUENCY_DAYS[self.frequency])
+        return first + ((moment - first) // period + 1) * period
+
+    def fires_between(self, start: datetime, end: datetime, limit: int) -> List[datetime]:
+        """Get the last ``limit`` fires in ``[start, end]``, oldest first"""
+        fires: List[datetime] = []
+        fire = start if start == self.next_after(start - timedelta(microseconds=1)) else self.next_after(start)
+        while fire <= end:
+            fires.append(fire)
+            if len(fires) > limit:
+                fires.pop(0)
+            fire = self.next_after(fire)
+        return fires
+
+def jitter_offset(canvas_id: str, jitter_seconds: int) -> timedelta:
+    """
+    Stable per-canvas delay in ``[0, jitter_seconds]`` so canvases sharing a
+    start time don't all start at once. It is derived from the canvas id, so
+    every scheduler process dispatches a canvas at the same moment.
+    """
+    if jitter_seconds <= 0:
+        return timedelta(0)
+    digest = hashlib.sha1(canvas_id.encode("utf-8")).digest()
+    return timedelta(seconds=int.from_bytes(digest[:8], "big") % (jitter_seconds + 1))
+
+class CanvasScheduler:
+    """
+    Creates and queues the runs of scheduled canvases when they are due.
+
+    When a fire is dispatched more than its grace period late, the missed
+    fires are handled by the schedule's misfire policy. With
+    ``skip_if_running`` a fire is skipped while the canvas' latest run is
+    still queued or running.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        refresh_interval: Optional[float] = None
+    ):
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.refresh_interval = refresh_interval or settings.SCHEDULER_REFRESH_SECONDS
+        self.max_attempts = settings.RUN_JOB_MAX_ATTEMPTS
+
+        # (due, sequence, canvas_id, nominal fire, version); entries whose
+        # version is no longer current are skipped when popped
+        self._heap: List[Tuple[datetime, int, str, datetime, int]] = []
+        self._sequence = 0
+        self._schedules: Dict[str, Tuple[int, Tuple[bool, Dict[str, Any]], Optional[Schedule], Optional[int]]] = {}
+        self._watermark: Optional[datetime] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+        self.dispatched = 0
+        self.skipped = 0
+
+    async def run(self):
+        """Dispatch due fires until ``stop`` is called"""
+        self._stopping = asyncio.Event()
+        await asyncio.to_thread(self.refresh)
+        logger.info(f"Scheduler started with {len(self._schedules)} scheduled canvases")
+        next_refresh = asyncio.get_running_loop().time() + self.refresh_interval
+
+        while not self._stopping.is_set():
+            for canvas_id, fires, schedule, account_id in self.pop_due(datetime.utcnow()):
+                await asyncio.to_thread(self.dispatch, canvas_id, fires, schedule, account_id)
+
+            loop_time = asyncio.get_running_loop().time()
+            if loop_time >= next_refresh:
+                await asyncio.to_thread(self.refresh)
+                next_refresh = loop_time + self.refresh_interval
+
+            timeout = next_refresh - loop_time
+            if self._heap:
+                until_due = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                timeout = min(timeout, until_due)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Scheduler stopped")
+
+    def stop(self):
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def refresh(self):
+        """Load the canvases changed since the last refresh (all of them the first time)"""
+        db = self.session_factory()
+        try:
+            initial = self._watermark is None
+            canvases = ScheduleCRUD.get_canvases(db, updated_since=self._watermark)
+            last_fires = ScheduleCRUD.get_last_fires(db) if initial else {}
+        finally:
+            db.close()
+
+        for canvas in canvases:
+            if canvas.updated_at and (self._watermark is None or canvas.updated_at > self._watermark):
+                self._watermark = canvas.updated_at
+            self.update_canvas(canvas, last_fires.get(canvas.canvas_id) if initial else None)
+        if self._watermark is None:
+            # Nothing to watch yet; later refreshes only need what changes from now
+            self._watermark = datetime.utcnow()
+
+    def update_canvas(self, canvas: Canvas, last_fire: Optional[datetime] = None):
+        """
+        (Re)schedule a canvas after it was loaded or changed. With the
+        ``last_fire`` recorded before a restart, fires missed since are due
+        immediately.
+        """
+        config = canvas.schedule_config or {}
+        active = canvas.is_active is not False
+        current = self._schedules.get(canvas.canvas_id)
+        if current is not None and current[1] == (active, config):
+            return
+
+        version = (current[0] + 1) if current is not None else 0
+        schedule = None
+        if active:
+            anchor = (canvas.created_at or datetime.utcnow()).date()
+            try:
+                schedule = Schedule.from_config(config, anchor)
+            except ValueError as e:
+                logger.warning(f"Ignoring the schedule of canvas {canvas.canvas_id}: {str(e)}")
+        # Any heap entry left behind is stale now
+        self._schedules[canvas.canvas_id] = (version, (active, dict(config)), schedule, canvas.account_id)
+        if schedule is None:
+            return
+        fire = schedule.next_after(last_fire or datetime.utcnow())
+        self._push(canvas.canvas_id, fire, schedule, version)
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, List[datetime], Optional[Schedule], Optional[int]]]:
+        """
+        Pop every entry due at ``now`` and schedule its next fire. Returns
+        ``(canvas_id, fires to dispatch, schedule, account_id)``; an empty fire
+        list means the missed fires are skipped.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, _, canvas_id, fire, version = heapq.heappop(self._heap)
+            current = self._schedules.get(canvas_id)
+            if current is None or current[0] != version or current[2] is None:
+                continue
+            _, _, schedule, account_id = current
+
+            lateness = (now - due_at).total_seconds()
+            if lateness <= schedule.misfire_grace_seconds:
+                fires = [fire]
+                self._push(canvas_id, schedule.next_after(fire), schedule, version)
+            else:
+                missed = schedule.fires_between(fire, now, schedule.max_catch_up)
+                logger.warning(f"Canvas {canvas_id} missed {len(missed)} scheduled runs (since {fire.isoformat()})")
+                if schedule.misfire_policy == "catch_up":
+                    fires = missed
+                elif schedule.misfire_policy == "run_once":
+                    fires = missed[-1:]
+                else:
+                    fires = []
+                self._push(canvas_id, schedule.next_after(now), schedule, version)
+                if not fires:
+                    # Still claim the latest missed fire so no scheduler replays it
+                    fires = [missed[-1]] if missed else [fire]
+                    due.append((canvas_id, fires, None, account_id))
+                    continue
+            due.append((canvas_id, fires, schedule, account_id))
+        return due
+
+    def dispatch(self, canvas_id: str, fires: List[datetime], schedule: Optional[Schedule], account_id: Optional[int]):
+        """
+        Claim the latest of ``fires`` and create and queue a run for each of
+        them. Without a schedule the fires are only claimed (skipped misfires).
+        """
+        db = self.session_factory()
+        try:
+            canvas = ScheduleCRUD.get_canvas(db, canvas_id)
+            if canvas is None or canvas.is_active is False:
+                # Deleted or deactivated since the last refresh
+                self._schedules.pop(canvas_id, None)
+                return
+            if not ScheduleCRUD.claim_fire(db, canvas_id=canvas_id, fire_at=fires[-1]):
+                # Dispatched by another scheduler
+                return
+
+            if schedule is None:
+                self.skipped += 1
+                ScheduleCRUD.record_outcome(db, canvas_id=canvas_id, outcome="skipped_misfire")
+                return
+            if schedule.skip_if_running and ScheduleCRUD.has_unfinished_run(db, canvas_id):
+                logger.info(f"Skipping scheduled run of canvas {canvas_id}, its last run hasn't finished")
+                self.skipped += 1
+                ScheduleCRUD.record_outcome(db, canvas_id=canvas_id, outcome="skipped_running")
+                return
+
+            for fire in fires:
+                run = RunCRUD.create_run(db, canvas_id=canvas_id)
+                if run is None:
+                    continue
+                RunJobCRUD.enqueue(
+                    db,
+                    run_id=run.run_id,
+                    account_id=account_id,
+                    priority=schedule.priority,
+                    max_attempts=self.max_attempts
+                )
+                self.dispatched += 1
+                logger.info(f"Queued scheduled run {run.run_id} of canvas {canvas_id} (due {fire.isoformat()})")
+                ScheduleCRUD.record_outcome(db, canvas_id=canvas_id, outcome="queued", run_id=run.run_id)
+        finally:
+            db.close()
+
+    def _push(self, canvas_id: str, fire: datetime, schedule: Schedule, version: int):
+        self._sequence += 1
+        due = fire + jitter_offset(canvas_id, schedule.jitter_seconds)
+        heapq.heappush(self._heap, (due, self._sequence, canvas_id, fire, version))
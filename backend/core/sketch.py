@@ -0,0 +1,103 @@
+"""
+Streaming quantile sketch for latency statistics.
+
+``QuantileSketch`` is a DDSketch-style histogram over logarithmic buckets:
+every value lands in bucket ``ceil(log(value) / log(gamma))``, so a quantile
+read back from a bucket is within ``relative_accuracy`` of the true value no
+matter how many values were added. Sketches are small, mergeable and
+round-trip through JSON, which lets them live in a database column and be
+updated incrementally.
+"""
+from typing import Any, Dict, Optional
+import math
+
+class QuantileSketch:
+    """
+    Mergeable sketch of a stream of non-negative values.
+
+    Values at or below ``min_value`` are counted in a single zero bucket. When
+    more than ``max_buckets`` buckets are in use the lowest ones are collapsed
+    together, which only costs accuracy on the smallest values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048, min_value: float = 1e-6):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float, count: int = 1):
+        if value <= self.min_value:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += count
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Get the value at quantile ``q`` (0..1), or None if the sketch is empty"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key] in relative terms
+                return 2 * self.gamma ** key / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.buckets) / (1 + self.gamma)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "min_value": self.min_value,
+            "zero_count": self.zero_count,
+            "count": self.count,
+            # JSON object keys are strings
+            "buckets": {str(key): count for key, count in self.buckets.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "QuantileSketch":
+        """Rebuild a sketch from ``to_dict`` output; empty data gives an empty sketch"""
+        if not data:
+            return cls()
+        sketch = cls(
+            relative_accuracy=data.get("relative_accuracy", 0.01),
+            max_buckets=data.get("max_buckets", 2048),
+            min_value=data.get("min_value", 1e-6)
+        )
+        sketch.buckets = {int(key): count for key, count in data.get("buckets", {}).items()}
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.count = data.get("count", 0)
+        return sketch
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(key) for key in keys[:excess + 1])
+        self.buckets[keys[excess]] = merged
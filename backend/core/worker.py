@@ -0,0 +1,233 @@
+"""
+Run execution workers.
+
+``POST /runs/{run_id}/execute`` only queues the run (see
+``backend.crud.run_job``); a ``RunWorker`` claims queued runs and executes
+them, at most ``concurrency`` at a time. By default (RUN_WORKER_EMBEDDED) one
+runs inside the API process; deployments that scale execution separately set
+RUN_WORKER_EMBEDDED=false and start workers with ``scripts/run_worker.py``.
+"""
+import logging
+from typing import Callable, Dict, Optional, Tuple
+import asyncio
+import os
+import socket
+import traceback
+import uuid
+
+from sqlalchemy.orm import Session
+
+from backend.core.config import get_settings
+from backend.core.executor import CanvasExecutor
+from backend.crud.canvas import CanvasCRUD
+from backend.crud.run import RunCRUD
+from backend.crud.run_job import RunJobCRUD
+from backend.models.database import Canvas, CanvasRun, SessionLocal
+from backend.schemas.run import CanvasRunUpdate, RunStatus
+
+logger = logging.getLogger(__name__)
+
+def _start_run(db: Session, run_id: str) -> Tuple[Canvas, Optional[CanvasRun]]:
+    """Load a queued run's canvas and baseline run and mark the run running"""
+    run = RunCRUD.get_run(db, run_id)
+    if not run:
+        raise ValueError(f"Run {run_id} not found")
+    canvas = CanvasCRUD.get(db, canvas_id=run.canvas_id)
+    if not canvas:
+        raise ValueError(f"Canvas {run.canvas_id} not found")
+
+    baseline_run = None
+    if (run.cache_config or {}).get("incremental"):
+        baseline_run = RunCRUD.get_last_successful_run(db, run.canvas_id, exclude_run_id=run_id)
+        if baseline_run is None:
+            logger.info(f"No successful run of canvas {run.canvas_id} yet, executing run {run_id} in full")
+
+    RunCRUD.update_run_status(db, run_id=run_id, status=RunStatus.RUNNING.value)
+    # The commit expired them, reload here rather than lazily on the event loop
+    db.refresh(canvas)
+    if baseline_run is not None:
+        db.refresh(baseline_run)
+    return canvas, baseline_run
+
+def _store_outcome(db: Session, run_id: str, run_update: CanvasRunUpdate):
+    db_run = RunCRUD.get_by_run_id(db, run_id=run_id)
+    if db_run:
+        RunCRUD.update(db=db, db_obj=db_run, obj_in=run_update)
+
+async def execute_run(session_factory: Callable[[], Session], run_id: str):
+    """
+    Execute a queued canvas run and store its outcome on the run.
+
+    The session is only used from worker threads, one call at a time, so
+    database round trips don't block the event loop.
+    """
+    db = session_factory()
+    try:
+        canvas, baseline_run = await asyncio.to_thread(_start_run, db, run_id)
+        executor = CanvasExecutor(canvas, db=db, run_id=run_id, baseline_run=baseline_run)
+        # Left unset when cancelled, the run then belongs to whoever took it over
+        run_update = None
+        try:
+            results = await executor.execute()
+
+            final_status = RunStatus.COMPLETED
+            if any(r.status == RunStatus.FAILED for r in results.values()):
+                final_status = RunStatus.FAILED
+            run_update = CanvasRunUpdate(
+                status=final_status,
+                # Only the stored form of the outputs is kept with the run
+                module_runs={
+                    module_id: result.model_copy(update={"output": result.stored_output})
+                    for module_id, result in results.items()
+                },
+                metrics=executor.get_run_metrics(results)
+            )
+        except Exception as e:
+            run_update = CanvasRunUpdate(
+                status=RunStatus.FAILED,
+                error={"error": str(e)}
+            )
+            raise
+        finally:
+            if run_update:
+                await asyncio.to_thread(_store_outcome, db, run_id, run_update)
+    finally:
+        db.close()
+
+class RunWorker:
+    """
+    Claims queued runs and executes them on the running event loop.
+
+    Leases on the runs being executed are extended every
+    ``heartbeat_interval`` seconds. If a lease is lost (the worker was cut off
+    from the database for longer than the lease and another worker took the
+    run over) the execution is cancelled.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None
+    ):
+        settings = get_settings()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = max(1, concurrency or settings.RUN_WORKER_CONCURRENCY)
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval if poll_interval is not None else settings.RUN_WORKER_POLL_INTERVAL
+        self.lease_seconds = lease_seconds or settings.RUN_JOB_LEASE_SECONDS
+        self.heartbeat_interval = heartbeat_interval or settings.RUN_JOB_HEARTBEAT_SECONDS
+        self.account_max_running = settings.RUN_QUEUE_ACCOUNT_MAX_RUNNING
+
+        self._active: Dict[int, asyncio.Task] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def run(self):
+        """Claim and execute runs until ``stop`` is called, then wait for the active ones"""
+        self._stopping = asyncio.Event()
+        self._wake = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat_periodically())
+        logger.info(f"Run worker {self.worker_id} started with concurrency {self.concurrency}")
+        try:
+            while not self._stopping.is_set():
+                free = self.concurrency - len(self._active)
+                if free > 0:
+                    await asyncio.to_thread(self._with_session, RunJobCRUD.requeue_expired)
+                    jobs = await asyncio.to_thread(
+                        self._with_session,
+                        RunJobCRUD.claim,
+                        worker_id=self.worker_id,
+                        lease_seconds=self.lease_seconds,
+                        limit=free,
+                        account_max_running=self.account_max_running
+                    )
+                    for job in jobs:
+                        logger.info(f"Executing run {job.run_id} (attempt {job.attempts})")
+                        self._active[job.id] = asyncio.create_task(self._execute(job.id, job.run_id))
+
+                # Poll again when a slot frees up, on stop, or after poll_interval
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if self._active:
+                logger.info(f"Waiting for {len(self._active)} active runs to finish")
+                await asyncio.gather(*self._active.values(), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+            for task in self._active.values():
+                task.cancel()
+            logger.info(f"Run worker {self.worker_id} stopped")
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping is not None and self._stopping.is_set()
+
+    def stop(self):
+        """Stop claiming runs; ``run`` returns once the active runs have finished"""
+        if self._stopping is not None:
+            self._stopping.set()
+            self._wake.set()
+
+    async def _execute(self, job_id: int, run_id: str):
+        status, error = "completed", None
+        try:
+            await execute_run(self.session_factory, run_id)
+        except asyncio.CancelledError:
+            # Lease lost or worker killed; the job is left to the lease recovery
+            raise
+        except Exception as e:
+            logger.error(f"Error executing run {run_id}: {str(e)}")
+            status, error = "failed", {"error": str(e), "traceback": traceback.format_exc()}
+
+        try:
+            finished = await asyncio.to_thread(
+                self._with_session,
+                RunJobCRUD.finish,
+                job_id=job_id,
+                worker_id=self.worker_id,
+                status=status,
+                error=error
+            )
+            if not finished:
+                logger.warning(f"Lease on run {run_id} was lost before it finished")
+        finally:
+            self._active.pop(job_id, None)
+            self._wake.set()
+
+    async def _heartbeat_periodically(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._active:
+                continue
+            job_ids = list(self._active)
+            held = await asyncio.to_thread(
+                self._with_session,
+                RunJobCRUD.heartbeat,
+                worker_id=self.worker_id,
+                job_ids=job_ids,
+                lease_seconds=self.lease_seconds
+            )
+            if held is None:
+                # Database unreachable; try again, the lease may still hold
+                continue
+            for job_id in set(job_ids) - set(held):
+                task = self._active.get(job_id)
+                if task is not None and not task.done():
+                    logger.warning(f"Lost the lease on run job {job_id}, cancelling it")
+                    task.cancel()
+                    self._active.pop(job_id, None)
+            if len(held) < len(job_ids):
+                self._wake.set()
+
+    def _with_session(self, operation: Callable, **kwargs):
+        db = self.session_factory()
+        try:
+            return operation(db, **kwargs)
+        finally:
+            db.close()
@@ -1,9 +1,16 @@
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Sequence, Union, Dict, Any, TYPE_CHECKING
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
 from backend.models.database import Account
 from backend.schemas.account import AccountCreate, AccountUpdate
+from backend.crud.pagination import Keyset
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+ACCOUNT_KEYSET = Keyset(Account.id)
 
 class AccountCRUD:
     @staticmethod
@@ -15,8 +22,17 @@ class AccountCRUD:
         return db.query(Account).filter(Account.email == email).first()
 
     @staticmethod
-    def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> List[Account]:
-        return db.query(Account).offset(skip).limit(limit).all()
+    def get_multi(
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Account]:
+        query = ACCOUNT_KEYSET.apply(db.query(Account), after)
+        if after is None:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     @staticmethod
     def create(db: Session, *, obj_in: AccountCreate) -> Account:
@@ -49,4 +65,31 @@ class AccountCRUD:
         obj = db.query(Account).get(id)
         db.delete(obj)
         db.commit()
-        return obj 
\ No newline at end of file
+        return obj
+
+class AsyncAccountCRUD:
+    """Read operations of AccountCRUD on an AsyncSession (DB_ASYNC)"""
+
+    @staticmethod
+    async def get(db: "AsyncSession", id: int) -> Optional[Account]:
+        result = await db.execute(select(Account).where(Account.id == id))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_by_email(db: "AsyncSession", email: str) -> Optional[Account]:
+        result = await db.execute(select(Account).where(Account.email == email))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_multi(
+        db: "AsyncSession",
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Account]:
+        query = ACCOUNT_KEYSET.apply(select(Account), after)
+        if after is None:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
+        return list(result.scalars().all())
@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+from backend.models.database import ModuleCache
+
+logger = logging.getLogger(__name__)
+
+class CacheCRUD:
+    @staticmethod
+    def get_entry(db: Session, *, module_id: str, input_hash: str) -> Optional[ModuleCache]:
+        return db.query(ModuleCache).filter(
+            ModuleCache.module_id == module_id,
+            ModuleCache.input_hash == input_hash,
+            ModuleCache.is_valid == True
+        ).first()
+
+    @staticmethod
+    def upsert_entry(
+        db: Session,
+        *,
+        module_id: str,
+        input_hash: str,
+        output_hash: str,
+        location: str,
+        size_bytes: int,
+        meta_info: dict = None
+    ) -> Optional[ModuleCache]:
+        try:
+            entry = db.query(ModuleCache).filter(
+                ModuleCache.module_id == module_id,
+                ModuleCache.input_hash == input_hash
+            ).first()
+            now = datetime.utcnow()
+            if entry is None:
+                entry = ModuleCache(module_id=module_id, input_hash=input_hash, created_at=now)
+                db.add(entry)
+            entry.output_hash = output_hash
+            entry.location = location
+            entry.size_bytes = size_bytes
+            entry.last_used = now
+            entry.meta_info = {**(entry.meta_info or {}), **(meta_info or {})}
+            entry.is_valid = True
+            db.commit()
+            return entry
+        except SQLAlchemyError as e:
+            logger.error(f"Error recording cache entry: {str(e)}")
+            db.rollback()
+            return None
+
+    @staticmethod
+    def touch_many(db: Session, *, keys: Iterable[Tuple[str, str]], last_used: datetime) -> int:
+        """Set the last use of the ``(module_id, input_hash)`` entries in one transaction"""
+        by_module: Dict[str, List[str]] = defaultdict(list)
+        for module_id, input_hash in keys:
+            by_module[module_id].append(input_hash)
+        try:
+            updated = 0
+            for module_id, input_hashes in by_module.items():
+                # Keep the IN lists to a reasonable size
+                for start in range(0, len(input_hashes), 500):
+                    updated += db.query(ModuleCache).filter(
+                        ModuleCache.module_id == module_id,
+                        ModuleCache.input_hash.in_(input_hashes[start:start + 500])
+                    ).update({ModuleCache.last_used: last_used}, synchronize_session=False)
+            db.commit()
+            return updated
+        except SQLAlchemyError as e:
+            logger.error(f"Error updating cache entries: {str(e)}")
+            db.rollback()
+            return 0
+
+    @staticmethod
+    def record_remote_location(db: Session, *, module_id: str, input_hash: str, remote_location: str) -> bool:
+        """Remember where an entry was uploaded in the remote tier"""
+        try:
+            entry = db.query(ModuleCache).filter(
+                ModuleCache.module_id == module_id,
+                ModuleCache.input_hash == input_hash
+            ).first()
+            if entry is None:
+                return False
+            entry.meta_info = {**(entry.meta_info or {}), "remote_location": remote_location}
+            db.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error updating cache entry: {str(e)}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def invalidate_locations(db: Session, *, locations: List[str]) -> int:
+        if not locations:
+            return 0
+        try:
+            updated = 0
+            # Keep the IN lists to a reasonable size
+            for start in range(0, len(locations), 500):
+                updated += db.query(ModuleCache).filter(
+                    ModuleCache.location.in_(locations[start:start + 500])
+                ).update({ModuleCache.is_valid: False}, synchronize_session=False)
+            db.commit()
+            return updated
+        except SQLAlchemyError as e:
+            logger.error(f"Error invalidating cache entries: {str(e)}")
+            db.rollback()
+            return 0
+
+    @staticmethod
+    def invalidate_module(db: Session, *, module_id: str) -> int:
+        try:
+            updated = db.query(ModuleCache).filter(
+                ModuleCache.module_id == module_id
+            ).update({ModuleCache.is_valid: False}, synchronize_session=False)
+            db.commit()
+            return updated
+        except SQLAlchemyError as e:
+            logger.error(f"Error invalidating cache entries: {str(e)}")
+            db.rollback()
+            return 0
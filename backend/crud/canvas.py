@@ -1,4 +1,5 @@
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Sequence, Union, Dict, Any, TYPE_CHECKING
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 import uuid
@@ -7,9 +8,15 @@ import logging
 
 from backend.models.database import Canvas, CanvasModuleVersion
 from backend.schemas import canvas as canvas_schema
+from backend.crud.pagination import Keyset
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+CANVAS_KEYSET = Keyset(Canvas.id)
+
 class CanvasCRUD:
     @staticmethod
     def get(db: Session, id: int) -> Optional[Canvas]:
@@ -25,12 +32,16 @@ class CanvasCRUD:
         *, 
         account_id: Optional[int] = None,
         skip: int = 0, 
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
     ) -> List[Canvas]:
         query = db.query(Canvas)
         if account_id:
             query = query.filter(Canvas.account_id == account_id)
-        return query.offset(skip).limit(limit).all()
+        query = CANVAS_KEYSET.apply(query, after)
+        if after is None:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     @staticmethod
     def create(db: Session, *, account_id: int, canvas_in: canvas_schema.CanvasCreate) -> Optional[Canvas]:
@@ -58,13 +69,21 @@ class CanvasCRUD:
             return None
 
     @staticmethod
-    def get_by_account(db: Session, account_id: int, skip: int = 0, limit: int = 100) -> List[Canvas]:
+    def get_by_account(
+        db: Session,
+        account_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Canvas]:
         try:
-            return db.query(Canvas)\
-                .filter(Canvas.account_id == account_id)\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
+            query = CANVAS_KEYSET.apply(
+                db.query(Canvas).filter(Canvas.account_id == account_id),
+                after
+            )
+            if after is None:
+                query = query.offset(skip)
+            return query.limit(limit).all()
         except SQLAlchemyError as e:
             logger.error(f"Error getting canvases for account: {str(e)}")
             return []
@@ -163,4 +182,34 @@ class CanvasCRUD:
         except SQLAlchemyError as e:
             logger.error(f"Error adding module version to canvas: {str(e)}")
             db.rollback()
-            return None 
\ No newline at end of file
+            return None
+
+class AsyncCanvasCRUD:
+    """Read operations of CanvasCRUD on an AsyncSession (DB_ASYNC)"""
+
+    @staticmethod
+    async def get(db: "AsyncSession", canvas_id: str) -> Optional[Canvas]:
+        try:
+            result = await db.execute(select(Canvas).where(Canvas.canvas_id == canvas_id))
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting canvas: {str(e)}")
+            return None
+
+    @staticmethod
+    async def get_by_account(
+        db: "AsyncSession",
+        account_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Canvas]:
+        try:
+            query = CANVAS_KEYSET.apply(select(Canvas).where(Canvas.account_id == account_id), after)
+            if after is None:
+                query = query.offset(skip)
+            result = await db.execute(query.limit(limit))
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting canvases for account: {str(e)}")
+            return []
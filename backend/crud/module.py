@@ -1,9 +1,12 @@
-from typing import List, Optional, Union, Dict, Any
-from sqlalchemy.orm import Session
+from typing import List, Optional, Sequence, Union, Dict, Any, TYPE_CHECKING
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 from fastapi.encoders import jsonable_encoder
 import uuid
 
 from backend.models.database import Module, ModuleVersion
+from backend.core.code_cache import get_code_cache
+from backend.crud.pagination import Keyset
 from backend.schemas.module import (
     ModuleCreate, 
     ModuleUpdate,
@@ -11,6 +14,21 @@ from backend.schemas.module import (
     ModuleVersionUpdate
 )
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+MODULE_KEYSET = Keyset(Module.id)
+
+# Module listings load every module's versions in one extra SELECT and leave
+# the (large) code and config columns unloaded; see ModuleSummaryResponse
+VERSION_SUMMARIES = selectinload(Module.versions).load_only(
+    ModuleVersion.id,
+    ModuleVersion.module_id,
+    ModuleVersion.version,
+    ModuleVersion.is_active,
+    ModuleVersion.created_at
+)
+
 class ModuleCRUD:
     @staticmethod
     def get(db: Session, id: int) -> Optional[Module]:
@@ -18,7 +36,8 @@ class ModuleCRUD:
 
     @staticmethod
     def get_by_module_id(db: Session, module_id: str) -> Optional[Module]:
-        return db.query(Module).filter(Module.module_id == module_id).first()
+        """Get a module with its versions loaded, so they can be serialized off the session's thread"""
+        return db.query(Module).options(selectinload(Module.versions)).filter(Module.module_id == module_id).first()
 
     @staticmethod
     def get_multi(
@@ -26,13 +45,18 @@ class ModuleCRUD:
         *, 
         filters: Dict = None,
         skip: int = 0, 
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
     ) -> List[Module]:
-        query = db.query(Module)
+        """List modules with version summaries loaded (accessing ``code`` loads it lazily)"""
+        query = db.query(Module).options(VERSION_SUMMARIES)
         if filters:
             for field, value in filters.items():
                 query = query.filter(getattr(Module, field) == value)
-        return query.offset(skip).limit(limit).all()
+        query = MODULE_KEYSET.apply(query, after)
+        if after is None:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     @staticmethod
     def create(db: Session, *, obj_in: ModuleCreate) -> Module:
@@ -126,6 +150,8 @@ class ModuleCRUD:
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         
+        code_changed = "code" in update_data and update_data["code"] != db_obj.code
+        
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
@@ -133,4 +159,76 @@ class ModuleCRUD:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
-        return db_obj 
\ No newline at end of file
+        
+        # Drop compiled bytecode of the old code
+        if code_changed:
+            get_code_cache().invalidate(db_obj.module_id, db_obj.version)
+        return db_obj
+
+class AsyncModuleCRUD:
+    """
+    Read operations of ModuleCRUD on an AsyncSession (DB_ASYNC).
+
+    Relationships can't be lazy-loaded on an AsyncSession, so modules are
+    returned with their versions already loaded (only their summaries for
+    ``get_multi``).
+    """
+
+    @staticmethod
+    async def get_by_module_id(db: "AsyncSession", module_id: str) -> Optional[Module]:
+        result = await db.execute(
+            select(Module)
+            .options(selectinload(Module.versions))
+            .where(Module.module_id == module_id)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_multi(
+        db: "AsyncSession",
+        *,
+        filters: Dict = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[Module]:
+        query = select(Module).options(VERSION_SUMMARIES)
+        if filters:
+            for field, value in filters.items():
+                query = query.where(getattr(Module, field) == value)
+        query = MODULE_KEYSET.apply(query, after)
+        if after is None:
+            query = query.offset(skip)
+        result = await db.execute(query.limit(limit))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_version(
+        db: "AsyncSession",
+        *,
+        module_id: str,
+        version: str
+    ) -> Optional[ModuleVersion]:
+        result = await db.execute(
+            select(ModuleVersion).where(
+                ModuleVersion.module_id == module_id,
+                ModuleVersion.version == version
+            )
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_versions(
+        db: "AsyncSession",
+        *,
+        module_id: str,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ModuleVersion]:
+        result = await db.execute(
+            select(ModuleVersion)
+            .where(ModuleVersion.module_id == module_id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
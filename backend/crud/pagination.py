@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination.
+
+A ``Keyset`` orders a listing by a unique tuple of columns, e.g.
+``(started_at, id)``, and continues after the last row of the previous page
+with a range condition on those columns instead of an ``OFFSET``, so every
+page is an index range scan no matter how deep it is. Clients see the last
+row's key as an opaque cursor token.
+"""
+from typing import Any, List, Optional, Sequence
+from datetime import datetime
+import base64
+import binascii
+import json
+
+from sqlalchemy import and_, or_
+
+class InvalidCursorError(ValueError):
+    """Raised for cursor tokens that weren't produced by ``encode_cursor``"""
+    pass
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the key of a row as an opaque, URL-safe cursor token"""
+    payload = [{"dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> List[Any]:
+    """Decode a cursor token back into the key values"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError("cursor payload is not a list")
+        return [
+            datetime.fromisoformat(v["dt"]) if isinstance(v, dict) else v
+            for v in payload
+        ]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {token}") from e
+
+class Keyset:
+    """
+    Ordering and continuation condition of a paginated listing.
+
+    The last column must be unique (normally the primary key) so the key of a
+    row is unambiguous. Rows with NULLs in the key columns are never returned
+    after a cursor.
+    """
+
+    def __init__(self, *columns, descending: bool = False):
+        self.columns = columns
+        self.descending = descending
+
+    def apply(self, query, after: Optional[Sequence[Any]] = None):
+        """Order ``query`` (a Query or Select) by the key and continue after ``after``"""
+        if after is not None:
+            if len(after) != len(self.columns):
+                raise InvalidCursorError("Cursor does not match this listing")
+            query = query.where(self._after(after))
+        return query.order_by(*[
+            column.desc() if self.descending else column.asc()
+            for column in self.columns
+        ])
+
+    def values(self, obj) -> List[Any]:
+        return [getattr(obj, column.key) for column in self.columns]
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Get the cursor of the page after ``items``, or None on the last page"""
+        if not items or len(items) < limit:
+            return None
+        return encode_cursor(self.values(items[-1]))
+
+    def _after(self, values: Sequence[Any]):
+        # (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which
+        # MySQL turns into index range scans
+        clauses = []
+        for i, (column, value) in enumerate(zip(self.columns, values)):
+            equal = [c == v for c, v in zip(self.columns[:i], values[:i])]
+            beyond = column < value if self.descending else column > value
+            clauses.append(and_(*equal, beyond))
+        return or_(*clauses)
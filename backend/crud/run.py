@@ -1,6 +1,6 @@
-from typing import List, Optional, Union, Dict, Any
+from typing import List, Optional, Sequence, Union, Dict, Any, TYPE_CHECKING
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import insert, select, update
 from fastapi.encoders import jsonable_encoder
 import uuid
 from datetime import datetime
@@ -8,6 +8,9 @@ from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 from backend.models.database import CanvasRun, ModuleRunResult
+from backend.core.sketch import QuantileSketch
+from backend.crud.pagination import Keyset
+from backend.crud.run_stats import RunStatsCRUD, TERMINAL_STATUSES
 from backend.schemas.run import (
     CanvasRunCreate, 
     CanvasRunUpdate,
@@ -15,8 +18,14 @@ from backend.schemas.run import (
     ModuleRunStats
 )
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 logger = logging.getLogger(__name__)
 
+# Newest runs first
+RUN_KEYSET = Keyset(CanvasRun.started_at, CanvasRun.id, descending=True)
+
 class RunCRUD:
     @staticmethod
     def get(db: Session, id: int) -> Optional[CanvasRun]:
@@ -33,14 +42,18 @@ class RunCRUD:
         canvas_id: Optional[str] = None,
         status: Optional[RunStatus] = None,
         skip: int = 0, 
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
     ) -> List[CanvasRun]:
         query = db.query(CanvasRun)
         if canvas_id:
             query = query.filter(CanvasRun.canvas_id == canvas_id)
         if status:
             query = query.filter(CanvasRun.status == status)
-        return query.order_by(desc(CanvasRun.started_at)).offset(skip).limit(limit).all()
+        query = RUN_KEYSET.apply(query, after)
+        if after is None:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     @staticmethod
     def create(db: Session, *, obj_in: CanvasRunCreate) -> CanvasRun:
@@ -65,7 +78,8 @@ class RunCRUD:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.model_dump(exclude_unset=True)
+            # Only the fields given, but nested models (module runs) in full
+            update_data = obj_in.model_dump(mode="json", include=obj_in.model_fields_set)
         
         # Handle status updates
         if "status" in update_data:
@@ -98,37 +112,36 @@ class RunCRUD:
         module_id: str,
         canvas_id: Optional[str] = None
     ) -> ModuleRunStats:
-        """Get statistics for a specific module's runs"""
-        query = db.query(
-            func.count().label('total_runs'),
-            func.avg(ModuleRunResult.execution_time).label('avg_execution_time'),
-            func.sum(case(
-                (ModuleRunResult.status == RunStatus.COMPLETED, 1),
-                else_=0
-            )).label('success_count'),
-            func.sum(case(
-                (ModuleRunResult.status == RunStatus.FAILED, 1),
-                else_=0
-            )).label('error_count')
-        ).filter(ModuleRunResult.module_id == module_id)
+        """Get statistics for a specific module's runs from its rollup row"""
+        stats = RunStatsCRUD.get(db, module_id=module_id, canvas_id=canvas_id)
+        if not stats or not stats.total_runs:
+            return ModuleRunStats(module_id=module_id, canvas_id=canvas_id)
 
-        if canvas_id:
-            query = query.filter(CanvasRun.canvas_id == canvas_id)
+        sketch = QuantileSketch.from_dict(stats.duration_sketch)
 
-        result = query.first()
-
-        # Get the last run
-        last_run = db.query(ModuleRunResult).filter(
-            ModuleRunResult.module_id == module_id
-        ).order_by(desc(ModuleRunResult.started_at)).first()
+        def percentile(q: float) -> Optional[float]:
+            # The sketch is approximate; the extremes are tracked exactly
+            value = sketch.quantile(q)
+            if value is None:
+                return None
+            return min(max(value, stats.duration_min), stats.duration_max)
 
         return ModuleRunStats(
-            total_runs=result.total_runs or 0,
-            success_rate=(result.success_count / result.total_runs * 100) if result.total_runs else 0,
-            avg_execution_time=result.avg_execution_time or 0,
-            last_run_status=last_run.status if last_run else RunStatus.PENDING,
-            last_run_at=last_run.completed_at if last_run else None,
-            error_count=result.error_count or 0
+            module_id=module_id,
+            canvas_id=canvas_id,
+            total_runs=stats.total_runs,
+            completed_runs=stats.completed_runs,
+            failed_runs=stats.failed_runs,
+            average_duration=stats.duration_sum / stats.duration_count if stats.duration_count else None,
+            min_duration=stats.duration_min,
+            max_duration=stats.duration_max,
+            p50_duration=percentile(0.5),
+            p95_duration=percentile(0.95),
+            p99_duration=percentile(0.99),
+            success_rate=stats.completed_runs / stats.total_runs * 100,
+            error_count=stats.failed_runs,
+            last_run_status=stats.last_run_status,
+            last_run_at=stats.last_run_at
         )
 
     @staticmethod
@@ -163,18 +176,46 @@ class RunCRUD:
             return None
 
     @staticmethod
-    def get_runs_by_canvas(db: Session, canvas_id: str, skip: int = 0, limit: int = 100) -> List[CanvasRun]:
+    def get_runs_by_canvas(
+        db: Session,
+        canvas_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[CanvasRun]:
+        """List runs newest first, continuing after the ``RUN_KEYSET`` key ``after`` when given"""
         try:
-            return db.query(CanvasRun)\
-                .filter(CanvasRun.canvas_id == canvas_id)\
-                .order_by(CanvasRun.started_at.desc())\
-                .offset(skip)\
-                .limit(limit)\
-                .all()
+            query = RUN_KEYSET.apply(
+                db.query(CanvasRun).filter(CanvasRun.canvas_id == canvas_id),
+                after
+            )
+            if after is None:
+                query = query.offset(skip)
+            return query.limit(limit).all()
         except SQLAlchemyError as e:
             logger.error(f"Error getting runs for canvas: {str(e)}")
             return []
 
+    @staticmethod
+    def get_last_successful_run(
+        db: Session,
+        canvas_id: str,
+        *,
+        exclude_run_id: Optional[str] = None
+    ) -> Optional[CanvasRun]:
+        """Get the latest completed run of a canvas, the baseline of incremental runs"""
+        try:
+            query = db.query(CanvasRun).filter(
+                CanvasRun.canvas_id == canvas_id,
+                CanvasRun.status == RunStatus.COMPLETED.value
+            )
+            if exclude_run_id is not None:
+                query = query.filter(CanvasRun.run_id != exclude_run_id)
+            return query.order_by(CanvasRun.started_at.desc(), CanvasRun.id.desc()).first()
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting last successful run of canvas {canvas_id}: {str(e)}")
+            return None
+
     @staticmethod
     def update_run_status(
         db: Session,
@@ -240,7 +281,9 @@ class RunCRUD:
         status: str,
         metrics: Dict[str, Any] = None,
         cache_location: str = None,
-        error: Dict[str, Any] = None
+        error: Dict[str, Any] = None,
+        input_hash: str = None,
+        output_hash: str = None
     ) -> Optional[ModuleRunResult]:
         try:
             result = db.query(ModuleRunResult)\
@@ -252,6 +295,7 @@ class RunCRUD:
             if not result:
                 return None
 
+            previous_status = result.status
             result.status = status
             if status == "completed":
                 result.completed_at = datetime.utcnow()
@@ -261,6 +305,21 @@ class RunCRUD:
                 result.cache_location = cache_location
             if error:
                 result.error = error
+            if input_hash:
+                result.input_hash = input_hash
+            if output_hash:
+                result.output_hash = output_hash
+
+            if status in TERMINAL_STATUSES and previous_status not in TERMINAL_STATUSES:
+                canvas_id = db.query(CanvasRun.canvas_id)\
+                    .filter(CanvasRun.run_id == run_id).scalar()
+                RunStatsCRUD.record_finished(db, results=[(canvas_id, {
+                    "module_id": module_id,
+                    "status": status,
+                    "started_at": result.started_at,
+                    "completed_at": result.completed_at,
+                    "metrics": result.metrics
+                })])
 
             db.commit()
             db.refresh(result)
@@ -270,6 +329,64 @@ class RunCRUD:
             db.rollback()
             return None
 
+    @staticmethod
+    def write_module_results(db: Session, *, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Insert or update many module run results in a single transaction.
+
+        Rows are keyed on ``(run_id, module_id)``; rows that already exist are
+        updated with one bulk UPDATE by primary key, the rest are inserted with
+        one bulk INSERT. Results reaching a terminal status are added to the
+        module run statistics in the same transaction.
+        """
+        if not rows:
+            return True
+        try:
+            rows_by_run: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for row in rows:
+                rows_by_run.setdefault(row["run_id"], {})[row["module_id"]] = row
+
+            inserts = []
+            updates = []
+            finished = []
+            for run_id, run_rows in rows_by_run.items():
+                existing = {
+                    module_id: (result_id, status)
+                    for module_id, result_id, status in db.query(
+                        ModuleRunResult.module_id, ModuleRunResult.id, ModuleRunResult.status
+                    ).filter(
+                        ModuleRunResult.run_id == run_id,
+                        ModuleRunResult.module_id.in_(list(run_rows))
+                    ).all()
+                }
+                run_finished = []
+                for module_id, row in run_rows.items():
+                    previous_status = None
+                    if module_id in existing:
+                        result_id, previous_status = existing[module_id]
+                        updates.append({**row, "id": result_id})
+                    else:
+                        inserts.append(row)
+                    if row["status"] in TERMINAL_STATUSES and previous_status not in TERMINAL_STATUSES:
+                        run_finished.append(row)
+                if run_finished:
+                    canvas_id = db.query(CanvasRun.canvas_id)\
+                        .filter(CanvasRun.run_id == run_id).scalar()
+                    finished.extend((canvas_id, row) for row in run_finished)
+
+            if inserts:
+                db.execute(insert(ModuleRunResult), inserts)
+            if updates:
+                db.execute(update(ModuleRunResult), updates)
+            if finished:
+                RunStatsCRUD.record_finished(db, results=finished)
+            db.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error writing module run results: {str(e)}")
+            db.rollback()
+            return False
+
     @staticmethod
     def get_module_results(db: Session, run_id: str) -> List[ModuleRunResult]:
         try:
@@ -278,4 +395,45 @@ class RunCRUD:
                 .all()
         except SQLAlchemyError as e:
             logger.error(f"Error getting module results: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+class AsyncRunCRUD:
+    """Read operations of RunCRUD on an AsyncSession (DB_ASYNC)"""
+
+    @staticmethod
+    async def get_run(db: "AsyncSession", run_id: str) -> Optional[CanvasRun]:
+        try:
+            result = await db.execute(select(CanvasRun).where(CanvasRun.run_id == run_id))
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting run: {str(e)}")
+            return None
+
+    @staticmethod
+    async def get_runs_by_canvas(
+        db: "AsyncSession",
+        canvas_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Sequence[Any]] = None
+    ) -> List[CanvasRun]:
+        try:
+            query = RUN_KEYSET.apply(select(CanvasRun).where(CanvasRun.canvas_id == canvas_id), after)
+            if after is None:
+                query = query.offset(skip)
+            result = await db.execute(query.limit(limit))
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting runs for canvas: {str(e)}")
+            return []
+
+    @staticmethod
+    async def get_module_results(db: "AsyncSession", run_id: str) -> List[ModuleRunResult]:
+        try:
+            result = await db.execute(
+                select(ModuleRunResult).where(ModuleRunResult.run_id == run_id)
+            )
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            logger.error(f"Error getting module results: {str(e)}")
+            return []
@@ -0,0 +1,234 @@
+"""
+Durable run execution queue on the ``run_jobs`` table.
+
+Workers claim queued jobs under a lease that they extend with heartbeats
+while the run executes. A job whose lease runs out (its worker crashed or
+lost the database) is put back in the queue by the next worker that looks,
+until it has used up ``max_attempts``.
+"""
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+from backend.models.database import CanvasRun, RunJob
+
+logger = logging.getLogger(__name__)
+
+class RunJobCRUD:
+    @staticmethod
+    def get_by_run_id(db: Session, run_id: str) -> Optional[RunJob]:
+        return db.query(RunJob).filter(RunJob.run_id == run_id).first()
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        *,
+        run_id: str,
+        account_id: Optional[int] = None,
+        priority: int = 0,
+        max_attempts: int = 3
+    ) -> Optional[RunJob]:
+        """Queue a run for execution; returns None if it was queued before"""
+        try:
+            now = datetime.utcnow()
+            job = RunJob(
+                run_id=run_id,
+                account_id=account_id,
+                priority=priority,
+                status="queued",
+                attempts=0,
+                max_attempts=max_attempts,
+                enqueued_at=now,
+                available_at=now
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            return job
+        except SQLAlchemyError as e:
+            logger.error(f"Error queueing run {run_id}: {str(e)}")
+            db.rollback()
+            return None
+
+    @staticmethod
+    def claim(
+        db: Session,
+        *,
+        worker_id: str,
+        lease_seconds: float,
+        limit: int = 1,
+        account_max_running: int = 0,
+        window: int = 50
+    ) -> List[RunJob]:
+        """
+        Lease up to ``limit`` queued jobs to ``worker_id``.
+
+        Higher priorities go first. Within a priority, the job of the account
+        with the fewest running jobs is picked (oldest first), so one account
+        queueing a burst of runs can't starve the others; accounts already
+        running ``account_max_running`` jobs (0 = no limit) are skipped. Only
+        the first ``window`` queued jobs are considered. Candidates are locked
+        with SKIP LOCKED so concurrent workers claim different jobs.
+        """
+        try:
+            now = datetime.utcnow()
+            running: Dict[Optional[int], int] = dict(
+                db.query(RunJob.account_id, func.count())
+                .filter(RunJob.status == "running")
+                .group_by(RunJob.account_id)
+                .all()
+            )
+            candidates = db.query(RunJob).filter(
+                RunJob.status == "queued",
+                RunJob.available_at <= now
+            ).order_by(RunJob.priority.desc(), RunJob.id.asc())\
+                .limit(window)\
+                .with_for_update(skip_locked=True)\
+                .all()
+
+            claimed = []
+            while candidates and len(claimed) < limit:
+                eligible = [
+                    job for job in candidates
+                    if not account_max_running or running.get(job.account_id, 0) < account_max_running
+                ]
+                if not eligible:
+                    break
+                top = max(job.priority for job in eligible)
+                job = min(
+                    (job for job in eligible if job.priority == top),
+                    key=lambda job: (running.get(job.account_id, 0), job.id)
+                )
+                candidates.remove(job)
+
+                # Conditional on the status, so a job can't be claimed twice
+                # on databases that ignore FOR UPDATE
+                updated = db.query(RunJob).filter(
+                    RunJob.id == job.id,
+                    RunJob.status == "queued"
+                ).update({
+                    RunJob.status: "running",
+                    RunJob.worker_id: worker_id,
+                    RunJob.attempts: RunJob.attempts + 1,
+                    RunJob.started_at: now,
+                    RunJob.heartbeat_at: now,
+                    RunJob.lease_expires_at: now + timedelta(seconds=lease_seconds)
+                }, synchronize_session=False)
+                if updated:
+                    claimed.append(job.id)
+                    running[job.account_id] = running.get(job.account_id, 0) + 1
+            db.commit()
+
+            if not claimed:
+                return []
+            return db.query(RunJob).filter(RunJob.id.in_(claimed))\
+                .order_by(RunJob.priority.desc(), RunJob.id.asc())\
+                .populate_existing()\
+                .all()
+        except SQLAlchemyError as e:
+            logger.error(f"Error claiming run jobs: {str(e)}")
+            db.rollback()
+            return []
+
+    @staticmethod
+    def heartbeat(db: Session, *, worker_id: str, job_ids: List[int], lease_seconds: float) -> Optional[List[int]]:
+        """
+        Extend the leases of ``worker_id`` on ``job_ids``. Returns the ids it
+        still holds, or None if the database couldn't be reached.
+        """
+        if not job_ids:
+            return []
+        try:
+            now = datetime.utcnow()
+            db.query(RunJob).filter(
+                RunJob.id.in_(job_ids),
+                RunJob.worker_id == worker_id,
+                RunJob.status == "running"
+            ).update({
+                RunJob.heartbeat_at: now,
+                RunJob.lease_expires_at: now + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False)
+            db.commit()
+            return [
+                job_id for (job_id,) in db.query(RunJob.id).filter(
+                    RunJob.id.in_(job_ids),
+                    RunJob.worker_id == worker_id,
+                    RunJob.status == "running"
+                ).all()
+            ]
+        except SQLAlchemyError as e:
+            logger.error(f"Error extending run job leases: {str(e)}")
+            db.rollback()
+            return None
+
+    @staticmethod
+    def finish(
+        db: Session,
+        *,
+        job_id: int,
+        worker_id: str,
+        status: str,
+        error: Optional[Dict] = None
+    ) -> bool:
+        """Record the outcome of a job, unless its lease was lost to another worker"""
+        try:
+            updated = db.query(RunJob).filter(
+                RunJob.id == job_id,
+                RunJob.worker_id == worker_id,
+                RunJob.status == "running"
+            ).update({
+                RunJob.status: status,
+                RunJob.finished_at: datetime.utcnow(),
+                RunJob.lease_expires_at: None,
+                RunJob.error: error
+            }, synchronize_session=False)
+            db.commit()
+            return bool(updated)
+        except SQLAlchemyError as e:
+            logger.error(f"Error finishing run job {job_id}: {str(e)}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def requeue_expired(db: Session) -> Tuple[int, int]:
+        """
+        Put jobs whose lease ran out back in the queue, or fail them (and
+        their runs) once they have used up their attempts. Returns the number
+        of jobs requeued and failed.
+        """
+        try:
+            now = datetime.utcnow()
+            expired = db.query(RunJob).filter(
+                RunJob.status == "running",
+                RunJob.lease_expires_at < now
+            ).with_for_update(skip_locked=True).all()
+
+            requeued = failed = 0
+            for job in expired:
+                logger.warning(f"Lease of worker {job.worker_id} on run {job.run_id} expired")
+                if job.attempts >= job.max_attempts:
+                    error = {"error": f"Run worker lease expired after {job.attempts} attempts"}
+                    job.status = "failed"
+                    job.finished_at = now
+                    job.error = error
+                    db.query(CanvasRun).filter(CanvasRun.run_id == job.run_id).update({
+                        CanvasRun.status: "failed",
+                        CanvasRun.completed_at: now,
+                        CanvasRun.error: error
+                    }, synchronize_session=False)
+                    failed += 1
+                else:
+                    job.status = "queued"
+                    job.available_at = now
+                    requeued += 1
+                job.worker_id = None
+                job.lease_expires_at = None
+            db.commit()
+            return requeued, failed
+        except SQLAlchemyError as e:
+            logger.error(f"Error requeueing expired run jobs: {str(e)}")
+            db.rollback()
+            return 0, 0
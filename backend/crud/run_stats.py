@@ -0,0 +1,184 @@
+"""
+Incrementally maintained module run statistics.
+
+Every module result that reaches a terminal status is folded into two
+``module_run_stats`` rows, one for the module across all canvases
+(``canvas_id = ""``) and one for the module on the run's canvas, inside the
+transaction that writes the result. Reading the statistics of a module is
+then a single unique-key lookup instead of an aggregate over its results.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import logging
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from backend.core.sketch import QuantileSketch
+from backend.models.database import CanvasRun, ModuleRunResult, ModuleRunStatistics
+
+logger = logging.getLogger(__name__)
+
+# Statuses that finish a module run and are counted in the statistics
+TERMINAL_STATUSES = ("completed", "failed")
+
+# canvas_id of the rollup across all canvases
+ALL_CANVASES = ""
+
+def run_duration(row: Dict[str, Any]) -> Optional[float]:
+    """Get the execution time of a result row in seconds, if it is known"""
+    metrics = row.get("metrics") or {}
+    if metrics.get("execution_time") is not None:
+        return float(metrics["execution_time"])
+    if row.get("started_at") and row.get("completed_at"):
+        return (row["completed_at"] - row["started_at"]).total_seconds()
+    return None
+
+class RunRollup:
+    """Statistics of a set of finished results, added to a stats row with ``apply``"""
+
+    def __init__(self):
+        self.total_runs = 0
+        self.completed_runs = 0
+        self.failed_runs = 0
+        self.duration_count = 0
+        self.duration_sum = 0.0
+        self.duration_min: Optional[float] = None
+        self.duration_max: Optional[float] = None
+        self.sketch = QuantileSketch()
+        self.last_run_status: Optional[str] = None
+        self.last_run_at: Optional[datetime] = None
+
+    def add(self, row: Dict[str, Any]):
+        self.total_runs += 1
+        if row["status"] == "completed":
+            self.completed_runs += 1
+        else:
+            self.failed_runs += 1
+
+        duration = run_duration(row)
+        if duration is not None:
+            self.duration_count += 1
+            self.duration_sum += duration
+            self.duration_min = duration if self.duration_min is None else min(self.duration_min, duration)
+            self.duration_max = duration if self.duration_max is None else max(self.duration_max, duration)
+            self.sketch.add(duration)
+
+        finished_at = row.get("completed_at") or datetime.utcnow()
+        if self.last_run_at is None or finished_at >= self.last_run_at:
+            self.last_run_at = finished_at
+            self.last_run_status = row["status"]
+
+    def apply(self, stats: ModuleRunStatistics):
+        stats.total_runs += self.total_runs
+        stats.completed_runs += self.completed_runs
+        stats.failed_runs += self.failed_runs
+        stats.duration_count += self.duration_count
+        stats.duration_sum += self.duration_sum
+        if self.duration_count:
+            stats.duration_min = min(v for v in (stats.duration_min, self.duration_min) if v is not None)
+            stats.duration_max = max(v for v in (stats.duration_max, self.duration_max) if v is not None)
+            sketch = QuantileSketch.from_dict(stats.duration_sketch)
+            sketch.merge(self.sketch)
+            stats.duration_sketch = sketch.to_dict()
+        if self.last_run_at and (stats.last_run_at is None or self.last_run_at >= stats.last_run_at):
+            stats.last_run_at = self.last_run_at
+            stats.last_run_status = self.last_run_status
+        stats.updated_at = datetime.utcnow()
+
+def rollup_keys(module_id: str, canvas_id: Optional[str]) -> List[Tuple[str, str]]:
+    keys = [(module_id, ALL_CANVASES)]
+    if canvas_id:
+        keys.append((module_id, canvas_id))
+    return keys
+
+class RunStatsCRUD:
+    @staticmethod
+    def get(db: Session, *, module_id: str, canvas_id: Optional[str] = None) -> Optional[ModuleRunStatistics]:
+        return db.query(ModuleRunStatistics).filter(
+            ModuleRunStatistics.module_id == module_id,
+            ModuleRunStatistics.canvas_id == (canvas_id or ALL_CANVASES)
+        ).first()
+
+    @staticmethod
+    def record_finished(db: Session, *, results: Iterable[Tuple[Optional[str], Dict[str, Any]]]):
+        """
+        Fold ``(canvas_id, result row)`` pairs of newly finished results into
+        the statistics. Runs in the caller's transaction and doesn't commit;
+        the stats rows are locked until the caller commits, so concurrent
+        writers can't lose each other's updates.
+        """
+        rollups: Dict[Tuple[str, str], RunRollup] = {}
+        for canvas_id, row in results:
+            for key in rollup_keys(row["module_id"], canvas_id):
+                rollups.setdefault(key, RunRollup()).add(row)
+        if not rollups:
+            return
+
+        # Always lock in key order so two writers can't deadlock
+        keys = sorted(rollups)
+        stats = RunStatsCRUD._lock(db, keys)
+        missing = [key for key in keys if key not in stats]
+        if missing:
+            db.execute(
+                insert(ModuleRunStatistics)
+                .prefix_with("IGNORE", dialect="mysql")
+                .prefix_with("OR IGNORE", dialect="sqlite"),
+                [{"module_id": module_id, "canvas_id": canvas_id} for module_id, canvas_id in missing]
+            )
+            stats.update(RunStatsCRUD._lock(db, missing))
+
+        for key in keys:
+            rollups[key].apply(stats[key])
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute every statistics row from module_run_results. Meant for
+        backfills; results finishing while it runs may be counted twice or
+        not at all. Returns the number of rows written.
+        """
+        try:
+            rollups: Dict[Tuple[str, str], RunRollup] = {}
+            query = db.query(
+                ModuleRunResult.module_id,
+                ModuleRunResult.status,
+                ModuleRunResult.started_at,
+                ModuleRunResult.completed_at,
+                ModuleRunResult.metrics,
+                CanvasRun.canvas_id
+            ).outerjoin(CanvasRun, CanvasRun.run_id == ModuleRunResult.run_id)\
+                .filter(ModuleRunResult.status.in_(TERMINAL_STATUSES))\
+                .yield_per(1000)
+            for result in query:
+                row = result._asdict()
+                for key in rollup_keys(row["module_id"], row["canvas_id"]):
+                    rollups.setdefault(key, RunRollup()).add(row)
+
+            db.query(ModuleRunStatistics).delete()
+            for (module_id, canvas_id), rollup in rollups.items():
+                stats = ModuleRunStatistics(
+                    module_id=module_id,
+                    canvas_id=canvas_id,
+                    total_runs=0,
+                    completed_runs=0,
+                    failed_runs=0,
+                    duration_count=0,
+                    duration_sum=0.0
+                )
+                rollup.apply(stats)
+                db.add(stats)
+            db.commit()
+            return len(rollups)
+        except SQLAlchemyError as e:
+            logger.error(f"Error rebuilding module run stats: {str(e)}")
+            db.rollback()
+            return 0
+
+    @staticmethod
+    def _lock(db: Session, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], ModuleRunStatistics]:
+        rows = db.query(ModuleRunStatistics).filter(
+            tuple_(ModuleRunStatistics.module_id, ModuleRunStatistics.canvas_id).in_(keys)
+        ).with_for_update().populate_existing().all()
+        return {(row.module_id, row.canvas_id): row for row in rows}
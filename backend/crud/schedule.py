@@ -0,0 +1,120 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+from backend.models.database import Canvas, CanvasRun, CanvasScheduleState, RunJob
+
+logger = logging.getLogger(__name__)
+
+class ScheduleCRUD:
+    @staticmethod
+    def get_canvases(db: Session, *, updated_since: Optional[datetime] = None) -> List[Canvas]:
+        """
+        Get every canvas, or only those changed since ``updated_since``
+        (inactive ones included, so their schedules can be dropped). Only the
+        columns the scheduler needs are loaded.
+        """
+        query = db.query(Canvas).options(load_only(
+            Canvas.canvas_id,
+            Canvas.account_id,
+            Canvas.created_at,
+            Canvas.updated_at,
+            Canvas.is_active,
+            Canvas.schedule_config
+        ))
+        if updated_since is not None:
+            query = query.filter(Canvas.updated_at >= updated_since)
+        return query.all()
+
+    @staticmethod
+    def get_canvas(db: Session, canvas_id: str) -> Optional[Canvas]:
+        return db.query(Canvas).options(load_only(
+            Canvas.canvas_id,
+            Canvas.account_id,
+            Canvas.created_at,
+            Canvas.updated_at,
+            Canvas.is_active,
+            Canvas.schedule_config
+        )).filter(Canvas.canvas_id == canvas_id).first()
+
+    @staticmethod
+    def get_last_fires(db: Session) -> Dict[str, datetime]:
+        return dict(
+            db.query(CanvasScheduleState.canvas_id, CanvasScheduleState.last_fire_at)
+            .filter(CanvasScheduleState.last_fire_at.isnot(None))
+            .all()
+        )
+
+    @staticmethod
+    def claim_fire(db: Session, *, canvas_id: str, fire_at: datetime) -> bool:
+        """
+        Record ``fire_at`` as the last fire of a canvas unless it (or a later
+        fire) was recorded already, so each fire is dispatched by exactly one
+        of the schedulers running.
+        """
+        try:
+            db.execute(
+                insert(CanvasScheduleState)
+                .prefix_with("IGNORE", dialect="mysql")
+                .prefix_with("OR IGNORE", dialect="sqlite"),
+                [{"canvas_id": canvas_id}]
+            )
+            claimed = db.query(CanvasScheduleState).filter(
+                CanvasScheduleState.canvas_id == canvas_id,
+                or_(
+                    CanvasScheduleState.last_fire_at.is_(None),
+                    CanvasScheduleState.last_fire_at < fire_at
+                )
+            ).update({
+                CanvasScheduleState.last_fire_at: fire_at,
+                CanvasScheduleState.updated_at: datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+            return bool(claimed)
+        except SQLAlchemyError as e:
+            logger.error(f"Error claiming schedule fire of canvas {canvas_id}: {str(e)}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def record_outcome(db: Session, *, canvas_id: str, outcome: str, run_id: Optional[str] = None) -> bool:
+        try:
+            values = {
+                CanvasScheduleState.last_outcome: outcome,
+                CanvasScheduleState.updated_at: datetime.utcnow()
+            }
+            if run_id is not None:
+                values[CanvasScheduleState.last_run_id] = run_id
+            db.query(CanvasScheduleState)\
+                .filter(CanvasScheduleState.canvas_id == canvas_id)\
+                .update(values, synchronize_session=False)
+            db.commit()
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error recording schedule outcome of canvas {canvas_id}: {str(e)}")
+            db.rollback()
+            return False
+
+    @staticmethod
+    def has_unfinished_run(db: Session, canvas_id: str) -> bool:
+        """
+        Whether the latest run of a canvas is running, or pending in the run
+        queue (a created run that was never queued doesn't count)
+        """
+        latest = db.query(CanvasRun.run_id, CanvasRun.status)\
+            .filter(CanvasRun.canvas_id == canvas_id)\
+            .order_by(CanvasRun.started_at.desc())\
+            .first()
+        if latest is None:
+            return False
+        if latest.status == "running":
+            return True
+        if latest.status != "pending":
+            return False
+        return db.query(RunJob.id).filter(
+            RunJob.run_id == latest.run_id,
+            RunJob.status.in_(("queued", "running"))
+        ).first() is not None
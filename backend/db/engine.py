@@ -0,0 +1,189 @@
+"""
+Process-wide database engines.
+
+Every sync session factory (``backend.models.database.SessionLocal`` and
+``backend.db.session.SessionLocal``) binds to ``get_engine()``, so the process
+keeps one connection pool to MySQL. The pool is a ``QueuePool`` that records
+checkout latency and waits, exposed by ``get_pool_metrics()``. With DB_ASYNC
+read endpoints use a second pool, of the async engine, which is instrumented
+the same way and reported next to it.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+from functools import lru_cache
+import bisect
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from backend.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the checkout latency histogram buckets
+CHECKOUT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+def database_url(driver: str = "pymysql") -> str:
+    settings = get_settings()
+    return f"mysql+{driver}://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
+
+class PoolMetrics:
+    """Checkout counters and latency histogram of an InstrumentedQueuePool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.latency_seconds = 0.0
+        self.latency_buckets = [0] * (len(CHECKOUT_LATENCY_BUCKETS) + 1)
+
+    def observe(self, latency: float, waited: bool, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.latency_seconds += latency
+                self.latency_buckets[bisect.bisect_left(CHECKOUT_LATENCY_BUCKETS, latency)] += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += latency
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets = {str(bound): count for bound, count in zip(CHECKOUT_LATENCY_BUCKETS, self.latency_buckets)}
+            buckets["+Inf"] = self.latency_buckets[-1]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "waits": self.waits,
+                "wait_seconds": self.wait_seconds,
+                "avg_checkout_seconds": self.latency_seconds / self.checkouts if self.checkouts else None,
+                "checkout_latency_histogram": buckets
+            }
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout from the pool.
+
+    A checkout counts as a wait when every pooled and overflow connection was
+    already in use, i.e. the caller had to block until one was returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        exhausted = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe(time.perf_counter() - start, exhausted, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start, exhausted)
+        return connection
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool for the async engine"""
+
+def create_instrumented_engine(url: str) -> Engine:
+    """Create an engine with the configured pool settings and an instrumented pool"""
+    settings = get_settings()
+    return create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=True,  # Enable connection health checks
+        pool_recycle=3600,  # Recycle connections after 1 hour
+        echo=settings.DB_ECHO,
+        connect_args={
+            "connect_timeout": 60,
+            "charset": "utf8mb4"
+        }
+    )
+
+@lru_cache()
+def get_engine() -> Engine:
+    """Get the engine shared by every sync session factory"""
+    return create_instrumented_engine(database_url())
+
+@lru_cache()
+def get_async_engine():
+    """
+    Get the async engine (DB_ASYNC), created on first use.
+
+    sqlalchemy.ext.asyncio requires greenlet, so it is imported lazily.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    settings = get_settings()
+    return create_async_engine(
+        database_url(settings.DB_ASYNC_DRIVER),
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=3600,
+        echo=settings.DB_ECHO,
+        connect_args={
+            "connect_timeout": 60,
+            "charset": "utf8mb4"
+        }
+    )
+
+def prewarm_pool(engine: Optional[Engine] = None, size: Optional[int] = None) -> int:
+    """
+    Open ``size`` (default DB_POOL_SIZE) pooled connections so the first
+    requests don't pay the connect latency. Returns how many were opened.
+    """
+    engine = engine or get_engine()
+    size = size if size is not None else get_settings().DB_POOL_SIZE
+    connections: List = []
+    try:
+        # Hold every connection at once, otherwise the pool would hand the
+        # same one back each time
+        for _ in range(size):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.warning(f"Could not prewarm the connection pool: {str(e)}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+def get_pool_metrics(engine: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Get the pool occupancy and checkout metrics of an engine (sync or async).
+    By default those of the shared engine, with those of the async engine
+    under ``async`` when DB_ASYNC is set.
+    """
+    if engine is not None:
+        return _pool_metrics(engine.pool)
+    metrics = _pool_metrics(get_engine().pool)
+    if get_settings().DB_ASYNC:
+        metrics["async"] = _pool_metrics(get_async_engine().pool)
+    return metrics
+
+def _pool_metrics(pool) -> Dict[str, Any]:
+    metrics = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.update(pool.metrics.snapshot())
+    return metrics
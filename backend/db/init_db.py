@@ -1,11 +1,24 @@
 import logging
+import os
 from sqlalchemy.exc import SQLAlchemyError
 from backend.db.session import engine
 from backend.models.database import Base
-from backend.config.settings import get_settings
+from backend.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic.ini"
+)
+
+def stamp_db(revision: str = "head") -> None:
+    """Mark the database as migrated to ``revision`` without running migrations."""
+    from alembic import command
+    from alembic.config import Config
+
+    command.stamp(Config(ALEMBIC_INI), revision)
+
 def init_db() -> None:
     """Initialize the database with all tables."""
     settings = get_settings()
@@ -13,6 +26,8 @@ def init_db() -> None:
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        # The tables match the latest migration, so later ones apply cleanly
+        stamp_db()
         logger.info("Successfully initialized database tables")
         
     except SQLAlchemyError as e:
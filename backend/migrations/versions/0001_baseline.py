@@ -0,0 +1,133 @@
+"""Baseline schema, as created by init_db before migrations existed
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created with ``init_db`` before this migration set should be
+stamped with ``alembic stamp 0001`` instead of running it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("account_type", sa.Enum("PERSONAL", "TEAM", "ENTERPRISE", name="accounttype")),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("settings", sa.JSON()),
+    )
+    op.create_table(
+        "canvases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("canvas_id", sa.String(50), nullable=False, unique=True),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id")),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("version", sa.String(50)),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("module_config", sa.JSON()),
+        sa.Column("schedule_config", sa.JSON()),
+        sa.Column("tags", sa.JSON()),
+        sa.Column("meta_info", sa.JSON()),
+    )
+    op.create_table(
+        "modules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("module_id", sa.String(50), nullable=False, unique=True),
+        sa.Column("account_id", sa.Integer(), sa.ForeignKey("accounts.id")),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("type", sa.String(50), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("category", sa.String(50)),
+        sa.Column("tags", sa.JSON()),
+        sa.Column("meta_info", sa.JSON()),
+    )
+    op.create_table(
+        "module_versions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("module_id", sa.String(50), sa.ForeignKey("modules.module_id"), unique=True),
+        sa.Column("version", sa.String(50), nullable=False),
+        sa.Column("code", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("config", sa.JSON()),
+        sa.Column("requirements", sa.JSON()),
+        sa.UniqueConstraint("module_id", "version", name="uix_module_version"),
+    )
+    op.create_table(
+        "canvas_module_versions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("canvas_id", sa.String(50), sa.ForeignKey("canvases.canvas_id")),
+        sa.Column("module_id", sa.String(50), sa.ForeignKey("module_versions.module_id")),
+        sa.Column("version", sa.String(50), nullable=False),
+        sa.Column("position_x", sa.Float()),
+        sa.Column("position_y", sa.Float()),
+        sa.Column("config", sa.JSON()),
+    )
+    op.create_table(
+        "canvas_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String(50), nullable=False, unique=True),
+        sa.Column("canvas_id", sa.String(50), sa.ForeignKey("canvases.canvas_id")),
+        sa.Column("status", sa.String(50)),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("module_runs", sa.JSON()),
+        sa.Column("metrics", sa.JSON()),
+        sa.Column("logs", sa.JSON()),
+        sa.Column("error", sa.JSON()),
+        sa.Column("cache_config", sa.JSON()),
+    )
+    op.create_table(
+        "module_run_results",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String(50), sa.ForeignKey("canvas_runs.run_id")),
+        sa.Column("module_id", sa.String(50), sa.ForeignKey("module_versions.module_id")),
+        sa.Column("status", sa.String(50)),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime()),
+        sa.Column("input_hash", sa.String(255)),
+        sa.Column("output_hash", sa.String(255)),
+        sa.Column("metrics", sa.JSON()),
+        sa.Column("cache_location", sa.String(512)),
+        sa.Column("error", sa.JSON()),
+    )
+    op.create_table(
+        "module_cache",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("module_id", sa.String(50), sa.ForeignKey("module_versions.module_id")),
+        sa.Column("input_hash", sa.String(255), nullable=False),
+        sa.Column("output_hash", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("last_used", sa.DateTime()),
+        sa.Column("size_bytes", sa.Integer()),
+        sa.Column("location", sa.String(512), nullable=False),
+        sa.Column("meta_info", sa.JSON()),
+        sa.Column("is_valid", sa.Boolean()),
+    )
+
+def downgrade() -> None:
+    op.drop_table("module_cache")
+    op.drop_table("module_run_results")
+    op.drop_table("canvas_runs")
+    op.drop_table("canvas_module_versions")
+    op.drop_table("module_versions")
+    op.drop_table("modules")
+    op.drop_table("canvases")
+    op.drop_table("accounts")
@@ -0,0 +1,51 @@
+"""Composite indexes for run listings, result updates, module stats and cache lookups
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COMPOSITE_INDEXES = [
+    ("ix_canvas_runs_canvas_started", "canvas_runs", ["canvas_id", "started_at"]),
+    ("ix_module_run_results_run_module", "module_run_results", ["run_id", "module_id"]),
+    ("ix_module_run_results_module_started", "module_run_results", ["module_id", "started_at"]),
+    ("ix_module_cache_module_input", "module_cache", ["module_id", "input_hash"]),
+    ("ix_module_cache_created_valid", "module_cache", ["created_at", "is_valid"]),
+]
+
+# InnoDB drops its implicit foreign key indexes once a composite index leading
+# with the column exists, so downgrading puts single-column ones back
+FOREIGN_KEY_INDEXES = [
+    ("ix_canvas_runs_canvas_id", "canvas_runs", ["canvas_id"]),
+    ("ix_module_run_results_run_id", "module_run_results", ["run_id"]),
+    ("ix_module_run_results_module_id", "module_run_results", ["module_id"]),
+    ("ix_module_cache_module_id", "module_cache", ["module_id"]),
+]
+
+def _existing_indexes(table: str) -> set:
+    if context.is_offline_mode():
+        # Nothing to inspect when only emitting SQL; assume a clean schema
+        return set()
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+def upgrade() -> None:
+    for name, table, columns in COMPOSITE_INDEXES:
+        op.create_index(name, table, columns)
+    # Left over from an earlier downgrade, now redundant
+    for name, table, _ in FOREIGN_KEY_INDEXES:
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
+
+def downgrade() -> None:
+    for name, table, columns in FOREIGN_KEY_INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+    for name, table, _ in reversed(COMPOSITE_INDEXES):
+        op.drop_index(name, table_name=table)
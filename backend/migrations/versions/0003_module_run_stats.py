@@ -0,0 +1,41 @@
+"""Pre-aggregated module run statistics
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+The table starts empty; fill it from the existing module_run_results with
+``python scripts/rebuild_run_stats.py``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "module_run_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("module_id", sa.String(50), nullable=False),
+        sa.Column("canvas_id", sa.String(50), nullable=False),
+        sa.Column("total_runs", sa.Integer(), nullable=False),
+        sa.Column("completed_runs", sa.Integer(), nullable=False),
+        sa.Column("failed_runs", sa.Integer(), nullable=False),
+        sa.Column("duration_count", sa.Integer(), nullable=False),
+        sa.Column("duration_sum", sa.Float(), nullable=False),
+        sa.Column("duration_min", sa.Float()),
+        sa.Column("duration_max", sa.Float()),
+        sa.Column("duration_sketch", sa.JSON()),
+        sa.Column("last_run_status", sa.String(50)),
+        sa.Column("last_run_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index(
+        "uix_module_run_stats_module_canvas", "module_run_stats", ["module_id", "canvas_id"], unique=True
+    )
+
+def downgrade() -> None:
+    op.drop_table("module_run_stats")
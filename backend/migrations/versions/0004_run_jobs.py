@@ -0,0 +1,38 @@
+"""Run execution queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "run_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("run_id", sa.String(50), sa.ForeignKey("canvas_runs.run_id"), nullable=False, unique=True),
+        sa.Column("account_id", sa.Integer()),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime()),
+        sa.Column("available_at", sa.DateTime()),
+        sa.Column("worker_id", sa.String(255)),
+        sa.Column("lease_expires_at", sa.DateTime()),
+        sa.Column("heartbeat_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime()),
+        sa.Column("error", sa.JSON()),
+    )
+    op.create_index("ix_run_jobs_status_priority", "run_jobs", ["status", "priority", "id"])
+    op.create_index("ix_run_jobs_status_lease", "run_jobs", ["status", "lease_expires_at"])
+
+def downgrade() -> None:
+    op.drop_table("run_jobs")
@@ -0,0 +1,28 @@
+"""Canvas scheduler state
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "canvas_schedule_state",
+        sa.Column("canvas_id", sa.String(50), primary_key=True),
+        sa.Column("last_fire_at", sa.DateTime()),
+        sa.Column("last_run_id", sa.String(50)),
+        sa.Column("last_outcome", sa.String(50)),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_canvases_updated_at", "canvases", ["updated_at"])
+
+def downgrade() -> None:
+    op.drop_index("ix_canvases_updated_at", table_name="canvases")
+    op.drop_table("canvas_schedule_state")
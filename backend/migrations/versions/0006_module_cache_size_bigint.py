@@ -0,0 +1,22 @@
+"""Widen module_cache.size_bytes for entries over 2 GiB
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Batch mode, so SQLite (which can't alter columns) copies the table
+    with op.batch_alter_table("module_cache") as batch:
+        batch.alter_column("size_bytes", existing_type=sa.Integer(), type_=sa.BigInteger())
+
+def downgrade() -> None:
+    with op.batch_alter_table("module_cache") as batch:
+        batch.alter_column("size_bytes", existing_type=sa.BigInteger(), type_=sa.Integer())
@@ -1,37 +1,38 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Optional
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Boolean, 
-    ForeignKey, JSON, Text, Enum, Float, Table, UniqueConstraint,
-    create_engine
+    Column, Integer, BigInteger, String, DateTime, Boolean, 
+    ForeignKey, JSON, Text, Enum, Float, Table, UniqueConstraint, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 
-from backend.core.config import get_settings
-
-settings = get_settings()
+from backend.db.engine import database_url, get_engine, get_async_engine
 
 # Create database URL
-DATABASE_URL = f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
-
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    pool_recycle=3600,  # Recycle connections after 1 hour
-    echo=settings.DB_ECHO,
-    connect_args={
-        "connect_timeout": 60,
-        "charset": "utf8mb4"
-    }
-)
+DATABASE_URL = database_url()
+
+# Shared SQLAlchemy engine (see backend.db.engine)
+engine = get_engine()
 
 # Create sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+@lru_cache()
+def get_async_sessionmaker():
+    """
+    Get the sessionmaker of the async engine, created on first use.
+
+    Only needed with DB_ASYNC, so sqlalchemy.ext.asyncio (which requires
+    greenlet) and the async driver are imported lazily.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    # Attributes can't be lazily refreshed outside the session's greenlet,
+    # so keep them loaded after commit
+    return async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+
 # Create base class for declarative models
 Base = declarative_base()
 
@@ -85,6 +86,10 @@ class Canvas(Base):
     runs = relationship("CanvasRun", back_populates="canvas")
     module_versions = relationship("CanvasModuleVersion", back_populates="canvas")
 
+    __table_args__ = (
+        Index('ix_canvases_updated_at', 'updated_at'),  # Scheduler refreshes
+    )
+
 class Module(Base):
     __tablename__ = "modules"
 
@@ -163,6 +168,10 @@ class CanvasRun(Base):
     canvas = relationship("Canvas", back_populates="runs")
     module_run_results = relationship("ModuleRunResult", back_populates="canvas_run")
 
+    __table_args__ = (
+        Index('ix_canvas_runs_canvas_started', 'canvas_id', 'started_at'),  # Run listings per canvas
+    )
+
 class ModuleRunResult(Base):
     __tablename__ = "module_run_results"
 
@@ -183,6 +192,74 @@ class ModuleRunResult(Base):
     # Relationships
     canvas_run = relationship("CanvasRun", back_populates="module_run_results")
 
+    __table_args__ = (
+        Index('ix_module_run_results_run_module', 'run_id', 'module_id'),  # Result updates
+        Index('ix_module_run_results_module_started', 'module_id', 'started_at'),  # Module stats
+    )
+
+class ModuleRunStatistics(Base):
+    """Rollup of finished module runs, maintained as results complete (see backend.crud.run_stats)"""
+    __tablename__ = "module_run_stats"
+
+    id = Column(Integer, primary_key=True)
+    module_id = Column(String(50), nullable=False)
+    canvas_id = Column(String(50), nullable=False, default="")  # "" = across all canvases
+    total_runs = Column(Integer, nullable=False, default=0)
+    completed_runs = Column(Integer, nullable=False, default=0)
+    failed_runs = Column(Integer, nullable=False, default=0)
+
+    # Execution time of runs that reported one, in seconds
+    duration_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0.0)
+    duration_min = Column(Float)
+    duration_max = Column(Float)
+    duration_sketch = Column(JSON)  # QuantileSketch.to_dict()
+
+    last_run_status = Column(String(50))
+    last_run_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('uix_module_run_stats_module_canvas', 'module_id', 'canvas_id', unique=True),  # Stats lookups
+    )
+
+class RunJob(Base):
+    """Queued execution of a canvas run, claimed by run workers (see backend.core.worker)"""
+    __tablename__ = "run_jobs"
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String(50), ForeignKey('canvas_runs.run_id'), unique=True, nullable=False)
+    account_id = Column(Integer)  # Owner of the canvas, for fair scheduling
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    enqueued_at = Column(DateTime, default=datetime.utcnow)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Not claimed before this
+
+    # Lease of the worker executing the job
+    worker_id = Column(String(255))
+    lease_expires_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error = Column(JSON)
+
+    __table_args__ = (
+        Index('ix_run_jobs_status_priority', 'status', 'priority', 'id'),  # Claiming
+        Index('ix_run_jobs_status_lease', 'status', 'lease_expires_at'),  # Expired lease recovery
+    )
+
+class CanvasScheduleState(Base):
+    """Last fire of a canvas schedule, kept by the scheduler (see backend.core.scheduler)"""
+    __tablename__ = "canvas_schedule_state"
+
+    canvas_id = Column(String(50), primary_key=True)
+    last_fire_at = Column(DateTime)  # Nominal time of the last fire, claimed by one scheduler
+    last_run_id = Column(String(50))
+    last_outcome = Column(String(50))  # queued, skipped_running, skipped_misfire
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 class ModuleCache(Base):
     __tablename__ = "module_cache"
 
@@ -192,15 +269,14 @@ class ModuleCache(Base):
     output_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     last_used = Column(DateTime, default=datetime.utcnow)
-    size_bytes = Column(Integer)
+    size_bytes = Column(BigInteger)
     
     # Cache details
     location = Column(String(512), nullable=False)  # S3/local path
     meta_info = Column(JSON, default={})
     is_valid = Column(Boolean, default=True)
 
-    class Config:
-        indexes = [
-            ('module_id', 'input_hash'),  # For quick cache lookups
-            ('created_at', 'is_valid'),   # For cache cleanup
-        ] 
\ No newline at end of file
+    __table_args__ = (
+        Index('ix_module_cache_module_input', 'module_id', 'input_hash'),  # For quick cache lookups
+        Index('ix_module_cache_created_valid', 'created_at', 'is_valid'),  # For cache cleanup
+    ) 
\ No newline at end of file
@@ -30,6 +30,17 @@ class ModuleVersionResponse(ModuleVersionBase):
     class Config:
         from_attributes = True
 
+class ModuleVersionSummary(BaseModel):
+    """Schema for a module version in listings, without code or config"""
+    id: int
+    module_id: str
+    version: str
+    is_active: Optional[bool] = True
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class ModuleBase(BaseModel):
     """Base Module Schema"""
     name: str
@@ -64,4 +75,16 @@ class ModuleResponse(ModuleBase):
     versions: List[ModuleVersionResponse] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ModuleSummaryResponse(ModuleBase):
+    """Schema for module listings: versions are summarized without their code"""
+    id: int
+    module_id: str
+    account_id: int
+    created_at: datetime
+    updated_at: datetime
+    versions: List[ModuleVersionSummary] = []
+
+    class Config:
+        from_attributes = True
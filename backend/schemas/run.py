@@ -21,12 +21,17 @@ class ModuleRunResultCreate(ModuleRunResultBase):
     run_id: str
 
 class ModuleRunResult(ModuleRunResultBase):
-    id: int
-    run_id: str
+    id: Optional[int] = None
+    run_id: Optional[str] = None
+    version: Optional[str] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
+    execution_time: Optional[float] = None
     input_hash: Optional[str] = None
     output_hash: Optional[str] = None
+    output: Optional[Dict[str, Any]] = None
+    # What of the output is stored with the run (see backend.core.outputs)
+    stored_output: Optional[Dict[str, Any]] = Field(default=None, exclude=True)
 
     class Config:
         from_attributes = True
@@ -74,9 +79,19 @@ class CanvasRunResponse(CanvasRunBase):
         from_attributes = True
 
 class ModuleRunStats(BaseModel):
+    module_id: Optional[str] = None
+    canvas_id: Optional[str] = None
     total_runs: int = 0
     completed_runs: int = 0
     failed_runs: int = 0
     average_duration: Optional[float] = None
+    min_duration: Optional[float] = None
+    max_duration: Optional[float] = None
+    p50_duration: Optional[float] = None
+    p95_duration: Optional[float] = None
+    p99_duration: Optional[float] = None
     success_rate: Optional[float] = None
-    error_count: int = 0 
\ No newline at end of file
+    error_count: int = 0
+    last_run_status: Optional[str] = None
+    last_run_at: Optional[datetime] = None
+ 
\ No newline at end of file
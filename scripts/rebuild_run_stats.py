@@ -0,0 +1,28 @@
+"""
+Rebuild the module run statistics (module_run_stats) from module_run_results.
+
+Run it once after migrating to revision 0003, or to repair the rollups. Best
+run while no canvases are executing.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+
+from backend.crud.run_stats import RunStatsCRUD
+from backend.models.database import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = RunStatsCRUD.rebuild(db)
+        logger.info(f"Rebuilt {rows} module run statistics rows")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
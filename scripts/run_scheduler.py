@@ -0,0 +1,34 @@
+"""
+Scheduler: queues the runs of canvases with a schedule_config when they are due.
+
+    python scripts/run_scheduler.py
+
+The runs are executed by the run workers (scripts/run_worker.py). More than
+one scheduler can run for availability; each fire is queued only once.
+SIGINT/SIGTERM stop it.
+"""
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import logging
+import signal
+
+from backend.core.scheduler import CanvasScheduler
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+async def serve(scheduler: CanvasScheduler):
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+    await scheduler.run()
+
+def main():
+    asyncio.run(serve(CanvasScheduler()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Run worker: executes the canvas runs queued by POST /runs/{run_id}/execute.
+
+    python scripts/run_worker.py --concurrency 4
+
+Start as many as needed, on as many hosts as needed. SIGINT/SIGTERM stop
+claiming runs and wait for the active ones; a second signal cancels them,
+and their runs are picked up again by another worker once the lease expires.
+"""
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from backend.core.backends import get_execution_backend
+from backend.core.cache import get_cache_manager
+from backend.core.worker import RunWorker
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+async def serve(worker: RunWorker):
+    task = asyncio.create_task(worker.run())
+    loop = asyncio.get_running_loop()
+
+    def handle_signal():
+        if worker.stopping:
+            logger.warning("Cancelling active runs")
+            task.cancel()
+        else:
+            logger.info("Stopping, waiting for active runs (signal again to cancel them)")
+            worker.stop()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, handle_signal)
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, help="Runs executed at once (default RUN_WORKER_CONCURRENCY)")
+    parser.add_argument("--worker-id", help="Name of this worker in run_jobs (default host:pid:random)")
+    args = parser.parse_args()
+
+    worker = RunWorker(worker_id=args.worker_id, concurrency=args.concurrency)
+    try:
+        asyncio.run(serve(worker))
+    finally:
+        get_execution_backend().shutdown()
+        get_cache_manager().shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Artifact passing test.
+
+Checks that large declared outputs, including numpy views (reshaped,
+transposed) and DataFrames, cross into worker processes as memory-mapped
+artifacts rather than pickled copies, and come back equal:
+
+    python scripts/test_artifacts.py
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.artifacts import ArtifactRef, ArtifactStore, load_artifact
+from backend.core.backends import _run_in_worker
+
+MB = 1024 ** 2
+
+def check_share(root: str) -> List[Tuple[str, bool]]:
+    store = ArtifactStore("run", root=root, inline_max_bytes=MB)
+    big = np.arange(4 * MB // 8, dtype=np.float64)
+    values = {
+        "reshaped": big.reshape(64, -1),
+        "transposed": big.reshape(64, -1).T,
+        "frame": pd.DataFrame(big.reshape(-1, 4), columns=list("abcd")),
+        "small_slice": big[:16],
+        "small": np.arange(10),
+    }
+    for name, value in values.items():
+        store.put("m", name, value)
+    shared = {name: store.share("m", name) for name in values}
+    checks = [
+        (f"{name} is shared by reference", isinstance(shared[name], ArtifactRef))
+        for name in ("reshaped", "transposed", "frame")
+    ] + [
+        (f"{name} is shared inline", not isinstance(shared[name], ArtifactRef))
+        for name in ("small_slice", "small")
+    ]
+    checks.append(("transposed round-trips", np.array_equal(load_artifact(shared["transposed"]), values["transposed"])))
+    checks.append(("frame round-trips", load_artifact(shared["frame"]).equals(values["frame"])))
+    store.close()
+    checks.append(("close removes the files", not os.path.exists(store.directory)))
+    return checks
+
+def check_worker(root: str) -> List[Tuple[str, bool]]:
+    code = "import numpy as np\nmatrix = np.ones((512, 512)).T\ncount = 3"
+    outcome = _run_in_worker("m", "1", code, "canvas", "run", {}, {}, {}, ["matrix", "count"], root, MB)
+    matrix = outcome["artifacts"].get("matrix")
+    return [
+        ("worker spills a large transposed output", isinstance(matrix, ArtifactRef)),
+        ("worker keeps small outputs inline", outcome["output"].get("count") == 3),
+        ("spilled output round-trips", matrix is not None and np.array_equal(load_artifact(matrix), np.ones((512, 512)))),
+    ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        for check in (check_share, check_worker):
+            for description, ok in check(root):
+                print(f"{'PASS' if ok else 'FAIL'}  {description}")
+                passed = passed and ok
+    print("\nArtifacts are passed by reference" if passed else "\nArtifact regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Cache hit isolation test.
+
+Executes a canvas three times with the memory cache and the thread backend.
+The upstream module is served from the cache after the first run and its
+downstream module doubles the values it gets in place, through a shared
+variable and through ``previous_results``. Every run must compute the same
+totals, which it can't if a cache hit hands out the cached objects
+themselves. A module whose output can't be hashed (it holds a lock) must
+complete without being cached, and so must the module downstream of it.
+A large declared output spilled to the cache and evicted since must be
+spilled again by the next cache hit, so the run's reference to it resolves:
+
+    python scripts/test_cache_hits.py
+"""
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["EXECUTOR_BACKEND"] = "thread"
+
+from typing import List, Tuple
+
+from backend.core.cache import get_cache_manager
+from backend.core.executor import CanvasExecutor
+from backend.models.database import Canvas, ModuleVersion
+
+UPSTREAM_CODE = """
+import numpy as np
+
+params = {"x": 6}
+values = np.array([1.0, 2.0, 3.0])
+context.set_var("params", params)
+cached_results = ["params", "values"]
+"""
+
+DOWNSTREAM_CODE = """
+params = context.get_var("params")
+params["x"] *= 2
+values = previous_results["upstream"]["values"]
+values *= 2
+total = params["x"]
+values_total = float(values.sum())
+"""
+
+LOCK_CODE = """
+import threading
+
+lock = threading.Lock()
+cached_results = ["lock"]
+"""
+
+AFTER_LOCK_CODE = """
+value = 1
+cached_results = ["value"]
+"""
+
+SPILL_CODE = """
+import numpy as np
+
+big = np.ones(100_000)
+cached_results = ["big"]
+"""
+
+def canvas() -> Canvas:
+    return Canvas(canvas_id="cache-hits", name="cache-hits", module_config={
+        "upstream": {
+            "module_id": "upstream",
+            "version": ModuleVersion(module_id="upstream", version="1", code=UPSTREAM_CODE, config={})
+        },
+        "downstream": {
+            "module_id": "downstream",
+            "version": ModuleVersion(module_id="downstream", version="1", code=DOWNSTREAM_CODE, config={}),
+            "depends_on": ["upstream"]
+        }
+    })
+
+def unhashable_canvas() -> Canvas:
+    return Canvas(canvas_id="unhashable", name="unhashable", module_config={
+        "locker": {
+            "module_id": "locker",
+            "version": ModuleVersion(module_id="locker", version="1", code=LOCK_CODE, config={})
+        },
+        "after": {
+            "module_id": "after",
+            "version": ModuleVersion(module_id="after", version="1", code=AFTER_LOCK_CODE, config={}),
+            "depends_on": ["locker"]
+        }
+    })
+
+def spill_canvas() -> Canvas:
+    return Canvas(canvas_id="spill", name="spill", module_config={
+        "spiller": {
+            "module_id": "spiller",
+            "version": ModuleVersion(module_id="spiller", version="1", code=SPILL_CODE, config={"outputs": ["big"]})
+        }
+    })
+
+async def execute_spill() -> List[Tuple[bool, bool]]:
+    """Cache hit and whether the spilled output resolves, before and after evicting the spill"""
+    cache_manager = get_cache_manager()
+    runs = []
+    for evict in (False, False, True):
+        result = (await CanvasExecutor(spill_canvas()).execute())["spiller"]
+        reference = result.stored_output["big"]["$cache"]
+        if evict:
+            with cache_manager.memory._lock:
+                cache_manager.memory._remove((reference["module_id"], reference["key"]))
+            result = (await CanvasExecutor(spill_canvas()).execute())["spiller"]
+        spilled = cache_manager.get(reference["module_id"], reference["key"])
+        runs.append((result.metrics.get("cache_hit"), spilled is not None and spilled["value"].sum() == 100_000))
+    return runs
+
+async def execute_unhashable(count: int) -> List[dict]:
+    return [await CanvasExecutor(unhashable_canvas()).execute() for _ in range(count)]
+
+async def execute_runs(count: int) -> List[Tuple[bool, object, object]]:
+    runs = []
+    for _ in range(count):
+        results = await CanvasExecutor(canvas()).execute()
+        output = results["downstream"].output or {}
+        runs.append((results["upstream"].metrics.get("cache_hit"), output.get("total"), output.get("values_total")))
+    return runs
+
+def main() -> int:
+    runs = asyncio.run(execute_runs(3))
+    unhashable = asyncio.run(execute_unhashable(2))
+    spill = asyncio.run(execute_spill())
+    checks = [
+        ("first run executes the upstream module", runs[0][0] is False),
+        ("later runs are served from the cache", all(hit for hit, _, _ in runs[1:])),
+        ("shared variable changed downstream gives the same total every run", [t for _, t, _ in runs] == [12] * 3),
+        ("output changed downstream gives the same total every run", [v for _, _, v in runs] == [12.0] * 3),
+        ("module with an unhashable output completes", all(
+            r["locker"].status == "completed" and r["after"].status == "completed" for r in unhashable
+        )),
+        ("module with an unhashable output has no hash", unhashable[-1]["locker"].output_hash is None),
+        ("module with an unhashable output isn't cached", unhashable[-1]["locker"].metrics.get("cache_hit") is False),
+        ("module downstream of an unhashable output isn't cached", unhashable[-1]["after"].input_hash is None
+         and not unhashable[-1]["after"].metrics.get("cache_hit")),
+        ("large declared output is spilled", spill[0] == (False, True)),
+        ("cache hit keeps the spilled output", spill[1] == (True, True)),
+        ("cache hit spills an evicted output again", spill[2] == (True, True)),
+    ]
+    passed = True
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nCache hits are isolated" if passed else "\nCache hit regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Cache sizing test.
+
+Checks that ``estimate_size`` counts the buffers of numpy views (reshape,
+transpose, slices, ``df.values``) and counts shared buffers once, and that
+the memory tier's byte budget and per-module quota hold for views:
+
+    python scripts/test_cache_sizing.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.cache.memory import MemoryCacheTier
+from backend.core.cache.sizing import estimate_size
+
+MB = 1024 ** 2
+
+def check_views() -> List[Tuple[str, bool]]:
+    array = np.zeros(10 * MB // 8)
+    frame = pd.DataFrame(np.zeros((1000, 1000)))
+    return [
+        ("array counts its buffer", estimate_size(array) >= array.nbytes),
+        ("reshape counts the buffer", estimate_size(array.reshape(10, -1)) >= array.nbytes),
+        ("transpose counts the buffer", estimate_size(array.reshape(10, -1).T) >= array.nbytes),
+        ("slice counts the buffer it keeps alive", estimate_size(array[:10]) >= array.nbytes),
+        ("df.values counts the buffer", estimate_size(frame.values) >= frame.values.nbytes),
+        ("array and its view count once", estimate_size([array, array.T]) < 2 * array.nbytes),
+        ("view and its array count once", estimate_size([array.T, array]) < 2 * array.nbytes),
+        ("two views of an array count once", estimate_size({"a": array[:5], "b": array[5:]}) < 2 * array.nbytes),
+        ("separate arrays count twice", estimate_size([array, array.copy()]) >= 2 * array.nbytes),
+        ("frame counts its columns", estimate_size(frame) >= frame.values.nbytes),
+    ]
+
+def check_memory_tier() -> List[Tuple[str, bool]]:
+    array = np.zeros(10 * MB // 8)
+    tier = MemoryCacheTier(max_bytes=25 * MB, module_quota_bytes=15 * MB)
+    tier.set("a", "1", {"variables": {"x": array.reshape(10, -1)}})
+    tier.set("a", "2", {"variables": {"x": array.copy().T}})
+    quota_evicted = tier.get("a", "1") is None and tier.get("a", "2") is not None
+    tier.set("b", "1", {"variables": {"x": array.copy()[::2]}})
+    tier.set("c", "1", {"variables": {"x": array.copy().reshape(-1, 10)}})
+    stats = tier.stats()
+    rejected = tier.set("d", "1", {"variables": {"x": np.zeros(30 * MB // 8).reshape(2, -1)}})
+    return [
+        ("budget holds with views", stats["size_bytes"] <= 25 * MB),
+        ("quota evicts a module's own views", quota_evicted),
+        ("views over the budget are rejected", rejected is False),
+    ]
+
+def main() -> int:
+    passed = True
+    for check in (check_views, check_memory_tier):
+        for description, ok in check():
+            print(f"{'PASS' if ok else 'FAIL'}  {description}")
+            passed = passed and ok
+    print("\nSizes are accounted" if passed else "\nSizing regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
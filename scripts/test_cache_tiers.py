@@ -0,0 +1,136 @@
+"""
+Cache tier isolation test.
+
+Checks that every hit of the memory and disk tiers gets objects of its own,
+so changing a cached value in place can't alter the entry, that values the
+memory tier can't snapshot are not cached, that the hit and miss
+counters hold under concurrent lookups, and that disk hits record their last
+use in the ``module_cache`` table in batches rather than one commit per hit:
+
+    python scripts/test_cache_tiers.py
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.cache.disk import DiskCacheTier
+from backend.core.cache.memory import MemoryCacheTier
+from backend.models.database import Base, ModuleCache
+
+def entry() -> dict:
+    return {
+        "variables": {
+            "d": {"x": 6},
+            "array": np.arange(4.0),
+            "frame": pd.DataFrame({"a": [1, 2]})
+        },
+        "shared_vars": {"var_total": [1]},
+        "output_hash": "hash"
+    }
+
+def mutate(data: dict):
+    variables = data["variables"]
+    variables["d"]["x"] *= 2
+    variables["array"] *= 2
+    variables["frame"]["a"] *= 2
+    data["shared_vars"]["var_total"].append(2)
+
+def unchanged(data: dict) -> bool:
+    variables = data["variables"]
+    return (
+        variables["d"] == {"x": 6}
+        and variables["array"].tolist() == [0.0, 1.0, 2.0, 3.0]
+        and variables["frame"]["a"].tolist() == [1, 2]
+        and data["shared_vars"]["var_total"] == [1]
+    )
+
+def check_isolation(tier, name: str) -> List[Tuple[str, bool]]:
+    stored = entry()
+    tier.set("module", "key", stored)
+    mutate(stored)
+    first = tier.get("module", "key")
+    first_unchanged = unchanged(first)
+    mutate(first)
+    return [
+        (f"{name}: changing the stored value leaves the entry alone", first_unchanged),
+        (f"{name}: changing a hit leaves the entry alone", unchanged(tier.get("module", "key"))),
+    ]
+
+def check_memory_tier() -> List[Tuple[str, bool]]:
+    tier = MemoryCacheTier(max_bytes=1024 ** 2)
+    checks = check_isolation(tier, "memory")
+    checks.append(("memory: unpicklable values aren't cached", tier.set("module", "lock", {"v": threading.Lock()}) is False))
+    checks.append(("memory: unpicklable values are rejected", tier.stats()["rejections"] == 1))
+    return checks
+
+def check_disk_tier(root: str) -> List[Tuple[str, bool]]:
+    tier = DiskCacheTier(root=root, max_bytes=1024 ** 3)
+    checks = check_isolation(tier, "disk")
+    before = tier.stats()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: tier.get("module", "key" if i % 2 else "missing"), range(400)))
+    stats = tier.stats()
+    checks.append((
+        "disk: concurrent hits and misses are all counted",
+        (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (200, 200)
+    ))
+    return checks
+
+def check_touch_batching(root: str) -> List[Tuple[str, bool]]:
+    engine = create_engine(f"sqlite:///{os.path.join(root, 'cache.db')}")
+    Base.metadata.create_all(engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+    tier = DiskCacheTier(
+        root=os.path.join(root, "tracked"),
+        max_bytes=1024 ** 3,
+        session_factory=sessionmaker(bind=engine),
+        touch_interval=0.2
+    )
+    for key in ("a", "b"):
+        tier.set("module", key, entry())
+
+    def last_used() -> dict:
+        with sessionmaker(bind=engine)() as db:
+            return {row.input_hash: row.last_used for row in db.query(ModuleCache).all()}
+
+    before, written = last_used(), len(commits)
+    for _ in range(50):
+        tier.get("module", "a")
+        tier.get("module", "b")
+    hit_commits = len(commits) - written
+    time.sleep(0.3)
+    tier.get("module", "a")  # Due now, starts a background flush
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and last_used() == before:
+        time.sleep(0.05)
+    after = last_used()
+    engine.dispose()
+    return [
+        ("disk: hits before the touch interval don't commit", hit_commits == 0),
+        ("disk: a due flush records the last use of every entry hit", all(after[k] > before[k] for k in ("a", "b"))),
+    ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        checks = check_memory_tier() + check_disk_tier(root) + check_touch_batching(root)
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nCache hits are isolated" if passed else "\nCache tier regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
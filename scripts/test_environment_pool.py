@@ -0,0 +1,73 @@
+"""
+Environment worker test.
+
+Executes modules in the warm worker of an environment (this interpreter, in
+place of a built one) and interrupts a call while the worker is still
+executing: the worker must be stopped rather than reused, so the next
+request gets its own outcome and not the interrupted one's:
+
+    python scripts/test_environment_pool.py
+"""
+import sys
+import os
+import signal
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from backend.core.environments import EnvironmentPool
+
+REQUIREMENTS = ["example==1.0"]
+
+class Interrupted(Exception):
+    pass
+
+def request(code: str, artifact_dir: str) -> tuple:
+    return ("module", "1", code, "canvas", "run", {}, {}, {}, [], artifact_dir, 1024, None)
+
+def interrupt(signum, frame):
+    raise Interrupted()
+
+def check_interrupted_call(pool: EnvironmentPool, artifact_dir: str) -> List[Tuple[str, bool]]:
+    first = pool.execute(REQUIREMENTS, request("which = 'warm'", artifact_dir))
+    environment = next(iter(pool._environments.values()))
+    worker = environment._idle[-1]
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, 0.2)
+    try:
+        pool.execute(REQUIREMENTS, request("import time\ntime.sleep(1)\nwhich = 'interrupted'", artifact_dir))
+        interrupted = False
+    except Interrupted:
+        interrupted = True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+    second = pool.execute(REQUIREMENTS, request("which = 'next'", artifact_dir))
+    return [
+        ("module runs in an environment worker", first["output"].get("which") == "warm"),
+        ("interrupted call is raised", interrupted),
+        ("interrupted worker is stopped", not worker.alive),
+        ("next request gets its own outcome", second["output"].get("which") == "next"),
+    ]
+
+def main() -> int:
+    passed = True
+    builder = SimpleNamespace(ensure=lambda requirements: sys.executable)
+    pool = EnvironmentPool(builder, workers_per_environment=1)
+    try:
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            checks = check_interrupted_call(pool, artifact_dir)
+    finally:
+        pool.close()
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nInterrupted workers are replaced" if passed else "\nEnvironment worker regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
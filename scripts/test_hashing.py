@@ -0,0 +1,108 @@
+"""
+Content hashing test.
+
+Checks that ``backend.core.hashing`` gives stable digests for the values
+modules produce: object columns holding lists and dicts, extension dtypes and
+plain objects holding sets, that the digests are the same in another process
+(with another PYTHONHASHSEED), and that values that can't be hashed by
+content (locks) raise instead of colliding:
+
+    python scripts/test_hashing.py
+"""
+import sys
+import os
+import json
+import subprocess
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.hashing import UnhashableValueError, hash_module_inputs, hash_value
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Model:
+    """A plain object, like a fitted model, with unordered state"""
+
+    def __init__(self, weights, labels):
+        self.weights = weights
+        self.labels = labels
+
+def sample_values() -> dict:
+    """Values whose digests must not depend on the process computing them"""
+    return {
+        "object_lists": pd.DataFrame({"tags": [["a", "b"], [], ["c"]], "n": [1, 2, 3]}),
+        "object_dicts": pd.Series([{"a": 1}, {"b": [2, 3]}, None], name="params"),
+        "object_strings": pd.DataFrame({"name": ["x", "y", None]}),
+        "nullable_int": pd.Series([1, None, 3], dtype="Int64"),
+        "string": pd.Series(["a", None, "c"], dtype="string"),
+        "category": pd.Series(["a", "b", "a"], dtype="category"),
+        "datetime_tz": pd.Series(pd.date_range("2024-01-01", periods=3, tz="UTC")),
+        "object_with_sets": Model(np.arange(3.0), {"cat", "dog", "bird", frozenset({"x", "y"})}),
+        "array_view": np.arange(12, dtype=np.float64).reshape(3, 4).T,
+    }
+
+def digests() -> dict:
+    return {name: hash_value(value) for name, value in sample_values().items()}
+
+def check_equal_values() -> List[Tuple[str, bool]]:
+    """Equal values hash equal, different values differ"""
+    lists = pd.DataFrame({"tags": [["a", "b"], [], ["c"]]})
+    return [
+        ("list column is stable", hash_value(lists) == hash_value(lists.copy(deep=True))),
+        ("list column content matters", hash_value(lists) != hash_value(pd.DataFrame({"tags": [["a"], [], ["c"]]}))),
+        ("list and tuple columns differ", hash_value(lists) != hash_value(pd.DataFrame({"tags": [("a", "b"), (), ("c",)]}))),
+        ("extension dtype content matters", hash_value(pd.Series([1, None], dtype="Int64")) != hash_value(pd.Series([1, 2], dtype="Int64"))),
+        ("object state matters", hash_value(Model(np.arange(3.0), {"a"})) != hash_value(Model(np.arange(3.0), {"b"}))),
+        ("object type matters", hash_value(Model(1, 2)) != hash_value(SimpleNamespace(weights=1, labels=2))),
+        ("views hash as their content", hash_value(np.arange(6).reshape(2, 3).T) == hash_value(np.ascontiguousarray(np.arange(6).reshape(2, 3).T))),
+        ("input hash covers the config", hash_module_inputs("x = 1", {"a": 1}) != hash_module_inputs("x = 1", {"a": 2})),
+    ]
+
+def check_unhashable() -> List[Tuple[str, bool]]:
+    """Values without content to hash raise, however deep they are"""
+    checks = []
+    for description, value in (
+        ("lock", threading.Lock()),
+        ("lock in a dict", {"lock": threading.Lock(), "frame": pd.DataFrame({"a": [1.0]})}),
+        ("lock in an object", Model(threading.Lock(), set())),
+    ):
+        try:
+            hash_value(value)
+            raised = False
+        except UnhashableValueError:
+            raised = True
+        checks.append((f"{description} can't be hashed", raised))
+    return checks
+
+def check_other_process() -> List[Tuple[str, bool]]:
+    """Digests computed by a fresh interpreter, with other set orders, match these"""
+    env = {**os.environ, "PYTHONHASHSEED": str(os.getpid() % 1000 + 1)}
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--digests"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True, env=env
+    )
+    theirs = json.loads(process.stdout)
+    ours = digests()
+    return [(f"{name} is stable across processes", ours[name] == theirs.get(name)) for name in ours]
+
+def main() -> int:
+    if "--digests" in sys.argv:
+        print(json.dumps(digests()))
+        return 0
+    checks: List[Callable[[], List[Tuple[str, bool]]]] = [check_equal_values, check_unhashable, check_other_process]
+    passed = True
+    for check in checks:
+        for description, ok in check():
+            print(f"{'PASS' if ok else 'FAIL'}  {description}")
+            passed = passed and ok
+    print("\nHashing is stable" if passed else "\nHashing regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Query-plan regression test.
+
+Runs EXPLAIN on the hot lookups of the CRUD layer and checks each one is
+served by the index added for it (see backend/migrations). Works against
+MySQL and SQLite:
+
+    python scripts/test_query_plans.py                      # configured database
+    python scripts/test_query_plans.py --url sqlite:///plans.db --migrate
+
+On MySQL run it against a database with representative data; with (nearly)
+empty tables the optimizer may legitimately prefer a table scan.
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.engine import Engine
+
+from backend.crud.run import RUN_KEYSET
+from backend.db.engine import database_url
+from backend.models.database import Canvas, CanvasRun, ModuleRunResult, ModuleRunStatistics, ModuleCache, RunJob
+
+def hot_queries() -> List[Tuple[str, object, str]]:
+    """(description, statement, expected index) of every query under test"""
+    return [
+        (
+            "RunCRUD.get_runs_by_canvas (first page)",
+            RUN_KEYSET.apply(select(CanvasRun).where(CanvasRun.canvas_id == "canvas")).limit(100),
+            "ix_canvas_runs_canvas_started"
+        ),
+        (
+            "RunCRUD.get_runs_by_canvas (after a cursor)",
+            RUN_KEYSET.apply(
+                select(CanvasRun).where(CanvasRun.canvas_id == "canvas"),
+                [datetime(2024, 1, 1), 1000]
+            ).limit(100),
+            "ix_canvas_runs_canvas_started"
+        ),
+        (
+            "RunCRUD.update_module_result",
+            select(ModuleRunResult).where(
+                ModuleRunResult.run_id == "run",
+                ModuleRunResult.module_id == "module"
+            ),
+            "ix_module_run_results_run_module"
+        ),
+        (
+            "RunCRUD.get_module_stats",
+            select(ModuleRunStatistics).where(
+                ModuleRunStatistics.module_id == "module",
+                ModuleRunStatistics.canvas_id == ""
+            ),
+            "uix_module_run_stats_module_canvas"
+        ),
+        (
+            "RunJobCRUD.claim",
+            select(RunJob).where(
+                RunJob.status == "queued",
+                RunJob.available_at <= datetime(2024, 1, 1)
+            ).order_by(RunJob.priority.desc(), RunJob.id.asc()).limit(50),
+            "ix_run_jobs_status_priority"
+        ),
+        (
+            "RunJobCRUD.requeue_expired",
+            select(RunJob).where(
+                RunJob.status == "running",
+                RunJob.lease_expires_at < datetime(2024, 1, 1)
+            ),
+            "ix_run_jobs_status_lease"
+        ),
+        (
+            "ScheduleCRUD.get_canvases (refresh)",
+            select(Canvas.canvas_id, Canvas.schedule_config).where(Canvas.updated_at >= datetime(2024, 1, 1)),
+            "ix_canvases_updated_at"
+        ),
+        (
+            "CacheCRUD.get_entry",
+            select(ModuleCache).where(
+                ModuleCache.module_id == "module",
+                ModuleCache.input_hash == "hash",
+                ModuleCache.is_valid == True
+            ),
+            "ix_module_cache_module_input"
+        ),
+    ]
+
+def explain(engine: Engine, statement) -> Tuple[List[str], Optional[str]]:
+    """Get the indexes a statement's plan uses, and a note when the plan is inconclusive"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).mappings().all()
+            used = [
+                row["detail"].split(" INDEX ")[1].split(" ")[0]
+                for row in rows if " INDEX " in row["detail"]
+            ]
+            return used, None
+
+        rows = connection.execute(text(f"EXPLAIN {sql}")).mappings().all()
+        used = [row["key"] for row in rows if row["key"]]
+        extra = " ".join(str(row.get("Extra") or "") for row in rows)
+        if not used and ("no matching row" in extra or "Impossible WHERE" in extra):
+            return used, extra
+        return used, None
+
+def test_query_plans(engine: Engine) -> bool:
+    passed = True
+    for description, statement, expected in hot_queries():
+        used, note = explain(engine, statement)
+        if expected in used:
+            print(f"PASS  {description}: {expected}")
+        elif note:
+            print(f"SKIP  {description}: {note}")
+        else:
+            passed = False
+            print(f"FAIL  {description}: expected {expected}, plan uses {used or 'no index'}")
+    return passed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Database URL (defaults to the DB_* settings)")
+    parser.add_argument("--migrate", action="store_true", help="Run alembic upgrade head first")
+    args = parser.parse_args()
+
+    url = args.url or database_url()
+    if args.migrate:
+        from alembic import command
+        from alembic.config import Config
+        from backend.db.init_db import ALEMBIC_INI
+
+        config = Config(ALEMBIC_INI)
+        config.set_main_option("sqlalchemy.url", url)
+        command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    try:
+        passed = test_query_plans(engine)
+    finally:
+        engine.dispose()
+    print("\nAll hot queries use their indexes" if passed else "\nQuery plan regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Read endpoint test.
+
+Serves the read endpoints from a SQLite database through the sync CRUD and,
+when aiosqlite is installed, through the async CRUD (DB_ASYNC), switching
+between them at runtime, and checks both give the same responses and that
+the async engine's pool reports its checkouts:
+
+    python scripts/test_read_endpoints.py
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import backend.api.dependencies as dependencies
+from backend.api.app import app
+from backend.core.config import get_settings
+from backend.db.engine import InstrumentedAsyncQueuePool, get_pool_metrics
+from backend.models.database import Account, Base, Canvas, CanvasRun, Module, ModuleVersion
+
+try:
+    import aiosqlite  # noqa: F401
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+except ImportError:
+    aiosqlite = None
+
+URLS = [
+    "/api/v1/accounts/",
+    "/api/v1/accounts/1",
+    "/api/v1/canvases?account_id=1",
+    "/api/v1/canvases/canvas",
+    "/api/v1/canvases/missing",
+    "/api/v1/modules/",
+    "/api/v1/modules/module",
+    "/api/v1/modules/module/versions",
+    "/api/v1/modules/module/versions/1",
+    "/api/v1/runs/run",
+    "/api/v1/runs/run/modules",
+    "/api/v1/runs/canvas/canvas/runs",
+]
+
+def seed(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        db.add(Account(email="user@example.com", name="user"))
+        db.add(Canvas(canvas_id="canvas", name="canvas", account_id=1, module_config={}))
+        db.add(Module(module_id="module", name="module", type="python", account_id=1, created_at=now, updated_at=now))
+        db.add(ModuleVersion(module_id="module", version="1", code="x = 1"))
+        db.add(CanvasRun(run_id="run", canvas_id="canvas", status="running", started_at=now))
+        db.commit()
+    return engine
+
+def fetch(client: TestClient) -> Dict[str, Tuple[int, str]]:
+    responses = {}
+    for url in URLS:
+        response = client.get(url)
+        responses[url] = (response.status_code, response.text)
+    return responses
+
+def main() -> int:
+    settings = get_settings()
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "reads.db")
+        engine = seed(path)
+        dependencies.SessionLocal = sessionmaker(bind=engine)
+        client = TestClient(app)
+
+        settings.DB_ASYNC = False
+        sync_responses = fetch(client)
+        checks: List[Tuple[str, bool]] = [
+            (f"sync {url}", status == (404 if "missing" in url else 200))
+            for url, (status, _) in sync_responses.items()
+        ]
+        if aiosqlite is not None:
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=InstrumentedAsyncQueuePool)
+            dependencies.get_async_sessionmaker = lambda: async_sessionmaker(async_engine, expire_on_commit=False)
+            settings.DB_ASYNC = True
+            async_responses = fetch(client)
+            settings.DB_ASYNC = False
+            checks += [(f"async {url} matches sync", async_responses[url] == sync_responses[url]) for url in URLS]
+            pool = get_pool_metrics(async_engine)
+            checks.append(("async pool reports its checkouts", pool["checkouts"] >= len(URLS) and pool["checked_out"] == 0))
+        else:
+            print("SKIP  async reads: aiosqlite is not installed")
+        engine.dispose()
+
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nRead endpoints agree" if passed else "\nRead endpoint regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Run cleanup test.
+
+Executes canvases that fail before any module starts, one whose module
+version doesn't exist and one whose declared input no upstream module
+produces, and checks that each run still finishes: the error is raised, a
+failed run_finished event is published, the run's event stream is closed and
+its artifact directory is removed:
+
+    python scripts/test_run_cleanup.py
+"""
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["EXECUTOR_BACKEND"] = "thread"
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.core import events
+from backend.core.artifacts import ArtifactStore
+from backend.core.events import RunEventBus
+from backend.core.executor import CanvasExecutor
+from backend.models.database import Base, Canvas, Module, ModuleVersion
+
+def missing_version_canvas() -> Canvas:
+    return Canvas(canvas_id="missing", name="missing", module_config={
+        "module": {"module_id": "module", "version": "9"}
+    })
+
+def unbound_input_canvas() -> Canvas:
+    return Canvas(canvas_id="unbound", name="unbound", module_config={
+        "producer": {
+            "module_id": "producer",
+            "version": ModuleVersion(module_id="producer", version="1", code="a = 1", config={"outputs": ["a"]})
+        },
+        "consumer": {
+            "module_id": "consumer",
+            "version": ModuleVersion(module_id="consumer", version="1", code="b = a", config={"inputs": ["b"]}),
+            "depends_on": ["producer"]
+        }
+    })
+
+def check_cleanup(name: str, canvas: Canvas, root: str, db: Optional[Session] = None) -> List[Tuple[str, bool]]:
+    bus = RunEventBus()
+    executor = CanvasExecutor(canvas, db=db, run_id=name, event_bus=bus)
+    executor.context.artifacts = ArtifactStore(name, root=root)
+    os.makedirs(executor.context.artifacts.directory)
+    # A leftover artifact file of the run
+    open(os.path.join(executor.context.artifacts.directory, "leftover"), "wb").close()
+
+    try:
+        asyncio.run(executor.execute())
+        raised = False
+    except ValueError:
+        raised = True
+    channel = bus._runs.get(name)
+    published = list(channel.events) if channel else []
+    return [
+        (f"{name}: the error is raised", raised),
+        (f"{name}: a failed run_finished is published", bool(published) and published[-1]["type"] == events.RUN_FINISHED
+         and published[-1]["data"]["status"] == "failed"),
+        (f"{name}: the error is logged", any(e["type"] == events.LOG for e in published)),
+        (f"{name}: the event stream is closed", channel is not None and channel.closed_at is not None),
+        (f"{name}: the artifacts are removed", not os.path.exists(executor.context.artifacts.directory)),
+    ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        engine = create_engine(f"sqlite:///{os.path.join(root, 'cleanup.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            now = datetime.utcnow()
+            db.add(Module(module_id="module", name="module", type="python", created_at=now, updated_at=now))
+            db.add(ModuleVersion(module_id="module", version="1", code="x = 1", config={}))
+            db.commit()
+            checks = check_cleanup("missing-version", missing_version_canvas(), os.path.join(root, "artifacts"), db)
+        checks += check_cleanup("unbound-input", unbound_input_canvas(), os.path.join(root, "artifacts"))
+        engine.dispose()
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nFailed runs are cleaned up" if passed else "\nRun cleanup regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
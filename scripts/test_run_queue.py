@@ -0,0 +1,91 @@
+"""
+Run queue test.
+
+Claims run jobs on a SQLite database with ``RunJobCRUD`` and lets their
+leases expire: an expired job must be queued again and claimable by another
+worker, the worker that lost it can neither renew nor finish it, and a job
+that used up its attempts fails along with its run:
+
+    python scripts/test_run_queue.py
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.crud.run_job import RunJobCRUD
+from backend.models.database import Base, CanvasRun
+
+# Leases that are already over when they are granted
+EXPIRED = -1
+
+def check_lease_expiry(session_factory) -> List[Tuple[str, bool]]:
+    with session_factory() as db:
+        db.add(CanvasRun(run_id="run", canvas_id="canvas", status="queued"))
+        db.commit()
+        RunJobCRUD.enqueue(db, run_id="run", max_attempts=3)
+
+        first = [j.worker_id for j in RunJobCRUD.claim(db, worker_id="w1", lease_seconds=EXPIRED)]
+        claimed_twice = RunJobCRUD.claim(db, worker_id="w2", lease_seconds=60)
+        requeued, failed = RunJobCRUD.requeue_expired(db)
+        job = RunJobCRUD.get_by_run_id(db, "run")
+        status_after_expiry = job.status
+
+        second = RunJobCRUD.claim(db, worker_id="w2", lease_seconds=60)
+        held_by_first = RunJobCRUD.heartbeat(db, worker_id="w1", job_ids=[job.id], lease_seconds=60)
+        held_by_second = RunJobCRUD.heartbeat(db, worker_id="w2", job_ids=[job.id], lease_seconds=60)
+        finished_by_first = RunJobCRUD.finish(db, job_id=job.id, worker_id="w1", status="completed")
+        finished_by_second = RunJobCRUD.finish(db, job_id=job.id, worker_id="w2", status="completed")
+        db.refresh(job)
+        return [
+            ("job is claimed", first == ["w1"]),
+            ("a leased job isn't claimed again", claimed_twice == []),
+            ("expired lease is requeued", (requeued, failed) == (1, 0) and status_after_expiry == "queued"),
+            ("requeued job is claimed by another worker", [j.worker_id for j in second] == ["w2"]),
+            ("attempts are counted", second[0].attempts == 2 if second else False),
+            ("lost lease can't be renewed", held_by_first == []),
+            ("current lease is renewed", held_by_second == [job.id]),
+            ("lost lease can't finish the job", not finished_by_first),
+            ("current lease finishes the job", finished_by_second and job.status == "completed"),
+        ]
+
+def check_attempts_used_up(session_factory) -> List[Tuple[str, bool]]:
+    with session_factory() as db:
+        db.add(CanvasRun(run_id="doomed", canvas_id="canvas", status="queued"))
+        db.commit()
+        RunJobCRUD.enqueue(db, run_id="doomed", max_attempts=2)
+
+        counts = []
+        for worker_id in ("w1", "w2"):
+            RunJobCRUD.claim(db, worker_id=worker_id, lease_seconds=EXPIRED)
+            counts.append(RunJobCRUD.requeue_expired(db))
+        job = RunJobCRUD.get_by_run_id(db, "doomed")
+        run = db.query(CanvasRun).filter(CanvasRun.run_id == "doomed").one()
+        return [
+            ("job is requeued while it has attempts left", counts[0] == (1, 0)),
+            ("job fails once its attempts are used up", counts[1] == (0, 1) and job.status == "failed"),
+            ("run of a failed job fails", run.status == "failed" and run.error is not None),
+            ("failed job isn't claimed", RunJobCRUD.claim(db, worker_id="w3", lease_seconds=60) == []),
+        ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        engine = create_engine(f"sqlite:///{os.path.join(root, 'queue.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        for check in (check_lease_expiry, check_attempts_used_up):
+            for description, ok in check(session_factory):
+                print(f"{'PASS' if ok else 'FAIL'}  {description}")
+                passed = passed and ok
+        engine.dispose()
+    print("\nRun queue recovers lost leases" if passed else "\nRun queue regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Run execution test.
+
+Executes queued runs of a canvas with ``execute_run`` on a SQLite database,
+in full and then incrementally, recording the thread of every statement:
+none may run on the event loop thread, and both runs must complete with
+their module results stored:
+
+    python scripts/test_run_worker.py
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["EXECUTOR_BACKEND"] = "thread"
+
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.worker import execute_run
+from backend.models.database import Base, Canvas, CanvasRun, Module, ModuleVersion
+
+def seed(session_factory):
+    now = datetime.utcnow()
+    with session_factory() as db:
+        db.add(Module(module_id="module", name="module", type="python", created_at=now, updated_at=now))
+        db.add(ModuleVersion(module_id="module", version="1", code="x = 1", config={}))
+        db.add(Canvas(canvas_id="canvas", name="canvas", module_config={
+            "module": {"module_id": "module", "version": "1"}
+        }))
+        db.add(CanvasRun(run_id="full", canvas_id="canvas", status="queued", started_at=now))
+        db.add(CanvasRun(
+            run_id="incremental",
+            canvas_id="canvas",
+            status="queued",
+            started_at=now,
+            cache_config={"incremental": True}
+        ))
+        db.commit()
+
+def check_runs(session_factory, statement_threads: List[int]) -> List[Tuple[str, bool]]:
+    async def execute():
+        loop_thread = threading.get_ident()
+        await execute_run(session_factory, "full")
+        await execute_run(session_factory, "incremental")
+        return loop_thread
+
+    loop_thread = asyncio.run(execute())
+    executed = list(statement_threads)
+    with session_factory() as db:
+        runs = {run.run_id: run for run in db.query(CanvasRun).all()}
+        return [
+            ("statements were executed", len(executed) > 0),
+            ("no statement runs on the event loop", loop_thread not in executed),
+            ("full run completes", runs["full"].status == "completed"),
+            ("full run stores its module results", (runs["full"].module_runs or {}).get("module", {}).get("status") == "completed"),
+            ("incremental run completes", runs["incremental"].status == "completed"),
+            ("incremental run reuses the full run", (runs["incremental"].metrics or {}).get("incremental", {}).get("reused") == 1),
+        ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(root, 'runs.db')}",
+            connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        seed(session_factory)
+        statement_threads = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statement_threads.append(threading.get_ident()))
+        checks = check_runs(session_factory, statement_threads)
+        engine.dispose()
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nRuns execute off the event loop" if passed else "\nRun execution regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Run result writer test.
+
+Runs a ``RunResultWriter`` against a SQLite database whose writes are slowed
+down, and closes it while a background flush is still writing. Every module
+must end up with exactly one result row, in its last state, and be counted
+once in the run statistics:
+
+    python scripts/test_run_writer.py
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.run_writer import RunResultWriter
+from backend.crud.run_stats import RunStatsCRUD
+from backend.models.database import Base, CanvasRun, ModuleRunResult as ModuleRunResultRow
+from backend.schemas.run import ModuleRunResult, RunStatus
+
+def result(module_id: str, status: RunStatus) -> ModuleRunResult:
+    now = datetime.utcnow()
+    return ModuleRunResult(
+        module_id=module_id,
+        version="1",
+        status=status,
+        started_at=now,
+        completed_at=now if status != RunStatus.RUNNING else None,
+        execution_time=0.1 if status != RunStatus.RUNNING else None
+    )
+
+async def close_during_flush(session_factory, writing: threading.Event) -> None:
+    writer = RunResultWriter(session_factory, flush_interval=0.01)
+    await writer.start()
+    writer.record("run", result("a", RunStatus.RUNNING))
+    writer.record("run", result("b", RunStatus.RUNNING))
+    # Wait for the background flush to be inside its INSERT, then finish the
+    # modules and close while it is still there
+    await asyncio.to_thread(writing.wait, 5)
+    writer.record("run", result("a", RunStatus.COMPLETED))
+    writer.record("run", result("b", RunStatus.FAILED))
+    await writer.close()
+
+def check_close_during_flush(root: str) -> List[Tuple[str, bool]]:
+    engine = create_engine(f"sqlite:///{os.path.join(root, 'runs.db')}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        db.add(CanvasRun(run_id="run", canvas_id="canvas", status="running"))
+        db.commit()
+
+    writing = threading.Event()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def slow_insert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO module_run_results") and not writing.is_set():
+            writing.set()
+            time.sleep(0.5)
+
+    asyncio.run(close_during_flush(session_factory, writing))
+
+    with session_factory() as db:
+        rows = db.query(ModuleRunResultRow).order_by(ModuleRunResultRow.module_id).all()
+        statuses = {row.module_id: row.status for row in rows}
+        stats = {m: RunStatsCRUD.get(db, module_id=m) for m in ("a", "b")}
+    engine.dispose()
+    return [
+        ("one row per module", len(rows) == 2),
+        ("rows hold the last state", statuses == {"a": "completed", "b": "failed"}),
+        ("completed module counted once", stats["a"] is not None and stats["a"].total_runs == 1),
+        ("failed module counted once", stats["b"] is not None and stats["b"].failed_runs == 1),
+    ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        for description, ok in check_close_during_flush(root):
+            print(f"{'PASS' if ok else 'FAIL'}  {description}")
+            passed = passed and ok
+    print("\nRun results are written once" if passed else "\nRun writer regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
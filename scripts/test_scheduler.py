@@ -0,0 +1,141 @@
+"""
+Scheduler misfire test.
+
+Restarts a ``CanvasScheduler`` three days after the last recorded fire of
+daily canvases and checks each misfire policy: skip queues nothing,
+run_once queues one run, catch_up one per missed fire up to max_catch_up.
+Also checks that an on-time fire queues one run and that a second scheduler
+doesn't dispatch fires the first one claimed:
+
+    python scripts/test_scheduler.py
+"""
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.core.scheduler import CanvasScheduler, Schedule
+from backend.models.database import Base, Canvas, CanvasRun, CanvasScheduleState, RunJob
+
+CREATED = datetime(2024, 1, 1)
+LAST_FIRE = datetime(2024, 1, 7, 2, 0)
+# Fires of Jan 8, 9 and 10 were missed
+RESTART = datetime(2024, 1, 10, 12, 0)
+
+def schedule_config(**overrides: Any) -> Dict[str, Any]:
+    config = {
+        "frequency": "daily",
+        "start_time": "02:00",
+        "jitter_seconds": 0,
+        "misfire_grace_seconds": 300,
+        "skip_if_running": False
+    }
+    config.update(overrides)
+    return config
+
+def restart(session_factory, canvas_id: str, config: Dict[str, Any], now: datetime) -> CanvasScheduler:
+    """Load a canvas into a new scheduler as after a restart, and dispatch what is due at ``now``"""
+    with session_factory() as db:
+        canvas = db.query(Canvas).filter(Canvas.canvas_id == canvas_id).first()
+        if canvas is None:
+            canvas = Canvas(canvas_id=canvas_id, name=canvas_id, created_at=CREATED, schedule_config=config)
+            db.add(canvas)
+            db.commit()
+        last_fire = db.query(CanvasScheduleState.last_fire_at)\
+            .filter(CanvasScheduleState.canvas_id == canvas_id).scalar()
+        scheduler = CanvasScheduler(session_factory=session_factory, refresh_interval=60)
+        scheduler.update_canvas(canvas, last_fire=last_fire or LAST_FIRE)
+    for due_canvas_id, fires, schedule, account_id in scheduler.pop_due(now):
+        scheduler.dispatch(due_canvas_id, fires, schedule, account_id)
+    return scheduler
+
+def state(session_factory, canvas_id: str) -> Tuple[int, int, Any, Any]:
+    """Runs and queued jobs of a canvas, its last claimed fire and outcome"""
+    with session_factory() as db:
+        runs = db.query(CanvasRun).filter(CanvasRun.canvas_id == canvas_id).count()
+        jobs = db.query(RunJob).join(CanvasRun, CanvasRun.run_id == RunJob.run_id)\
+            .filter(CanvasRun.canvas_id == canvas_id).count()
+        row = db.get(CanvasScheduleState, canvas_id)
+        return runs, jobs, row.last_fire_at if row else None, row.last_outcome if row else None
+
+def check_misfire_policies(session_factory) -> List[Tuple[str, bool]]:
+    latest_missed = datetime(2024, 1, 10, 2, 0)
+    next_fire = datetime(2024, 1, 11, 2, 0)
+    checks = []
+
+    scheduler = restart(session_factory, "skip", schedule_config(misfire_policy="skip"), RESTART)
+    runs, jobs, last_fire, outcome = state(session_factory, "skip")
+    checks += [
+        ("skip queues no run", runs == 0 and jobs == 0 and scheduler.skipped == 1),
+        ("skip claims the latest missed fire", last_fire == latest_missed and outcome == "skipped_misfire"),
+        ("skip waits for the next fire", scheduler._heap[0][3] == next_fire),
+    ]
+
+    scheduler = restart(session_factory, "run_once", schedule_config(misfire_policy="run_once"), RESTART)
+    runs, jobs, last_fire, outcome = state(session_factory, "run_once")
+    checks += [
+        ("run_once queues one run", runs == 1 and jobs == 1 and scheduler.dispatched == 1),
+        ("run_once claims the latest missed fire", last_fire == latest_missed and outcome == "queued"),
+        ("run_once waits for the next fire", scheduler._heap[0][3] == next_fire),
+    ]
+
+    config = schedule_config(misfire_policy="catch_up", max_catch_up=2)
+    scheduler = restart(session_factory, "catch_up", config, RESTART)
+    runs, jobs, last_fire, outcome = state(session_factory, "catch_up")
+    checks += [
+        ("catch_up queues a run per missed fire up to max_catch_up", runs == 2 and jobs == 2),
+        ("catch_up claims the latest missed fire", last_fire == latest_missed),
+    ]
+
+    # The missed fires are counted from the last one claimed
+    scheduler = restart(session_factory, "catch_up", config, datetime(2024, 1, 11, 2, 1))
+    checks.append(("on-time fire queues one run", state(session_factory, "catch_up")[0] == 3 and scheduler.dispatched == 1))
+    return checks
+
+def check_claimed_once(session_factory) -> List[Tuple[str, bool]]:
+    config = schedule_config(misfire_policy="catch_up", max_catch_up=5)
+    restart(session_factory, "claimed", config, RESTART)
+    # A second scheduler that missed the first one's claim dispatches the same fires
+    second = CanvasScheduler(session_factory=session_factory, refresh_interval=60)
+    with session_factory() as db:
+        canvas = db.query(Canvas).filter(Canvas.canvas_id == "claimed").one()
+        second.update_canvas(canvas, last_fire=LAST_FIRE)
+    for canvas_id, fires, schedule, account_id in second.pop_due(RESTART):
+        second.dispatch(canvas_id, fires, schedule, account_id)
+    return [
+        ("claimed fires aren't dispatched twice", state(session_factory, "claimed")[0] == 3 and second.dispatched == 0),
+    ]
+
+def check_schedule() -> List[Tuple[str, bool]]:
+    schedule = Schedule("daily", datetime(2024, 1, 1, 2, 0).time(), CREATED.date(), max_catch_up=10)
+    return [
+        ("missed fires are listed oldest first",
+         schedule.fires_between(datetime(2024, 1, 8, 2, 0), RESTART, 10)
+         == [datetime(2024, 1, d, 2, 0) for d in (8, 9, 10)]),
+        ("only the latest missed fires are kept",
+         schedule.fires_between(datetime(2024, 1, 8, 2, 0), RESTART, 2)
+         == [datetime(2024, 1, d, 2, 0) for d in (9, 10)]),
+    ]
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        engine = create_engine(f"sqlite:///{os.path.join(root, 'schedules.db')}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        checks = check_misfire_policies(session_factory) + check_claimed_once(session_factory) + check_schedule()
+        engine.dispose()
+    for description, ok in checks:
+        print(f"{'PASS' if ok else 'FAIL'}  {description}")
+        passed = passed and ok
+    print("\nMisfires are handled by policy" if passed else "\nScheduler regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Cache serialization round-trip test.
+
+Dumps values through ``backend.core.cache.serialization`` and checks they
+load back equal, with the same type, dtype and shape: 0-d, empty,
+non-contiguous and structured arrays, and DataFrames with numeric, object and
+extension columns. Large numeric buffers must come back memory-mapped:
+
+    python scripts/test_serialization.py
+"""
+import sys
+import os
+import tempfile
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.core.cache import serialization
+
+def sample_arrays() -> List[Tuple[str, Any]]:
+    grid = np.arange(24, dtype=np.int64).reshape(4, 6)
+    return [
+        ("0-d int array", np.array(5)),
+        ("0-d float array", np.array(2.5)),
+        ("0-d datetime array", np.array(np.datetime64("2024-01-01"))),
+        ("empty array", np.zeros((0,))),
+        ("empty 2-d array", np.zeros((0, 3))),
+        ("empty inner dimension", np.zeros((2, 0, 3))),
+        ("transposed array", grid.T),
+        ("strided slice", grid[::2, 1::3]),
+        ("Fortran-ordered array", np.asfortranarray(grid)),
+        ("structured array", np.zeros(3, dtype=[("a", "i4"), ("b", "f8")])),
+        ("unicode array", np.array(["ab", "c"])),
+        ("complex array", np.array([1 + 2j, 3 - 4j])),
+    ]
+
+def sample_frames() -> List[Tuple[str, Any]]:
+    return [
+        ("empty frame", pd.DataFrame({"a": []})),
+        ("empty series", pd.Series([], dtype="float64")),
+        ("frame from a transposed block", pd.DataFrame(np.ones((3, 2)).T, columns=list("abc"))),
+        ("mixed frame", pd.DataFrame({
+            "x": np.arange(3, dtype=np.float32),
+            "name": ["a", None, "c"],
+            "n": pd.array([1, None, 3], dtype="Int64"),
+            "tag": pd.Categorical(["u", "v", "u"]),
+            "when": pd.date_range("2024-01-01", periods=3, tz="UTC")
+        }, index=pd.Index([10, 20, 30], name="id"))),
+        ("series with a name", pd.Series([1.0, np.nan], name="score")),
+    ]
+
+def round_trip(value: Any, root: str, compression=None) -> Any:
+    # A file per value: loaded values map their file, which mustn't be
+    # rewritten while they're alive (the disk tier renames new entries in)
+    path = os.path.join(root, uuid.uuid4().hex)
+    serialization.dump(value, path, compression=compression)
+    return serialization.load(path)
+
+def check_arrays(root: str) -> List[Tuple[str, bool]]:
+    checks = []
+    for description, value in sample_arrays():
+        loaded = round_trip(value, root)
+        checks.append((description, (
+            type(loaded) is np.ndarray
+            and loaded.shape == value.shape
+            and loaded.dtype == value.dtype
+            and np.array_equal(loaded, value)
+        )))
+    return checks
+
+def check_frames(root: str) -> List[Tuple[str, bool]]:
+    checks = []
+    for description, value in sample_frames():
+        loaded = round_trip(value, root)
+        checks.append((description, type(loaded) is type(value) and loaded.equals(value)))
+    return checks
+
+def check_containers(root: str) -> List[Tuple[str, bool]]:
+    value = {"variables": {"scalar": np.array(7), "frame": pd.DataFrame({"a": [1, 2]}), "nan": float("nan")}}
+    loaded = round_trip(value, root)["variables"]
+    big = np.random.rand(1 << 20)
+    mapped = round_trip(big, root)
+    checks = [
+        ("0-d array in an entry", loaded["scalar"].shape == () and loaded["scalar"] == 7),
+        ("frame in an entry", loaded["frame"].equals(value["variables"]["frame"])),
+        ("NaN in an entry", loaded["nan"] != loaded["nan"]),
+        ("large arrays are memory-mapped", not mapped.flags.owndata and np.array_equal(mapped, big)),
+    ]
+    if serialization.lz4_frame is not None:
+        checks.append(("lz4 round-trip", np.array_equal(round_trip(big, root, "lz4"), big)))
+    return checks
+
+def main() -> int:
+    passed = True
+    with tempfile.TemporaryDirectory() as root:
+        for check in (check_arrays, check_frames, check_containers):
+            for description, ok in check(root):
+                print(f"{'PASS' if ok else 'FAIL'}  {description}")
+                passed = passed and ok
+    print("\nAll values round-trip" if passed else "\nSerialization regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
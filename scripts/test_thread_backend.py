@@ -0,0 +1,63 @@
+"""
+Thread backend limits test.
+
+Runs modules on ``ThreadBackend``: modules with CPU, memory or thread limits,
+which a thread can't enforce, must fail without running, and a module that
+times out must fail with its timeout recorded as not enforced:
+
+    python scripts/test_thread_backend.py
+"""
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from backend.core.backends import ThreadBackend
+
+def module(code: str, limits: Dict[str, Any]) -> SimpleNamespace:
+    return SimpleNamespace(module_id="module", version="1", code=code, config={"limits": limits})
+
+async def timed_run(code: str, limits: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    context = SimpleNamespace(canvas_id="canvas", run_id="run", shared_vars={}, artifacts=None)
+    started = time.monotonic()
+    outcome = await ThreadBackend().run(module(code, limits), context, {})
+    return outcome, time.monotonic() - started
+
+def run(code: str, limits: Dict[str, Any]) -> Dict[str, Any]:
+    return asyncio.run(timed_run(code, limits))[0]
+
+def check_refused_limits() -> List[Tuple[str, bool]]:
+    checks = []
+    for name, value in (("cpu_seconds", 1), ("max_rss_mb", 100), ("max_threads", 1)):
+        outcome = run("ran = True", {name: value})
+        error = outcome["error"] or {}
+        checks.append((f"{name} is refused", error.get("limit") == name and error.get("enforced") is False))
+        checks.append((f"module with {name} doesn't run", "ran" not in outcome["output"]))
+    return checks
+
+def check_timeout() -> List[Tuple[str, bool]]:
+    outcome, elapsed = asyncio.run(timed_run("import time\ntime.sleep(1)", {"timeout_seconds": 0.2}))
+    error = outcome["error"] or {}
+    unlimited = run("x = 1", {"timeout_seconds": 5})
+    return [
+        ("timed out module fails", error.get("limit") == "timeout_seconds"),
+        ("timeout is recorded as not enforced", error.get("enforced") is False),
+        ("timeout gives up on the module", elapsed < 1),
+        ("module within its timeout runs", unlimited["error"] is None and unlimited["output"].get("x") == 1),
+    ]
+
+def main() -> int:
+    passed = True
+    for check in (check_refused_limits, check_timeout):
+        for description, ok in check():
+            print(f"{'PASS' if ok else 'FAIL'}  {description}")
+            passed = passed and ok
+    print("\nThread backend limits are reported" if passed else "\nThread backend regressions found")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,5 +21,10 @@ setup(
         "numpy>=1.24.0",
         "scikit-learn>=1.3.0"
     ],
+    extras_require={
+        "async": ["greenlet>=3.0.0", "aiomysql>=0.2.0"],  # DB_ASYNC
+        "lz4": ["lz4>=4.3.0"],  # CACHE_COMPRESSION=lz4
+        "limits": ["threadpoolctl>=3.2.0"],  # MODULE_MAX_THREADS for native thread pools
+    },
     python_requires=">=3.9",
 ) 
\ No newline at end of file